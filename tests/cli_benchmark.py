@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+import statistics
+import argparse
+import subprocess
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+COMMANDS = [
+    ["list-profiles"],
+    ["dump", "terraria"],
+    ["apply", "terraria", "--dry_run"],
+]
+
+# modules which only some commands need, the rest of them doesn't import them
+LAZY_MODULES = [
+    "xenon_driver.decoder",
+    "xenon_driver.compiler",
+    "xenon_driver.macro_simulator",
+    "xenon_driver.daemon",
+    "xenon_driver.watcher",
+]
+
+# checks that no command pulls in gui
+QT_CHECK = (
+    "import sys\n"
+    "from xenon_driver.main import main\n"
+    "try:\n"
+    "    main(sys.argv[1:])\n"
+    "except SystemExit:\n"
+    "    pass\n"
+    "sys.stdout.flush()\n"
+    "print('PyQt5' in sys.modules, file=sys.stderr)\n"
+    f"print(' '.join(name for name in {LAZY_MODULES} if name in sys.modules), file=sys.stderr)\n"
+)
+
+
+def cold_start(command, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "xenon_driver.main", *command],
+            cwd=ROOT_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+def imported(command):
+    """
+    Whether command imports PyQt5 and which of LAZY_MODULES it imports
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", QT_CHECK, *command],
+        cwd=ROOT_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    # last two lines, stderr ends with newline
+    qt, lazy = result.stderr.split("\n")[-3:-1]
+    return qt == "True", lazy.split()
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rounds", "-n", type=int, default=10)
+
+    args = p.parse_args()
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+    interpreter = (time.perf_counter() - start) * 1000 / args.rounds
+    print(f"{'python -c pass':<32} mean: {interpreter:8.3f} ms")
+
+    for command in COMMANDS:
+        timings = cold_start(command, args.rounds)
+        name = " ".join(command)
+        print(
+            f"{name:<32} mean: {statistics.mean(timings):8.3f} ms  "
+            f"median: {statistics.median(timings):8.3f} ms  "
+            f"max: {max(timings):8.3f} ms"
+        )
+        qt, lazy = imported(command)
+        if qt:
+            print(f"\033[91mBENCHMARK: '{name}' imports PyQt5!\033[0m")
+        if lazy:
+            print(f"\033[91mBENCHMARK: '{name}' imports {', '.join(lazy)}\033[0m")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import glob
+import time
+import tempfile
+import argparse
+from pathlib import Path
+from context import xenon_driver
+from xenon_driver.binding import settings_of_label
+from xenon_driver.configuration import PROFILES_DIR
+from xenon_driver.compiler import compile_profiles, profile_files
+from xenon_driver.data import Data
+from xenon_driver.decoder import read_payload
+from xenon_driver.encoder import ProfileEncoder
+
+# binding of left button in mode 1 -> part of expected error
+BROKEN = {
+    "unknown_key": ("Keys combination - Ctrl+F13", "Unknown key: F13"),
+    "bad_fire_key": ("Fire key - A,fast,1", "Wrong fire key"),
+    "missing_macro": ("Macro - compiler_benchmark_missing", "Macro not found"),
+    "fire_key_speed": ("Fire key - A,300ms,1", "speed 300 not allowed"),
+}
+
+
+def generate(directory, count):
+    """
+    count copies of saved profiles and one profile for every BROKEN binding
+    """
+    originals = sorted(glob.glob(PROFILES_DIR + "*.yml"))
+    for i in range(count):
+        with open(originals[i % len(originals)], "r") as file:
+            content = file.read()
+        with open(os.path.join(directory, f"profile{i:04}.yml"), "w") as file:
+            file.write(content)
+
+    settings_yml = Data.parse_settings(open(originals[0], "rb").read())
+    for name, (binding, _) in BROKEN.items():
+        settings_yml["bindings_data"]["mode1"]["left_button"] = settings_of_label(binding)
+        Data.save_settings(settings_yml, os.path.join(directory, f"broken_{name}.yml"))
+
+
+def check(directory, output, results):
+    errors = []
+
+    for result in results:
+        name = Path(result.path).stem
+        if name.startswith("broken_"):
+            expected = BROKEN[name[len("broken_"):]][1]
+            if result.error is None or expected not in result.error:
+                errors.append(f"{name}: expected '{expected}', got {result.error}")
+            continue
+
+        if result.error is not None:
+            errors.append(f"{name}: {result.error}")
+            continue
+
+        data = Data(result.path)
+        ProfileEncoder(xenon_driver.DataHandler(data)).encode(data.settings_yml)
+        compiled = read_payload(os.path.join(output, name + ".bin"))
+        for report in ["main_data", "reset_data", "bindings_data"]:
+            if getattr(compiled, report) != getattr(data, report):
+                errors.append(f"{name}: {report} differs")
+
+    return errors
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--profiles", "-n", type=int, default=400)
+
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        generate(directory, args.profiles)
+        paths = profile_files([directory])
+        output = os.path.join(directory, "payloads")
+        os.makedirs(output)
+
+        timings = []
+        for jobs in [1, None]:
+            start = time.perf_counter()
+            results = compile_profiles(paths, output=output, jobs=jobs)
+            timings.append(time.perf_counter() - start)
+
+        errors = check(directory, output, results)
+
+    if errors:
+        for error in errors:
+            print(f"\033[91mCOMPILER: {error}\033[0m")
+        return
+
+    print(f"{len(paths)} profiles, {len(BROKEN)} broken ones reported")
+    print(f"{'one process':<24} {timings[0] * 1000:8.1f} ms")
+    print(f"{f'{os.cpu_count()} processes':<24} {timings[1] * 1000:8.1f} ms  ({timings[0] / timings[1]:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import os
+import socket
+import time
+import tempfile
+import threading
+import statistics
+import argparse
+from context import xenon_driver
+from xenon_driver.configuration import PROFILES_DIR
+from xenon_driver.daemon import DaemonError, ProfileDaemon, send_command
+from xenon_driver.encoder import ProfileEncoder
+from xenon_driver.fake_usb import FakeBackend
+from xenon_driver.logger import xenon_logger
+
+
+def report(name, timings):
+    print(
+        f"{name:<24} mean: {statistics.mean(timings):8.3f} ms  "
+        f"median: {statistics.median(timings):8.3f} ms  "
+        f"max: {max(timings):8.3f} ms"
+    )
+
+
+def check_errors(daemon, driver):
+    """
+    Every command is answered, also when it fails inside
+    """
+    errors = []
+
+    def failing(*args):
+        raise TypeError("bug inside of command")
+
+    if not daemon.execute("switch").startswith("error wrong arguments"):
+        errors.append("missing argument not reported")
+    if not daemon.execute("list all").startswith("error wrong arguments"):
+        errors.append("extra argument not reported")
+
+    # blocking every dpi level leaves no level to use, device keeps the last one
+    daemon.execute("switch terraria")
+    answers = [daemon.execute(f"set-dpi {level} 0x8{level}") for level in range(1, 5)]
+    sent = driver.shadow[0x0304]
+    if not answers[-1].startswith("error dpi levels 0") or sent != bytes(daemon.current.main_data):
+        errors.append(f"blocking every dpi level answered {answers[-1]}")
+
+    # traceback of expected failure is not printed
+    switch = daemon.commands["switch"]
+    daemon.commands["switch"] = failing
+    xenon_logger.disabled = True
+    try:
+        answer = daemon.execute("switch terraria")
+    finally:
+        daemon.commands["switch"] = switch
+        xenon_logger.disabled = False
+    if answer != "error switch failed: bug inside of command":
+        errors.append(f"failing command answered {answer}")
+
+    return errors
+
+
+def check_broken_profiles(driver):
+    """
+    Profiles which can't be read are skipped, the rest is loaded
+    """
+    broken = {
+        "syntax.yml": "main_data: [1, 2\n",
+        "list.yml": "- main_data\n- bindings_data\n",
+        "scalar.yml": "profile\n",
+        "missing.yml": "main_data: {}\n",
+        "bindings.yml": "main_data: {}\nbindings_data: [1, 2]\n",
+        "json.json": "{\"main_data\": ",
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        with open(PROFILES_DIR + "terraria.yml") as source, open(os.path.join(directory, "good.yml"), "w") as file:
+            file.write(source.read())
+        for name, content in broken.items():
+            with open(os.path.join(directory, name), "w") as file:
+                file.write(content)
+
+        daemon = ProfileDaemon(driver, os.path.join(directory, "unused.sock"), profiles_dir=directory)
+        xenon_logger.disabled = True
+        try:
+            daemon.load_profiles()
+        except Exception as e:
+            return [f"broken profile stopped loading: {type(e).__name__} {e}"]
+        finally:
+            xenon_logger.disabled = False
+
+    if list(daemon.profiles) != ["good"]:
+        return [f"loaded {list(daemon.profiles)}, should be only good"]
+    return []
+
+
+def check_concurrency(daemon, driver, profiles):
+    """
+    Commands from many clients at once, device ends up with the profile daemon keeps as current
+    """
+    def client(i):
+        for j in range(10):
+            if (i + j) % 2:
+                daemon.execute(f"switch {profiles[(i + j) % len(profiles)]}")
+            else:
+                daemon.execute(f"set-dpi {j % 4 + 1} 0x0{j % 8}")
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for w_value, name in xenon_driver.Driver.REPORTS:
+        if driver.shadow.get(w_value) != bytes(getattr(daemon.current, name)):
+            return [f"device has other {name} than current profile"]
+    return []
+
+
+def check_socket(socket_path, driver):
+    """
+    Second daemon doesn't take socket of running one, but socket left by ended one is reused
+    """
+    errors = []
+    try:
+        ProfileDaemon(driver, socket_path).prepare_socket()
+        errors.append("second daemon took socket of running one")
+    except DaemonError:
+        pass
+    if send_command("list", socket_path)[:2] != "ok":
+        errors.append("running daemon lost its socket")
+
+    stale_path = os.path.join(os.path.dirname(socket_path), "stale.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(stale_path)
+    stale.close()
+    try:
+        ProfileDaemon(driver, stale_path).prepare_socket()
+    except DaemonError as e:
+        errors.append(f"socket left by ended daemon not reused: {e}")
+    if os.path.exists(stale_path):
+        errors.append("socket left by ended daemon not removed")
+
+    return errors
+
+
+def measure_daemon(socket_path, profiles, rounds):
+    timings = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        answer = send_command(f"switch {profiles[i % len(profiles)]}", socket_path)
+        timings.append((time.perf_counter() - start) * 1000)
+
+        if not answer.startswith("ok"):
+            print(f"\033[91mBENCHMARK: {answer}\033[0m")
+            return None
+
+    return timings
+
+
+def measure_without_daemon(backend, profiles, rounds):
+    # what every switch costs without daemon: find device, encode profile, send everything
+    timings = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        with xenon_driver.Driver(0x258A, 0x1007, backend=backend) as driver:
+            data = xenon_driver.Data(PROFILES_DIR + profiles[i % len(profiles)] + ".yml")
+            ProfileEncoder(xenon_driver.DataHandler(data)).encode(data.settings_yml)
+            driver.send_data(data, force=True)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rounds", "-n", type=int, default=50)
+    p.add_argument("--find_latency", type=float, default=5.0, help="fake bus search time in ms")
+    p.add_argument("--transfer_latency", type=float, default=1.0, help="fake control transfer time in ms")
+
+    args = p.parse_args()
+
+    backend = FakeBackend(find_latency=args.find_latency / 1000, transfer_latency=args.transfer_latency / 1000)
+    backend.add_device()
+
+    socket_path = os.path.join(tempfile.mkdtemp(), "xenon_driver.sock")
+    driver = xenon_driver.Driver(0x258A, 0x1007, backend=backend)
+    daemon = ProfileDaemon(driver, socket_path)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+
+    while not os.path.exists(socket_path):
+        time.sleep(0.01)
+
+    profiles = send_command("list", socket_path)[3:].split()
+    errors = check_errors(daemon, driver) + check_concurrency(daemon, driver, profiles)
+    errors += check_socket(socket_path, driver)
+    errors += check_broken_profiles(driver)
+    transfers = len(backend.transfers)
+    with_daemon = measure_daemon(socket_path, profiles, args.rounds)
+    daemon_transfers = len(backend.transfers) - transfers
+    stats = send_command("stats", socket_path)
+
+    daemon.shutdown()
+    thread.join()
+    driver.disconnect()
+
+    for error in errors:
+        print(f"\033[91mDAEMON: {error}\033[0m")
+    if with_daemon is None or errors:
+        return
+
+    transfers = len(backend.transfers)
+    without_daemon = measure_without_daemon(backend, profiles, args.rounds)
+
+    report("switch with daemon", with_daemon)
+    report("switch without daemon", without_daemon)
+    print(f"transfers per switch: {daemon_transfers / args.rounds:.2f} with daemon, "
+          f"{(len(backend.transfers) - transfers) / args.rounds:.2f} without")
+    print(f"daemon {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import os
+import glob
+import time
+import tempfile
+import argparse
+import copy
+from pathlib import Path
+from context import xenon_driver
+from xenon_driver.configuration import PROFILES_DIR, MACROS_DIR
+from xenon_driver.decoder import ProfileDecoder, read_payload
+from xenon_driver.encoder import ProfileEncoder, EncodeError
+from xenon_driver.binding import settings_of_label
+from xenon_driver.layout import Layout
+from xenon_driver.macro_compiler import translate
+
+# bindings and macro which press modifiers as keys and as bits of key combination
+MODIFIER_BINDINGS = {
+    "fire_button": "Fire key - Ctrl,30ms,1",
+    "dpi_button": "Keys combination - Shift+RightCtrl+C",
+    "back_button": "Fire key - RightAlt,50ms,3",
+}
+MODIFIER_MACRO = "1,1:Key Ctrl - Down,Key Shift - Down,Key C - Down,Key C - Up,Key Shift - Up,Key Ctrl - Up"
+
+
+def timeit(function, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - start) * 1e6 / rounds
+
+
+def encode(settings_yml, mode):
+    data = xenon_driver.Data()
+    ProfileEncoder(xenon_driver.DataHandler(data)).encode(settings_yml, mode)
+    return data
+
+
+def payload(data):
+    return bytes(data.main_data) + bytes(data.reset_data) + bytes(data.bindings_data)
+
+
+def compare_settings(name, original, decoded):
+    errors = []
+
+    for mode_name, mode_bindings in original["bindings_data"].items():
+        for button_name, binding in mode_bindings.items():
+            decoded_name = decoded["bindings_data"][mode_name][button_name]["name"]
+            if decoded_name != binding["name"]:
+                errors.append(f"{name} {mode_name} {button_name}: {binding['name']} -> {decoded_name}")
+
+    original_main, decoded_main = original["main_data"], decoded["main_data"]
+    for key in ["chosen", "rr", "dpis"]:
+        if original_main[key] != decoded_main[key]:
+            errors.append(f"{name} {key}: {original_main[key]} -> {decoded_main[key]}")
+
+    chosen = original_main["chosen"].lower()
+    if original_main[chosen]["color"] != decoded_main[chosen]["color"]:
+        errors.append(f"{name} color: {original_main[chosen]['color']} -> {decoded_main[chosen]['color']}")
+    if (original_main[chosen]["option"] or 0) != (decoded_main[chosen]["option"] or 0):
+        errors.append(f"{name} option: {original_main[chosen]['option']} -> {decoded_main[chosen]['option']}")
+
+    return errors
+
+
+def check_profiles(directory):
+    """
+    encode -> decode -> encode of every profile in every mode gives the same bytes
+    """
+    errors = []
+    decoded_count = 0
+
+    for path in sorted(glob.glob(PROFILES_DIR + "*.yml")):
+        name = Path(path).stem
+        original = xenon_driver.Data(path).settings_yml
+
+        for mode in Layout.MODES:
+            try:
+                data = encode(original, mode)
+            except EncodeError:
+                continue
+
+            # through both kinds of payload files
+            binary_path = os.path.join(directory, f"{name}{mode}.bin")
+            with open(binary_path, "wb") as file:
+                file.write(payload(data))
+            text_path = os.path.join(directory, f"{name}{mode}.hex")
+            with open(text_path, "w") as file:
+                for report_name in Layout.REPORT_SIZES:
+                    file.write(f"{report_name}:\n")
+                    file.write(" ".join(f"0x{byte:02x}" for byte in getattr(data, report_name)) + "\n")
+
+            for payload_path in [binary_path, text_path]:
+                read_data = read_payload(payload_path)
+                if payload(read_data) != payload(data):
+                    errors.append(f"{payload_path}: read bytes differ")
+                    continue
+
+                decoded = ProfileDecoder(xenon_driver.DataHandler(read_data)).decode(name)
+                decoded_count += 1
+                if decoded.current_mode != mode:
+                    errors.append(f"{name}: mode {mode} -> {decoded.current_mode}")
+                if decoded.macros:
+                    errors.append(f"{name}: saved macros not recognized: {list(decoded.macros)}")
+                errors += compare_settings(f"{name} (mode {mode})", original, decoded.settings_yml)
+
+                if payload(encode(decoded.settings_yml, mode)) != payload(data):
+                    errors.append(f"{name} (mode {mode}): encoded again differs")
+
+    return errors, decoded_count
+
+
+def check_macros():
+    """
+    Text of every saved macro is decoded from its bytes
+    """
+    errors = []
+    decoder = ProfileDecoder(None)
+
+    for (macro_mode, cycle_times, macro_bytes), name in ProfileDecoder.load_known_macros().items():
+        with open(MACROS_DIR + name, "r") as file:
+            text = file.readline()
+        decoded = decoder.decode_macro(macro_mode, cycle_times, macro_bytes)
+        if decoded != text:
+            errors.append(f"macro {name}: {text} -> {decoded}")
+
+    return errors
+
+
+def check_modifiers():
+    """
+    Modifiers in bindings and macros are decoded to the same names
+    """
+    errors = []
+
+    settings_yml = copy.deepcopy(xenon_driver.Data(PROFILES_DIR + "profile1.yml").settings_yml)
+    for button_name, label in MODIFIER_BINDINGS.items():
+        settings_yml["bindings_data"]["mode1"][button_name] = settings_of_label(label)
+    data = encode(settings_yml, 1)
+    decoded = ProfileDecoder(xenon_driver.DataHandler(data)).decode("modifiers")
+    errors += compare_settings("modifiers", settings_yml, decoded.settings_yml)
+
+    macro_mode, cycle_times, macro_bytes, _ = translate(MODIFIER_MACRO)
+    macro_bytes = bytes(macro_bytes).ljust(Layout.MACRO_SIZE, b"\x00")
+    decoded_macro = ProfileDecoder(None).decode_macro(macro_mode, cycle_times, macro_bytes)
+    if decoded_macro != MODIFIER_MACRO:
+        errors.append(f"macro {MODIFIER_MACRO} -> {decoded_macro}")
+
+    return errors
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rounds", "-n", type=int, default=2000)
+
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        errors, decoded_count = check_profiles(directory)
+    errors += check_macros()
+    errors += check_modifiers()
+
+    if errors:
+        for error in errors:
+            print(f"\033[91mDECODER: {error}\033[0m")
+        return
+
+    print(f"{decoded_count} payloads decoded and encoded again without differences")
+
+    data = encode(xenon_driver.Data(PROFILES_DIR + "profile2.yml").settings_yml, 1)
+    data_handler = xenon_driver.DataHandler(data)
+    decoder = ProfileDecoder(data_handler)
+    decode = timeit(lambda: decoder.decode("profile2"), args.rounds)
+    print(f"{'decode profile':<24} {decode:8.3f} us")
+
+
+if __name__ == "__main__":
+    main()
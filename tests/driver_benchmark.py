@@ -0,0 +1,102 @@
+import sys
+import time
+import statistics
+import argparse
+from context import xenon_driver
+from xenon_driver.fake_usb import FakeBackend
+
+
+def measure(driver, data, rounds, cached, force=True):
+    timings = []
+    for _ in range(rounds):
+        if not cached:
+            driver.disconnect()
+
+        start = time.perf_counter()
+        result = driver.send_data(data, force=force)
+        timings.append((time.perf_counter() - start) * 1000)
+
+        if result is None:
+            print("\033[91mBENCHMARK: device not connected!\033[0m")
+            return None
+
+    return timings
+
+
+def check_multi_driver():
+    """
+    Every send reaches mice plugged in since the last one and skips unplugged ones
+    """
+    backend = FakeBackend()
+    first = backend.add_device(port_numbers=(1,))
+    data = xenon_driver.Data()
+
+    errors = []
+    with xenon_driver.MultiDriver(0x258A, 0x1007, backend=backend) as driver:
+        for step in ["one mouse", "second plugged in", "first unplugged"]:
+            if step == "second plugged in":
+                backend.add_device(port_numbers=(2,))
+            elif step == "first unplugged":
+                backend.unplug(first)
+            expected = sorted(backend.location_of(device) for device in backend.devices)
+
+            results = driver.send_data(data, force=True)
+            if [result.location for result in results] != expected or not all(result.sent for result in results):
+                errors.append(f"{step}: sent to {results}, should be sent to {expected}")
+
+    return errors
+
+
+def report(name, timings):
+    print(
+        f"{name:<16} mean: {statistics.mean(timings):8.3f} ms  "
+        f"median: {statistics.median(timings):8.3f} ms  "
+        f"max: {max(timings):8.3f} ms"
+    )
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rounds", "-n", type=int, default=20)
+    p.add_argument("--fake", "-f", action="store_true", help="use fake usb backend instead of real device")
+    p.add_argument("--find_latency", type=float, default=5.0, help="fake bus search time in ms")
+    p.add_argument("--transfer_latency", type=float, default=1.0, help="fake control transfer time in ms")
+    p.add_argument("--phases", "-p", action="store_true", help="show time spent in every phase of sending")
+
+    args = p.parse_args()
+
+    data = xenon_driver.Data()
+
+    errors = check_multi_driver()
+    if errors:
+        for error in errors:
+            print(f"\033[91mMULTI DRIVER: {error}\033[0m")
+        return
+
+    backend = None
+    if args.fake:
+        backend = FakeBackend(find_latency=args.find_latency / 1000, transfer_latency=args.transfer_latency / 1000)
+        backend.add_device()
+
+    with xenon_driver.Driver(0x258A, 0x1007, backend=backend) as driver:
+        uncached = measure(driver, data, args.rounds, cached=False)
+        cached = measure(driver, data, args.rounds, cached=True)
+        unchanged = measure(driver, data, args.rounds, cached=True, force=False)
+
+        if args.phases:
+            driver.metrics.dump(sys.stdout)
+            print()
+
+    if uncached is None or cached is None or unchanged is None:
+        return
+
+    report("find every send", uncached)
+    report("cached handle", cached)
+    report("unchanged data", unchanged)
+
+    if backend is not None:
+        print(f"fake backend: {backend.finds} bus searches, {len(backend.transfers)} transfers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+import argparse
+from context import xenon_driver
+from xenon_driver.daemon import ProfileDaemon
+from xenon_driver.fake_usb import FakeBackend
+from xenon_driver.hotplug import HotplugMonitor
+
+
+def make_fake_sysfs():
+    root = tempfile.mkdtemp()
+    # root hub and some other device, should be ignored
+    os.makedirs(os.path.join(root, "usb1"))
+    other = os.path.join(root, "1-2")
+    os.makedirs(other)
+    for name, value in (("idVendor", "046d"), ("idProduct", "c52b")):
+        with open(os.path.join(other, name), "w") as file:
+            file.write(value + "\n")
+    return root
+
+
+def wait_for_transfers(backend, count, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while len(backend.transfers) < count:
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def check():
+    """
+    Device replugged between two polls or removed and added in uevents is connected again
+    """
+    errors = []
+    root = make_fake_sysfs()
+    try:
+        backend = FakeBackend(sysfs_root=root)
+        device = backend.add_device(port_numbers=(1,))
+        connected = []
+        monitor = HotplugMonitor(
+            0x258A, 0x1007, lambda location, detected_at: connected.append(location), sysfs_root=root
+        )
+        monitor.known = monitor.present_devices()
+
+        device = backend.replug(device)
+        if monitor.poll() != {"1-1"}:
+            errors.append(f"device replugged within one interval not noticed: {connected}")
+        if monitor.poll() != set():
+            errors.append("device connected twice")
+
+        remove = (
+            b"remove@/devices/pci0000:00/usb1/1-1\0ACTION=remove\0DEVPATH=/devices/pci0000:00/usb1/1-1\0"
+            b"SUBSYSTEM=usb\0DEVTYPE=usb_device\0"
+        )
+        action, location = monitor.usb_device_event(remove)
+        if (action, location) != ("remove", "1-1"):
+            errors.append(f"remove uevent read as {action} {location}")
+        monitor.forget(location)
+        if monitor.poll() != {"1-1"}:
+            errors.append("device not connected again after remove uevent")
+    finally:
+        shutil.rmtree(root)
+
+    return errors
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rounds", "-n", type=int, default=20)
+    p.add_argument("--interval", type=float, default=0.05, help="sysfs polling interval in seconds")
+    p.add_argument("--find_latency", type=float, default=5.0, help="fake bus search time in ms")
+    p.add_argument("--transfer_latency", type=float, default=1.0, help="fake control transfer time in ms")
+
+    args = p.parse_args()
+
+    errors = check()
+    if errors:
+        for error in errors:
+            print(f"\033[91mHOTPLUG: {error}\033[0m")
+        return
+
+    root = make_fake_sysfs()
+    try:
+        backend = FakeBackend(
+            find_latency=args.find_latency / 1000, transfer_latency=args.transfer_latency / 1000, sysfs_root=root
+        )
+        device = backend.add_device(port_numbers=(1,))
+
+        driver = xenon_driver.Driver(0x258A, 0x1007, backend=backend)
+        daemon = ProfileDaemon(driver, sysfs_root=root)
+        daemon.load_profiles()
+        daemon.switch("terraria")
+
+        monitor = daemon.hotplug_monitor
+        monitor.interval = args.interval
+        monitor.uevents = False
+        thread = threading.Thread(target=monitor.run, daemon=True)
+        thread.start()
+        time.sleep(args.interval)
+
+        errors = []
+        plugged_to_configured = []
+        for _ in range(args.rounds):
+            backend.unplug(device)
+            time.sleep(args.interval * 2)
+
+            transfers = len(backend.transfers)
+            plugged = time.monotonic()
+            device = backend.replug(device)
+            if not wait_for_transfers(backend, transfers + 3):
+                errors.append("profile not applied after reconnect")
+                break
+            plugged_to_configured.append((time.monotonic() - plugged) * 1000)
+
+            if any(transfer.data is None for transfer in backend.transfers[transfers:]):
+                errors.append("wrong transfer")
+
+        monitor.stop()
+        thread.join()
+        driver.disconnect()
+    finally:
+        shutil.rmtree(root)
+
+    for error in errors:
+        print(f"\033[91mHOTPLUG: {error}\033[0m")
+    if errors:
+        return
+
+    reconnect = driver.metrics.summary()["reconnect"]
+    print(f"detected to configured:  p50: {reconnect['p50']:8.3f} ms  max: {reconnect['max']:8.3f} ms")
+    print(
+        f"plugged to configured:   mean: {sum(plugged_to_configured) / len(plugged_to_configured):8.3f} ms  "
+        f"max: {max(plugged_to_configured):8.3f} ms  (sysfs polled every {args.interval * 1000:.0f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import copy
+import time
+import argparse
+from context import xenon_driver
+from xenon_driver.binding import settings_of_label
+from xenon_driver.configuration import PROFILES_DIR
+from xenon_driver.encoder import ProfileEncoder
+from xenon_driver.macro_compiler import macro_compiler
+
+PROFILE = "profile2.yml"
+
+# binding edited between encodings
+EDITED = ("mode2", "forward_button", "Keys combination - Ctrl+C")
+
+
+def macro_lookups():
+    return macro_compiler.hits + macro_compiler.misses
+
+
+def timeit(function, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - start) * 1e6 / rounds
+
+
+def payload(data):
+    return bytes(data.main_data) + bytes(data.reset_data) + bytes(data.bindings_data)
+
+
+def full_encode(settings_yml):
+    data = xenon_driver.Data()
+    ProfileEncoder(xenon_driver.DataHandler(data)).encode(settings_yml)
+    return data
+
+
+def edit(settings_yml, bind_text):
+    mode_name, button_name, _ = EDITED
+    settings_yml["bindings_data"][mode_name][button_name] = settings_of_label(bind_text)
+
+
+def check(settings_yml):
+    """
+    Editing one button writes only its record and doesn't even look up macros
+    """
+    errors = []
+
+    data = full_encode(settings_yml)
+    encoder = ProfileEncoder(xenon_driver.DataHandler(data))
+    edited = copy.deepcopy(settings_yml)
+    edit(edited, EDITED[2])
+
+    version = max(data.report_versions.values())
+    lookups = macro_lookups()
+    encoder.encode(edited)
+
+    if macro_lookups() != lookups:
+        errors.append(f"{macro_lookups() - lookups} macros looked up again")
+    if payload(data) != payload(full_encode(edited)):
+        errors.append("incremental encoding differs from full one")
+
+    mode = int(EDITED[0][-1])
+    record_range = xenon_driver.DataHandler(data).record_ranges[EDITED[1], mode]
+    changed_ranges = data.changed_ranges(version)
+    if changed_ranges != {"bindings_data": [record_range]}:
+        errors.append(f"changed ranges {changed_ranges}, should be only {record_range} of bindings_data")
+
+    # bytes written past encoder are noticed
+    xenon_driver.DataHandler(data).set_report_rate(xenon_driver.Options.REPORT_RATE_250MHZ)
+    encoder.encode(edited)
+    if payload(data) != payload(full_encode(edited)):
+        errors.append("report rate written past encoder has not been encoded again")
+
+    return errors
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rounds", "-n", type=int, default=2000)
+
+    args = p.parse_args()
+
+    settings_yml = xenon_driver.Data(PROFILES_DIR + PROFILE).settings_yml
+    errors = check(settings_yml)
+    if errors:
+        for error in errors:
+            print(f"\033[91mINCREMENTAL: {error}\033[0m")
+        return
+
+    # the same button switched between two bindings, so every round writes something
+    original = settings_yml["bindings_data"][EDITED[0]][EDITED[1]]["name"]
+    texts = [EDITED[2], original]
+
+    lookups = macro_lookups()
+    full = timeit(lambda: full_encode(settings_yml), args.rounds)
+    full_lookups = (macro_lookups() - lookups) / args.rounds
+
+    data = full_encode(settings_yml)
+    encoder = ProfileEncoder(xenon_driver.DataHandler(data))
+    edited = copy.deepcopy(settings_yml)
+    rounds = iter(range(args.rounds))
+
+    def incremental():
+        edit(edited, texts[next(rounds) % 2])
+        encoder.encode(edited)
+
+    lookups = macro_lookups()
+    one_button = timeit(incremental, args.rounds)
+    one_button_lookups = (macro_lookups() - lookups) / args.rounds
+
+    print(f"{'full encode':<24} {full:8.3f} us  {full_lookups:4.1f} macro lookups")
+    print(
+        f"{'one button edited':<24} {one_button:8.3f} us  {one_button_lookups:4.1f} macro lookups  "
+        f"({full / one_button:4.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
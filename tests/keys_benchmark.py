@@ -0,0 +1,91 @@
+import time
+import argparse
+from context import xenon_driver
+from xenon_driver.keys import Keys
+from xenon_driver.options import Options
+from xenon_driver.gui_resources.gui_keys import GuiKeys
+
+# Qt reports these as Ctrl and Shift, so gui can't catch them
+NO_GUI_KEYS = ("RightCtrl", "RightShift")
+
+
+def timeit(function, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - start) * 1e6 / rounds
+
+
+def scan_code(name):
+    # how keys were found before, every entry compared with the name
+    for value in GuiKeys.keys_dict.values():
+        if value[0] == name:
+            return value[1]
+    return None
+
+
+def scan_name(code):
+    for value in GuiKeys.keys_dict.values():
+        if value[1] == code:
+            return value[0]
+    return None
+
+
+def check():
+    errors = []
+
+    codes = {value for name, value in vars(Options).items() if name.startswith("KEY_") and not name.endswith("MASK")}
+    missing = codes - set(Keys.KEY_NAMES)
+    if missing:
+        errors.append(f"key codes without name: {[hex(code) for code in sorted(missing)]}")
+
+    bits = {Options.LCTRL, Options.LSHIFT, Options.LALT, Options.WIN, Options.RCTRL, Options.RSHIFT, Options.RALT}
+    if set(Keys.MODIFIERS.values()) != bits or len(Keys.MODIFIERS) != len(bits):
+        errors.append(f"modifier bits {Keys.MODIFIERS}, should be each of {sorted(bits)} once")
+    if not set(Keys.MODIFIERS) <= set(Keys.NAMES):
+        errors.append(f"modifiers without key code: {sorted(set(Keys.MODIFIERS) - set(Keys.NAMES))}")
+
+    for name, code in Keys.NAMES.items():
+        if any(separator in name for separator in " +-,"):
+            errors.append(f"{name}: separator in name")
+        if Keys.KEY_NAMES[code] != name:
+            errors.append(f"{name}: code 0x{code:02x} is named {Keys.KEY_NAMES[code]}")
+        if name not in NO_GUI_KEYS and scan_code(name) != code:
+            errors.append(f"{name}: no gui key")
+
+    return errors
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rounds", "-n", type=int, default=2000)
+
+    args = p.parse_args()
+
+    errors = check()
+    if errors:
+        for error in errors:
+            print(f"\033[91mKEYS: {error}\033[0m")
+        return
+
+    names = list(Keys.NAMES)
+    codes = list(Keys.KEY_NAMES)
+    qt_keys = list(GuiKeys.keys_dict)
+
+    results = [
+        (f"{len(names)} names -> code", lambda: [scan_code(name) for name in names], lambda: [Keys.NAMES[name] for name in names]),
+        (f"{len(codes)} codes -> name", lambda: [scan_name(code) for code in codes], lambda: [Keys.KEY_NAMES[code] for code in codes]),
+        (
+            f"{len(qt_keys)} qt keys -> code",
+            lambda: [scan_code(GuiKeys.QT_KEYS[key]) for key in qt_keys],
+            lambda: [GuiKeys.keys_dict[key][1] for key in qt_keys],
+        ),
+    ]
+    for label, scan, index in results:
+        scan_time = timeit(scan, args.rounds)
+        index_time = timeit(index, args.rounds)
+        print(f"{label:<24} scan: {scan_time:9.3f} us  index: {index_time:7.3f} us  ({scan_time / index_time:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
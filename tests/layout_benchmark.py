@@ -0,0 +1,97 @@
+import time
+import argparse
+from context import xenon_driver
+from xenon_driver.layout import Layout
+from xenon_driver.options import Options
+
+# the same action for every button, as in a fresh profile
+BINDINGS = [
+    (name, mode, Options.CLICK_MASK, Options.LEFT_BUTTON, 0x00, 0x00) for mode in Layout.MODES for name in Layout.BUTTONS
+]
+
+
+def legacy_setter(nth, button_id, starts):
+    """
+    How every set_*_button worked before: macro_number decorator and branch for every mode
+    """
+    def macro_number(func):
+        def wrapper(bindings_data, mask, action=Options.DEFAULT, speed=0x00, times=0x00, mode=1, macro=None):
+            if mask == Options.MACRO_MASK:
+                start_byte = 2 + nth * 128
+                bindings_data[start_byte] = macro.cycle_times
+                for i, index in enumerate(range(start_byte, start_byte + 125)):
+                    bindings_data[index + 1] = macro.macro_bytes[i]
+                action |= nth + 1 << 4
+                action += macro.macro_mode
+            func(bindings_data, mask, action, speed, times, mode, macro)
+        return wrapper
+
+    @macro_number
+    def setter(bindings_data, mask, action, speed, times, mode, macro):
+        if mode == 1:
+            bindings_data[starts[0]] = button_id | mask
+            bindings_data[starts[0] + 1] = action
+            bindings_data[starts[0] + 2] = speed
+            bindings_data[starts[0] + 3] = times
+        elif mode == 2:
+            bindings_data[starts[1]] = button_id | mask
+            bindings_data[starts[1] + 1] = action
+            bindings_data[starts[1] + 2] = speed
+            bindings_data[starts[1] + 3] = times
+        elif mode == 3:
+            bindings_data[starts[2]] = button_id | mask
+            bindings_data[starts[2] + 1] = action
+            bindings_data[starts[2] + 2] = speed
+            bindings_data[starts[2] + 3] = times
+
+    return setter
+
+
+LEGACY_SETTERS = {
+    name: legacy_setter(button.macro_slot, button.id, [Layout.button_offset(name, mode) for mode in Layout.MODES])
+    for name, button in Layout.BUTTONS.items()
+}
+
+
+def encode_legacy(bindings_data):
+    for name, mode, mask, action, speed, times in BINDINGS:
+        LEGACY_SETTERS[name](bindings_data, mask, action, speed, times, mode=mode)
+
+
+def encode_table(data_handler):
+    for name, mode, mask, action, speed, times in BINDINGS:
+        data_handler.set_button(name, mask, action, speed, times, mode)
+
+
+def timeit(function, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - start) * 1e6 / rounds
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rounds", "-n", type=int, default=5000)
+
+    args = p.parse_args()
+
+    legacy_data = xenon_driver.Data()
+    table_data = xenon_driver.Data()
+    data_handler = xenon_driver.DataHandler(table_data)
+
+    encode_legacy(legacy_data.bindings_data)
+    encode_table(data_handler)
+    if legacy_data.bindings_data != table_data.bindings_data:
+        print("\033[91mLAYOUT: table encoding differs from setters!\033[0m")
+        return
+
+    legacy = timeit(lambda: encode_legacy(legacy_data.bindings_data), args.rounds)
+    table = timeit(lambda: encode_table(data_handler), args.rounds)
+    handler = timeit(lambda: xenon_driver.DataHandler(table_data), args.rounds)
+    print(f"{'24 button records':<24} setters: {legacy:8.3f} us  table: {table:8.3f} us  ({legacy / table:4.1f}x)")
+    print(f"{'DataHandler views':<24} {handler:8.3f} us (once per data)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import os
+import time
+import tempfile
+import argparse
+from context import xenon_driver
+from xenon_driver.configuration import MACROS_DIR
+from xenon_driver.layout import Layout
+from xenon_driver.decoder import ProfileDecoder
+from xenon_driver.macro_compiler import (
+    MAX_DELAY,
+    MacroCompiler,
+    MacroError,
+    MacroFileNotFound,
+    delay_bytes,
+    encoded_delay,
+    translate,
+)
+
+# text of macro file -> part of expected error
+BROKEN = {
+    "2,1 Key A - Down": "no ':'",
+    "x,1:Key A - Down": "wrong macro mode",
+    "2,1:Key F13 - Down": "unknown key",
+    "2,1:Key A - Pressed": "Down or Up",
+    "2,1:Delay - 50 ms,Key A - Down": "delay before first key",
+    "2,1:Key A - Down,Delay - 30000 ms": "longer than 25727 ms",
+    "2,1:" + ",".join(["Key A - Down,Delay - 500 ms,Key A - Up"] * 21): "needs 126 bytes",
+}
+
+
+def timeit(function, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - start) * 1e6 / rounds
+
+
+def write(directory, name, text):
+    with open(os.path.join(directory, name), "w") as file:
+        file.write(text)
+
+
+def check(directory):
+    errors = []
+    compiler = MacroCompiler(directory, max_size=2)
+
+    write(directory, "macro", "2,1:Key A - Down,Key A - Up")
+    first = compiler.compile("macro")
+    if first.error is not None or len(first.macro_bytes) != Layout.MACRO_SIZE:
+        errors.append(f"macro not compiled into whole slot: {first}")
+    if compiler.compile("macro") is not first:
+        errors.append("unchanged macro compiled again")
+
+    # different size, so it is noticed even within resolution of mtime
+    write(directory, "macro", "4,3:Key B - Down,Delay - 200 ms,Key B - Up")
+    second = compiler.compile("macro")
+    expected = (4, 3, bytes([0x01, 0x05, 0x02, 0x03, 0x81, 0x05]))
+    if (second.macro_mode, second.cycle_times, second.macro_bytes[:6]) != expected:
+        errors.append(f"changed macro not compiled again: {second}")
+
+    missing = compiler.compile("missing")
+    if not isinstance(missing.error, MacroFileNotFound):
+        errors.append(f"missing macro: {missing.error!r}")
+
+    for i, (text, expected) in enumerate(BROKEN.items()):
+        write(directory, f"broken{i}", text)
+        error = compiler.compile(f"broken{i}").error
+        if not isinstance(error, MacroError) or expected not in str(error):
+            errors.append(f"{text}: {error!r}, should be {expected}")
+
+    if len(compiler.entries) > compiler.max_size:
+        errors.append(f"{len(compiler.entries)} macros kept, max size is {compiler.max_size}")
+
+    return errors
+
+
+def check_delays():
+    """
+    Every delay is written exactly in the fewest bytes and read back by decoder
+    """
+    errors = []
+    decoder = ProfileDecoder(None)
+
+    for delay in range(1, MAX_DELAY + 1):
+        event_delay, extra_bytes = delay_bytes(delay)
+        if encoded_delay(event_delay, extra_bytes) != delay:
+            errors.append(f"{delay} ms written as {encoded_delay(event_delay, extra_bytes)} ms")
+        if len(extra_bytes) != (0 if delay < 128 else 2):
+            errors.append(f"{delay} ms written in {len(extra_bytes)} extra bytes")
+
+    for delay in [2, 127, 128, 201, 301, 25601, MAX_DELAY]:
+        text = f"2,1:Key A - Down,Delay - {delay} ms,Key A - Up"
+        macro_mode, cycle_times, macro_bytes, timing_error = translate(text)
+        decoded = decoder.decode_macro(macro_mode, cycle_times, bytes(macro_bytes))
+        if decoded != text or timing_error != 0:
+            errors.append(f"{text}: decoded as {decoded}, timing error {timing_error} ms")
+
+    # consecutive delays are one delay
+    if translate("2,1:Key A - Down,Delay - 50 ms,Delay - 50 ms")[2] != translate("2,1:Key A - Down,Delay - 100 ms")[2]:
+        errors.append("consecutive delays are not added together")
+
+    return errors
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rounds", "-n", type=int, default=2000)
+
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        errors = check(directory)
+    errors += check_delays()
+
+    if errors:
+        for error in errors:
+            print(f"\033[91mMACRO COMPILER: {error}\033[0m")
+        return
+
+    names = [name for name in sorted(os.listdir(MACROS_DIR)) if MacroCompiler().compile(name).error is None]
+    compiler = MacroCompiler()
+
+    def uncached():
+        compiler.clear()
+        for name in names:
+            compiler.compile(name)
+
+    def cached():
+        for name in names:
+            compiler.compile(name)
+
+    uncached_time = timeit(uncached, args.rounds)
+    cached_time = timeit(cached, args.rounds)
+    print(
+        f"{len(names)} macros compiled      read: {uncached_time:8.3f} us  cached: {cached_time:8.3f} us  "
+        f"({uncached_time / cached_time:4.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import os
+import time
+import argparse
+from context import xenon_driver
+from xenon_driver.configuration import MACROS_DIR, PROFILES_DIR
+from xenon_driver.encoder import ProfileEncoder
+from xenon_driver.layout import Layout
+from xenon_driver.macro_compiler import MacroCompiler, translate
+from xenon_driver.macro_simulator import MacroEvent, simulate, simulate_macros, timeline
+from xenon_driver.options import Options
+
+# (text of macro, stop) -> (cycles, duration, part of the first error or None)
+MACROS = {
+    ("1,3:Key A - Down,Delay - 50 ms,Key A - Up,Delay - 250 ms", None): (3, 900, None),
+    ("2,1:Key A - Down,Delay - 50 ms,Key A - Up,Delay - 50 ms", 250): (3, 300, None),
+    ("4,1:Key A - Down,Delay - 50 ms,Key A - Up,Delay - 50 ms", None): (1, 100, None),
+    ("1,1:Key Ctrl - Down,Key C - Down,Key C - Up,Key Ctrl - Up", None): (1, 4, None),
+    ("1,1:Key Shift - Down,Key RightAlt - Down,Key RightAlt - Up,Key Shift - Up", None): (1, 4, None),
+    ("1,1:Key Ctrl - Down,Key C - Down,Key C - Up", None): (1, 3, "Key Ctrl pressed at 0 ms"),
+    # released before it is pressed again, so pressed at the end of every cycle
+    ("4,1:Left button - Up,Delay - 20 ms,Left button - Down", 50): (3, 63, "Left button pressed at 62 ms"),
+    ("1,0:Key A - Down,Key A - Up", None): (0, 0, "never played"),
+    ("3,1:Key A - Down,Key A - Up", None): (1, 2, "mode 3 not allowed"),
+}
+
+
+def timeit(function, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - start) * 1e6 / rounds
+
+
+def simulate_text(text, stop=None):
+    macro_mode, cycle_times, macro_bytes, _ = translate(text)
+    return simulate(macro_mode, cycle_times, bytes(macro_bytes).ljust(Layout.MACRO_SIZE, b"\x00"), stop)
+
+
+def check():
+    errors = []
+
+    for (text, stop), (cycles, duration, error) in MACROS.items():
+        simulation = simulate_text(text, stop)
+        first_error = simulation.errors[0] if simulation.errors else None
+        if (simulation.cycles, simulation.duration) != (cycles, duration) or (error or "") not in (first_error or "?"):
+            errors.append(
+                f"{text}: {simulation.cycles} cycles, {simulation.duration} ms, {first_error}, "
+                f"should be {cycles} cycles, {duration} ms, {error}"
+            )
+
+    events = list(timeline(simulate_text("1,2:Key A - Down,Delay - 301 ms,Key A - Up", None)))
+    expected = [(0, "Key A", "Down"), (301, "Key A", "Up"), (302, "Key A", "Down"), (603, "Key A", "Up")]
+    if events != [MacroEvent(*event) for event in expected]:
+        errors.append(f"timeline {events}, should be {expected}")
+
+    unknown = simulate(1, 1, bytes([0x01, 0x03, 0x81, 0x04]))
+    if not unknown.errors or "unknown key code 0x03" not in unknown.errors[0]:
+        errors.append(f"unknown key code not reported: {unknown.errors}")
+
+    # slots written by DataHandler play the same as compiled macro files
+    compiler = MacroCompiler()
+    for name in sorted(os.listdir(PROFILES_DIR)):
+        data = xenon_driver.Data(PROFILES_DIR + name)
+        handler = xenon_driver.DataHandler(data)
+        ProfileEncoder(handler).encode(data.settings_yml)
+        for mode_name, buttons in data.settings_yml["bindings_data"].items():
+            for button_name, binding in buttons.items():
+                if binding.get("kind") != "macro":
+                    continue
+
+                mask, action, _, _ = handler.read_button(button_name, int(mode_name[-1]))
+                cycle_times, macro_bytes = handler.read_macro(button_name)
+                macro = compiler.compile(binding["macro"])
+                if mask != Options.MACRO_MASK or simulate(action & 0x0F, cycle_times, macro_bytes) != simulate(
+                    macro.macro_mode, macro.cycle_times, macro.macro_bytes
+                ):
+                    errors.append(f"{name} {mode_name} {button_name}: slot doesn't play as macro {binding['macro']}")
+
+    return errors
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rounds", "-n", type=int, default=2000)
+
+    args = p.parse_args()
+
+    errors = check()
+    if errors:
+        for error in errors:
+            print(f"\033[91mMACRO SIMULATOR: {error}\033[0m")
+        return
+
+    names = [name for name in sorted(os.listdir(MACROS_DIR)) if not name.startswith(".")]
+    compiler = MacroCompiler()
+
+    def uncached():
+        compiler.clear()
+        simulate.cache_clear()
+        simulate_macros(names, compiler=compiler)
+
+    uncached_time = timeit(uncached, args.rounds)
+    cached_time = timeit(lambda: simulate_macros(names, compiler=compiler), args.rounds)
+    print(
+        f"{len(names)} macros simulated     read: {uncached_time:8.3f} us  cached: {cached_time:8.3f} us  "
+        f"({uncached_time / cached_time:4.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import time
+import array
+import argparse
+import tracemalloc
+from context import xenon_driver
+from xenon_driver.configuration import PROFILES_DIR
+from xenon_driver.data_handler import DataHandler
+from xenon_driver.encoder import ProfileEncoder
+from xenon_driver.layout import Layout
+
+NAMES = ["main_data", "reset_data", "bindings_data"]
+
+
+def timeit(function, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - start) * 1e6 / rounds
+
+
+def report(name, old_time, new_time, unit="us", old="list", new="bytearray"):
+    print(
+        f"{name:<28} {old + ':':<10} {old_time:10.3f} {unit}  {new + ':':<10} {new_time:10.3f} {unit}  "
+        f"({old_time / new_time:5.1f}x)"
+    )
+
+
+def payload_memory(make):
+    tracemalloc.start()
+    payloads = make()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del payloads
+    return size
+
+
+# (start in bindings_data, button id) of every button record
+RECORDS = [(start, Layout.BUTTONS[button_name].id) for (button_name, _), (start, _) in Layout.RECORD_RANGES.items()]
+
+
+def write_records_list(bindings_data):
+    # how setters wrote button records before
+    for start, button_id in RECORDS:
+        bindings_data[start] = button_id | 0x10
+        bindings_data[start + 1] = 0x01
+        bindings_data[start + 2] = 0x00
+        bindings_data[start + 3] = 0x00
+
+
+def write_records_buffer(bindings_data):
+    for start, button_id in RECORDS:
+        Layout.BUTTON_STRUCT.pack_into(bindings_data, start, button_id | 0x10, 0x01, 0x00, 0x00)
+
+
+def set_records(data):
+    # what encoder does, values compared first and changed ranges marked
+    data_handler = DataHandler(data)
+    for button_name, mode in Layout.RECORD_RANGES:
+        data_handler.set_button(button_name, 0x10, 0x01, mode=mode)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rounds", "-n", type=int, default=2000)
+
+    args = p.parse_args()
+
+    data = xenon_driver.Data(PROFILES_DIR + "terraria.yml")
+    lists = [list(getattr(data, name)) for name in NAMES]
+    buffers = [getattr(data, name) for name in NAMES]
+
+    list_memory = payload_memory(lambda: [list(payload) for payload in buffers])
+    buffer_memory = payload_memory(lambda: [bytearray(payload) for payload in buffers])
+    report("memory of payloads", list_memory / 1024, buffer_memory / 1024, "KiB")
+
+    report(
+        "write all button records",
+        timeit(lambda: write_records_list(lists[2]), args.rounds),
+        timeit(lambda: write_records_buffer(buffers[2]), args.rounds),
+    )
+    set_time = timeit(lambda: set_records(data), args.rounds)
+    print(f"{'  with DataHandler()':<28} {set_time:10.3f} us  (set_button of every record, compared first)")
+
+    # pyusb makes array.array("B", ...) from whatever is given to ctrl_transfer
+    report(
+        "conversion for ctrl_transfer",
+        timeit(lambda: [array.array("B", payload) for payload in lists], args.rounds),
+        timeit(lambda: [array.array("B", payload) for payload in buffers], args.rounds),
+    )
+    report(
+        "snapshot (copy)",
+        timeit(lambda: [list(payload) for payload in lists], args.rounds),
+        timeit(lambda: [bytearray(payload) for payload in buffers], args.rounds),
+    )
+    report(
+        "compare with sent payload",
+        timeit(lambda: [bytes(payload) for payload in lists], args.rounds),
+        timeit(lambda: [bytes(payload) for payload in buffers], args.rounds),
+    )
+
+    # templates used to be parsed from hex files by every Data()
+    paths = [xenon_driver.DATA_DIR + name for name in NAMES]
+    report(
+        "template bytes for Data()",
+        timeit(lambda: [bytearray(xenon_driver.Data.load_bytes(path)) for path in paths], args.rounds),
+        timeit(lambda: [bytearray(xenon_driver.Data.load_template(path)) for path in paths], args.rounds),
+        old="parse",
+        new="template",
+    )
+
+    encode_time = timeit(
+        lambda: ProfileEncoder(DataHandler(data)).encode(data.settings_yml), max(args.rounds // 10, 1)
+    )
+    print(f"{'encode whole profile':<28} {encode_time:10.3f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import os
+import time
+import shutil
+import tempfile
+import argparse
+import yaml
+from context import xenon_driver
+from xenon_driver.binding import settings_of_label
+from xenon_driver.configuration import PROFILES_DIR, MACROS_DIR
+from xenon_driver.profile_cache import ProfileCache
+
+MACRO_NAME = "profile_cache_benchmark"
+
+
+def timeit(function, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - start) * 1e6 / rounds
+
+
+def check_invalidation(directory):
+    errors = []
+
+    # every binding of macro new2 uses the benchmark macro instead
+    with open(PROFILES_DIR + "profile2.yml", "r") as file:
+        profile = yaml.safe_load(file)
+    for buttons in profile["bindings_data"].values():
+        for button_name, binding in buttons.items():
+            if binding.get("macro") == "new2":
+                buttons[button_name] = settings_of_label(f"Macro - {MACRO_NAME}")
+    path = os.path.join(directory, "macro_profile.yml")
+    with open(path, "w") as file:
+        yaml.safe_dump(profile, file)
+
+    cache = ProfileCache()
+    with open(MACROS_DIR + MACRO_NAME, "w") as file:
+        file.write("1,1:Key A - Down,Key A - Up")
+    try:
+        first = cache.load(path)
+        cache.load(path)
+        if (cache.hits, cache.misses) != (1, 1):
+            errors.append(f"profile not cached: {cache.hits} hits, {cache.misses} misses")
+
+        with open(MACROS_DIR + MACRO_NAME, "w") as file:
+            file.write("1,1:Key B - Down,Key B - Up")
+        changed = cache.load(path)
+        if cache.misses != 2 or bytes(changed.bindings_data) == bytes(first.bindings_data):
+            errors.append("changed macro did not invalidate profile")
+
+        cached = cache.load(path)
+        cached.settings_yml["main_data"]["rr"] = 0
+        if cache.load(path).settings_yml["main_data"]["rr"] == 0:
+            errors.append("modified settings changed cached profile")
+    finally:
+        os.remove(MACROS_DIR + MACRO_NAME)
+
+    cache = ProfileCache(max_size=2)
+    for name in ("profile1", "profile3", "profile1", "profile4", "profile1"):
+        cache.load(PROFILES_DIR + name + ".yml")
+    # profile3 is dropped as least recently used, profile1 is never dropped
+    if (cache.hits, cache.misses, len(cache.entries)) != (2, 3, 2):
+        errors.append(f"wrong eviction: {cache.hits} hits, {cache.misses} misses, {len(cache.entries)} entries")
+
+    return errors
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rounds", "-n", type=int, default=200)
+
+    args = p.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        errors = check_invalidation(directory)
+    finally:
+        shutil.rmtree(directory)
+
+    for error in errors:
+        print(f"\033[91mPROFILE CACHE: {error}\033[0m")
+    if not errors:
+        print("invalidation and eviction: ok")
+
+    path = PROFILES_DIR + "profile2.yml"
+
+    def encode():
+        data = xenon_driver.Data(path)
+        xenon_driver.ProfileEncoder(xenon_driver.DataHandler(data)).encode(data.settings_yml)
+
+    cache = ProfileCache()
+    cache.load(path)
+    print(f"{'load and encode profile':<28} {timeit(encode, args.rounds):10.3f} us")
+    print(f"{'load from cache':<28} {timeit(lambda: cache.load(path), args.rounds):10.3f} us")
+
+
+if __name__ == "__main__":
+    main()
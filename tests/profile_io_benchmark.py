@@ -0,0 +1,92 @@
+import os
+import glob
+import time
+import tempfile
+import argparse
+import yaml
+from context import xenon_driver
+from xenon_driver.configuration import PROFILES_DIR
+from xenon_driver.binding import DecimalInt
+from xenon_driver.data import Data, ProfileDumper
+
+
+class PythonProfileDumper(yaml.SafeDumper):
+    pass
+
+
+PythonProfileDumper.add_representer(int, Data.hexint_presenter)
+PythonProfileDumper.add_representer(DecimalInt, PythonProfileDumper.represent_int)
+
+
+def timeit(function, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - start) * 1e6 / rounds
+
+
+def load_directory(paths, load):
+    for path in paths:
+        with open(path, "rb") as file:
+            load(file.read())
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rounds", "-n", type=int, default=50)
+
+    args = p.parse_args()
+
+    yml_paths = sorted(glob.glob(PROFILES_DIR + "*.yml"))
+    settings = [Data.parse_settings(open(path, "rb").read(), path) for path in yml_paths]
+
+    # hand edited label which doesn't match fields is written again from them
+    edited = Data.parse_settings(
+        "bindings_data:\n  mode1:\n    left_button: {name: Macro - new2, kind: click, button: right}\n", ".yml"
+    )
+    if edited["bindings_data"]["mode1"]["left_button"]["name"] != "Right button":
+        print(f"\033[91mPROFILE IO: label not matching fields kept: {edited['bindings_data']}\033[0m")
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_paths = []
+        for path, settings_yml in zip(yml_paths, settings):
+            json_path = os.path.join(directory, os.path.basename(path)[:-4] + ".json")
+            Data.save_settings(settings_yml, json_path)
+            json_paths.append(json_path)
+
+            with open(json_path, "rb") as file:
+                if Data.parse_settings(file.read(), json_path) != settings_yml:
+                    print(f"\033[91mPROFILE IO: {json_path} differs from {path}\033[0m")
+                    return
+            if Data.dump_settings(settings_yml) != open(path, "r").read():
+                print(f"\033[91mPROFILE IO: {path} is dumped differently\033[0m")
+                return
+
+        backends = [
+            ("yaml SafeLoader", yml_paths, lambda content: yaml.load(content, Loader=yaml.SafeLoader)),
+            (f"yaml {xenon_driver.data.YamlLoader.__name__}", yml_paths, Data.parse_settings),
+            ("json", json_paths, lambda content: Data.parse_settings(content, ".json")),
+        ]
+        print(f"loading {len(yml_paths)} profiles")
+        baseline = None
+        for name, paths, load in backends:
+            elapsed = timeit(lambda: load_directory(paths, load), args.rounds)
+            baseline = baseline or elapsed
+            print(f"{name:<24} {elapsed / 1000:8.3f} ms  ({baseline / elapsed:5.1f}x)")
+
+    dumpers = [
+        ("yaml SafeDumper", lambda s: yaml.dump(s, Dumper=PythonProfileDumper)),
+        (f"yaml {ProfileDumper.__base__.__name__}", Data.dump_settings),
+        ("json", lambda s: Data.dump_settings(s, compact=True)),
+    ]
+    print(f"dumping {len(settings)} profiles")
+    baseline = None
+    for name, dump in dumpers:
+        elapsed = timeit(lambda: [dump(settings_yml) for settings_yml in settings], args.rounds)
+        baseline = baseline or elapsed
+        print(f"{name:<24} {elapsed / 1000:8.3f} ms  ({baseline / elapsed:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import copy
+import time
+import argparse
+from context import xenon_driver
+from xenon_driver.binding import settings_of_label
+from xenon_driver.configuration import PROFILES_DIR
+from xenon_driver.encoder import ProfileEncoder, ValidationError
+from xenon_driver.keys import Keys
+from xenon_driver.validator import Validator
+
+# (setting path, value) -> part of expected error, all of them in one profile
+INVALID = [
+    (("main_data", "rr"), 0x35, "report rate 53"),
+    (("main_data", "dpis"), [0x01, 0x0F, 0x08, 0x8B], "dpi value 15"),
+    (("bindings_data", "mode1", "fire_button"), settings_of_label("Fire key - A,2ms,1"), "fire key: speed 2"),
+    (("bindings_data", "mode2", "left_button"), settings_of_label("Fire key - Left button,30ms,0"), "fire key: times 0"),
+    (("bindings_data", "mode3", "dpi_button"), settings_of_label("Keys combination - F13"), "Unknown key: F13"),
+]
+
+
+def timeit(function, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - start) * 1e6 / rounds
+
+
+def check_invalid(settings_yml):
+    settings_yml = copy.deepcopy(settings_yml)
+    for path, value, _ in INVALID:
+        setting = settings_yml
+        for key in path[:-1]:
+            setting = setting[key]
+        setting[path[-1]] = value
+
+    data = xenon_driver.Data()
+    before = data.snapshot()
+    try:
+        ProfileEncoder(xenon_driver.DataHandler(data)).encode(settings_yml)
+    except ValidationError as e:
+        errors = e.errors
+    else:
+        return ["invalid profile has been encoded"]
+
+    missing = [expected for _, _, expected in INVALID if not any(expected in error for error in errors)]
+    problems = [f"not reported: {expected} (reported: {errors})" for expected in missing]
+
+    # valid bindings of rejected profile are not written either
+    for name in xenon_driver.Data.REPORTS:
+        if bytes(getattr(data, name)) != bytes(getattr(before, name)):
+            problems.append(f"{name} written although profile has been rejected")
+    if data.report_versions != before.report_versions:
+        problems.append("rejected profile marked data as changed")
+
+    return problems
+
+
+def check_fire_keys(settings_yml):
+    """
+    Every key encoder writes as fire key is allowed by validator
+    """
+    settings_yml = copy.deepcopy(settings_yml)
+    fire_button = settings_yml["bindings_data"]["mode1"]["fire_button"]
+    encoder = ProfileEncoder(xenon_driver.DataHandler(xenon_driver.Data()))
+
+    errors = []
+    for key in Keys.FIRE_KEYS:
+        fire_button.clear()
+        fire_button.update(settings_of_label(f"Fire key - {key},30ms,1"))
+        try:
+            encoder.encode(settings_yml)
+        except ValidationError as e:
+            errors.append(f"fire key {key} rejected: {e.errors}")
+
+    return errors
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rounds", "-n", type=int, default=2000)
+
+    args = p.parse_args()
+
+    data = xenon_driver.Data(PROFILES_DIR + "profile1.yml")
+    data_handler = xenon_driver.DataHandler(data)
+    encoder = ProfileEncoder(data_handler)
+
+    errors = check_invalid(data.settings_yml)
+    errors += check_fire_keys(data.settings_yml)
+    encoder.encode(data.settings_yml)
+    errors += Validator.check_data(data_handler)
+    if errors:
+        for error in errors:
+            print(f"\033[91mVALIDATOR: {error}\033[0m")
+        return
+
+    print(f"{len(INVALID)} errors of invalid profile reported at once")
+
+    main_data = data.settings_yml["main_data"]
+    records = [data_handler.read_button(name, mode) for mode in ProfileEncoder.MODES for name in ProfileEncoder.BUTTONS]
+
+    encode = timeit(lambda: encoder.encode(data.settings_yml), args.rounds)
+    settings = timeit(
+        lambda: (Validator.check_main_data(main_data), [Validator.check_binding(*record) for record in records]),
+        args.rounds,
+    )
+    payload = timeit(lambda: Validator.check_data(data_handler), args.rounds)
+    print(f"{'encode profile':<24} {encode:8.3f} us (with checks)")
+    print(f"{'check settings':<24} {settings:8.3f} us")
+    print(f"{'check payload':<24} {payload:8.3f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import os
+import time
+import shutil
+import tempfile
+import argparse
+from context import xenon_driver
+from xenon_driver.watcher import ProcessWatcher
+
+
+def make_fake_proc(processes):
+    """
+    processes:
+        {pid: name} -> written as <root>/<pid>/comm like in /proc
+    """
+    root = tempfile.mkdtemp()
+    for pid, name in processes.items():
+        add_process(root, pid, name)
+    # not processes, should be ignored
+    os.makedirs(os.path.join(root, "sys"))
+    open(os.path.join(root, "uptime"), "w").close()
+    return root
+
+
+def add_process(root, pid, name):
+    os.makedirs(os.path.join(root, str(pid)))
+    with open(os.path.join(root, str(pid), "comm"), "w") as file:
+        file.write(name[:ProcessWatcher.COMM_LENGTH] + "\n")
+
+
+def remove_process(root, pid):
+    shutil.rmtree(os.path.join(root, str(pid)))
+
+
+def check_switching(root):
+    switched = []
+
+    def switch(profile):
+        switched.append(profile)
+        return True
+
+    watcher = ProcessWatcher(
+        [("Terraria.bin.x86_64", "terraria"), ("steam", "profile2")], switch, proc_root=root, default="profile1",
+        debounce=2.0,
+    )
+
+    errors = []
+
+    def expect(now, profile, message):
+        if watcher.poll(now) != profile:
+            errors.append(f"{message}: {watcher.applied} instead of {profile}")
+
+    expect(0, None, "switched before debounce")
+    expect(2, "profile1", "default not applied")
+
+    # game started only for a moment
+    add_process(root, 5001, "Terraria.bin.x86_64")
+    expect(3, "profile1", "switched on short living process")
+    remove_process(root, 5001)
+    expect(4, "profile1", "switched on short living process")
+
+    add_process(root, 5002, "steam")
+    add_process(root, 5003, "Terraria.bin.x86_64")
+    expect(5, "profile1", "switched before debounce")
+    expect(7, "terraria", "rule with priority not applied")
+    expect(8, "terraria", "switched without change")
+
+    remove_process(root, 5003)
+    expect(10, "terraria", "switched before debounce")
+    expect(12, "profile2", "second rule not applied")
+
+    # launcher script which execs the game keeps its pid
+    add_process(root, 5004, "start_terraria")
+    expect(14, "profile2", "switched on launcher")
+    with open(os.path.join(root, "5004", "comm"), "w") as file:
+        file.write("Terraria.bin.x86_64"[:ProcessWatcher.COMM_LENGTH] + "\n")
+    expect(15, "profile2", "switched before debounce")
+    expect(17, "terraria", "game started by exec not noticed")
+    remove_process(root, 5004)
+
+    if switched != ["profile1", "terraria", "profile2", "terraria"]:
+        errors.append(f"wrong switches: {switched}")
+
+    return errors
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--processes", "-p", type=int, default=400, help="number of fake processes")
+    p.add_argument("--rounds", "-n", type=int, default=200)
+
+    args = p.parse_args()
+
+    root = make_fake_proc({pid: f"process{pid}" for pid in range(1, args.processes + 1)})
+    try:
+        errors = check_switching(root)
+        for error in errors:
+            print(f"\033[91mWATCHER: {error}\033[0m")
+        if not errors:
+            print("switching: ok")
+
+        watcher = ProcessWatcher([("Terraria.bin.x86_64", "terraria")], lambda profile: True, proc_root=root)
+
+        start = time.perf_counter()
+        watcher.poll()
+        first = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            watcher.poll()
+        steady = (time.perf_counter() - start) * 1000 / args.rounds
+
+        print(f"{args.processes} processes, first poll: {first:.3f} ms, next polls: {steady:.3f} ms")
+        print(f"cpu at 1 poll per second: {steady / 10:.3f} %")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,16 @@
 __version__ = 1.0
-from .driver import Driver
+from .driver import Driver, MultiDriver
 from .data import Data
 from .data_handler import DataHandler, MacroTranslator
+from .encoder import ProfileEncoder
 from .options import Options
-from .gui import Window
 from .configuration import DATA_DIR
 from .logger import xenon_logger
+
+
+def __getattr__(name):
+    # gui (and so PyQt5 with its QApplication) is loaded only when it is used
+    if name == "Window":
+        from .gui import Window
+        return Window
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
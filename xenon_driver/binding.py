@@ -0,0 +1,203 @@
+from collections import namedtuple
+from functools import lru_cache
+
+from xenon_driver.logger import xenon_logger
+
+
+# kind -> one of KINDS, params -> values of its fields in the same order
+Binding = namedtuple("Binding", ["kind", "params"])
+
+# kind -> fields saved next to "name" in profile
+KINDS = {
+    "click": ("button",),
+    "dpi": ("action",),
+    "three_click": (),
+    "keys": ("keys",),
+    "multimedia": ("key",),
+    "fire": ("key", "delay", "times"),
+    "mode_switch": (),
+    "snipe": ("dpi",),
+    "macro": ("macro",),
+    "disable": (),
+}
+
+# labels shown in gui which have no parameters in text
+LABELS = {
+    "Left button": Binding("click", ("left",)),
+    "Right button": Binding("click", ("right",)),
+    "Middle button": Binding("click", ("middle",)),
+    "Forward button": Binding("click", ("forward",)),
+    "Back button": Binding("click", ("back",)),
+    "DPI Loop": Binding("dpi", ("loop",)),
+    "DPI +": Binding("dpi", ("plus",)),
+    "DPI -": Binding("dpi", ("minus",)),
+    "Three click": Binding("three_click", ()),
+    "Mode switch": Binding("mode_switch", ()),
+    "Disable": Binding("disable", ()),
+}
+BINDING_LABELS = {binding: label for label, binding in LABELS.items()}
+
+
+class DecimalInt(int):
+    """
+    Number in binding fields (delay, times, dpi), written in decimal like in its label,
+    other ints of profiles are bytes and are written as hex
+    """
+
+
+class BindingError(Exception):
+    """
+    Binding label or fields which can't be understood
+    """
+
+
+def parse_keys(text):
+    return (tuple(text.split("+")),)
+
+
+def parse_multimedia(text):
+    return (text,)
+
+
+def parse_fire(text):
+    fire_data = text.split(",")
+    if len(fire_data) != 3 or not fire_data[1].endswith("ms"):
+        raise BindingError(f"Wrong fire key, should be 'Fire key - <key>,<delay>ms,<times>' (Fire key - {text})")
+
+    try:
+        return (fire_data[0], int(fire_data[1][:-2]), int(fire_data[2]))
+    except ValueError:
+        raise BindingError(f"Wrong fire key delay or times (Fire key - {text})")
+
+
+def parse_snipe(text):
+    try:
+        return (int(text),)
+    except ValueError:
+        raise BindingError(f"Unknown snipe dpi: {text}")
+
+
+def parse_macro(text):
+    return (text,)
+
+
+# label before " - " -> (kind, parser of text after it)
+PARAMETRIZED_LABELS = {
+    "Keys combination": ("keys", parse_keys),
+    "Multimedia": ("multimedia", parse_multimedia),
+    "Fire key": ("fire", parse_fire),
+    "Snipe button": ("snipe", parse_snipe),
+    "Macro": ("macro", parse_macro),
+}
+
+
+@lru_cache(maxsize=1024)
+def parse_label(text):
+    """
+    Binding described by text shown in gui, ie. "Fire key - Left button,30ms,1"
+
+    Raises BindingError
+    """
+    binding = LABELS.get(text)
+    if binding is not None:
+        return binding
+
+    head, separator, rest = text.partition(" - ")
+    if separator and head in PARAMETRIZED_LABELS:
+        kind, parser = PARAMETRIZED_LABELS[head]
+        return Binding(kind, parser(rest))
+
+    raise BindingError(f"Unknown binding: {text}")
+
+
+def label_of(binding):
+    """
+    Text shown in gui, reverse of parse_label
+    """
+    if binding in BINDING_LABELS:
+        return BINDING_LABELS[binding]
+
+    kind, params = binding
+    if kind == "keys":
+        return f"Keys combination - {'+'.join(params[0])}"
+    elif kind == "multimedia":
+        return f"Multimedia - {params[0]}"
+    elif kind == "fire":
+        return f"Fire key - {params[0]},{params[1]}ms,{params[2]}"
+    elif kind == "snipe":
+        return f"Snipe button - {params[0]}"
+    elif kind == "macro":
+        return f"Macro - {params[0]}"
+
+    raise BindingError(f"Unknown binding: {kind} {params}")
+
+
+def from_settings(button_settings):
+    """
+    Binding of one button of profile, profiles saved before bindings had fields have only "name"
+
+    Fields win over "name" when both are saved, structure_bindings writes label again from them.
+
+    Raises BindingError
+    """
+    kind = button_settings.get("kind")
+    if kind is None:
+        return parse_label(button_settings["name"])
+
+    fields = KINDS.get(kind)
+    if fields is None:
+        raise BindingError(f"Unknown binding kind: {kind}")
+
+    params = []
+    for field in fields:
+        if field not in button_settings:
+            raise BindingError(f"{kind} binding without {field}")
+        value = button_settings[field]
+        # lists of yml and json
+        params.append(tuple(value) if isinstance(value, list) else value)
+
+    return Binding(kind, tuple(params))
+
+
+def to_settings(binding):
+    settings = {"name": label_of(binding), "kind": binding.kind}
+    for field, value in zip(KINDS[binding.kind], binding.params):
+        if isinstance(value, tuple):
+            value = list(value)
+        elif isinstance(value, int):
+            value = DecimalInt(value)
+        settings[field] = value
+
+    return settings
+
+
+def settings_of_label(text):
+    """
+    Settings of button chosen in gui, label which can't be parsed is saved as it is (encoder reports it)
+    """
+    try:
+        return to_settings(parse_label(text))
+    except BindingError:
+        return {"name": text}
+
+
+def structure_bindings(settings_yml):
+    """
+    Give every binding of loaded profile its fields, so labels are parsed only once
+
+    Binding is encoded from its fields, so label which doesn't match them is written again.
+    """
+    for mode_name, mode_bindings in settings_yml.get("bindings_data", {}).items():
+        for button_name, button_settings in mode_bindings.items():
+            try:
+                structured = to_settings(from_settings(button_settings))
+            except (BindingError, KeyError, TypeError):
+                # left as it is, encoder reports it
+                continue
+
+            name = button_settings.get("name")
+            if "kind" in button_settings and name != structured["name"]:
+                xenon_logger.warning(
+                    f"{mode_name} {button_name}: label {name!r} doesn't match binding, shown as {structured['name']!r}"
+                )
+            mode_bindings[button_name] = structured
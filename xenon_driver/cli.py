@@ -0,0 +1,381 @@
+"""
+Commands working without gui, nothing here may import PyQt5
+"""
+import os
+import sys
+import time
+import glob
+from pathlib import Path
+
+from xenon_driver.configuration import PROFILES_DIR, MACROS_DIR, ID_VENDOR, ID_PRODUCT
+from xenon_driver.data import Data
+from xenon_driver.data_handler import DataHandler
+from xenon_driver.driver import Driver, MultiDriver
+from xenon_driver.encoder import ProfileEncoder, EncodeError
+from xenon_driver.logger import xenon_logger
+
+
+def profile_path(profile):
+    """
+    profile:
+        name of profile in PROFILES_DIR or path to yml file
+
+    returns None if there is no such profile
+    """
+    if os.path.isfile(profile):
+        return profile
+
+    for suffix in Data.PROFILE_SUFFIXES:
+        path = PROFILES_DIR + profile + suffix
+        if os.path.isfile(path):
+            return path
+
+    return None
+
+
+def encode_profile(profile, mode=1):
+    """
+    returns Data with bytes of profile or None if it can't be encoded (error is printed)
+    """
+    path = profile_path(profile)
+    if path is None:
+        print(f"No such profile: {profile}", file=sys.stderr)
+        return None
+
+    data = Data(path)
+    try:
+        ProfileEncoder(DataHandler(data)).encode(data.settings_yml, mode)
+    except EncodeError as e:
+        print(f"{profile}: {e}", file=sys.stderr)
+        return None
+
+    return data
+
+
+def apply(args):
+    # running daemon already has profiles encoded and device opened
+    if not args.all and not args.dry_run and not os.path.isfile(args.profile):
+        # modules used by only some commands are imported in them, so every command starts quickly
+        from xenon_driver.daemon import send_command
+
+        try:
+            answer = send_command(f"switch {args.profile} {args.mode}")
+            # profile saved after daemon has started
+            if answer.startswith("error no such profile"):
+                send_command("reload")
+                answer = send_command(f"switch {args.profile} {args.mode}")
+        except OSError:
+            pass
+        else:
+            # profile daemon can't load is encoded here, so its error is printed
+            if not answer.startswith("error no such profile"):
+                return answer_status(answer)
+
+    data = encode_profile(args.profile, args.mode)
+    if data is None:
+        return 1
+
+    # profile is encoded, so it is valid, nothing more to check without device
+    if args.dry_run:
+        print(f"{args.profile}: dry run, data has not been sent")
+        return 0
+
+    if args.all:
+        with MultiDriver(ID_VENDOR, ID_PRODUCT) as driver:
+            results = driver.send_data(data, force=True)
+
+        if not results:
+            print("Device not connected", file=sys.stderr)
+            return 1
+
+        for result in results:
+            status = "ok" if result.sent else result.error
+            print(f"{result.location}: {status} ({result.elapsed * 1000:.1f} ms)")
+        return 0 if all(result.sent for result in results) else 1
+
+    with Driver(ID_VENDOR, ID_PRODUCT) as driver:
+        send_result = driver.send_data(data, force=True)
+
+    if send_result is None:
+        print("Device not connected", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+def dump(args):
+    data = encode_profile(args.profile, args.mode)
+    if data is None:
+        return 1
+
+    for name in args.report:
+        print(f"{name}:")
+        data.print_hex(getattr(data, name))
+
+    return 0
+
+
+def payload_files(paths):
+    """
+    paths:
+        payload files or directories with them (not searched recursively)
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(
+                entry.path for entry in os.scandir(path) if entry.is_file() and not entry.name.startswith(".")
+            )
+        else:
+            files.append(path)
+
+    return files
+
+
+def decode(args):
+    from xenon_driver.decoder import ProfileDecoder, DecodeError, read_payload
+
+    if args.output is not None:
+        os.makedirs(os.path.join(args.output, "macros"), exist_ok=True)
+
+    failed = 0
+    for path in payload_files(args.paths):
+        name = Path(path).stem
+        try:
+            data = read_payload(path)
+            decoded = ProfileDecoder(DataHandler(data)).decode(name)
+        except (OSError, DecodeError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+
+        if args.output is None:
+            print(f"# {path} (mode {decoded.current_mode})")
+            for macro_name, macro_text in decoded.macros.items():
+                print(f"# macro {macro_name}: {macro_text}")
+            print(Data.dump_settings(decoded.settings_yml, compact=args.json).rstrip("\n"))
+            continue
+
+        suffix = ".json" if args.json else ".yml"
+        Data.save_settings(decoded.settings_yml, os.path.join(args.output, name + suffix))
+        for macro_name, macro_text in decoded.macros.items():
+            with open(os.path.join(args.output, "macros", macro_name), "w") as file:
+                file.write(macro_text)
+
+    return 1 if failed else 0
+
+
+def compile_command(args):
+    from xenon_driver.compiler import compile_profiles, profile_files
+
+    paths = profile_files(args.paths)
+    if args.output is not None:
+        os.makedirs(args.output, exist_ok=True)
+
+    start = time.perf_counter()
+    results = compile_profiles(paths, args.mode, args.output, args.jobs)
+    elapsed = time.perf_counter() - start
+
+    failed = [result for result in results if result.error is not None]
+    for result in failed:
+        print(f"{result.path}: {result.error}", file=sys.stderr)
+
+    print(f"{len(results) - len(failed)} of {len(results)} profiles compiled in {elapsed * 1000:.1f} ms")
+    return 1 if failed else 0
+
+
+def list_macros(args):
+    from xenon_driver.layout import Layout
+    from xenon_driver.macro_compiler import macro_compiler
+    from xenon_driver.macro_simulator import simulate_macros, timeline
+
+    names = args.names or sorted(name for name in os.listdir(MACROS_DIR) if not name.startswith("."))
+
+    failed = 0
+    for name, simulation in simulate_macros(names, args.stop).items():
+        for error in simulation.errors:
+            print(f"{name}: {error}", file=sys.stderr)
+        failed += bool(simulation.errors)
+        if not simulation.cycle_events:
+            continue
+
+        size = macro_compiler.compile(name).size
+        print(
+            f"{name}: {size} of {Layout.MACRO_SIZE} bytes used, {Layout.MACRO_SIZE - size} left, "
+            f"{simulation.cycles} x {simulation.cycle_duration} ms = {simulation.duration} ms"
+        )
+        if args.timeline:
+            for event in timeline(simulation):
+                print(f"{event.time:>8} ms  {event.key} - {event.state}")
+
+    return 1 if failed else 0
+
+
+def list_profiles(args):
+    names = set()
+    for suffix in Data.PROFILE_SUFFIXES:
+        names.update(Path(path).stem for path in glob.glob(PROFILES_DIR + "*" + suffix))
+
+    for name in sorted(names):
+        print(name)
+
+    return 0
+
+
+def answer_status(answer):
+    if answer.startswith("ok"):
+        if answer[3:]:
+            print(answer[3:])
+        return 0
+
+    print(answer[6:], file=sys.stderr)
+    return 1
+
+
+def daemon(args):
+    from xenon_driver.daemon import ProfileDaemon, DaemonError
+
+    with Driver(ID_VENDOR, ID_PRODUCT) as driver:
+        profile_daemon = ProfileDaemon(driver, args.socket)
+        try:
+            profile_daemon.serve_forever()
+        except DaemonError as e:
+            print(e, file=sys.stderr)
+            return 1
+        except KeyboardInterrupt:
+            pass
+
+    return 0
+
+
+def ctl(args):
+    from xenon_driver.daemon import send_command
+
+    try:
+        answer = send_command(" ".join(args.words), args.socket)
+    except OSError as e:
+        print(f"Daemon is not running ({e})", file=sys.stderr)
+        return 1
+
+    return answer_status(answer)
+
+
+def watch(args):
+    from xenon_driver.daemon import ProfileDaemon, CommandError, send_command, default_socket_path
+    from xenon_driver.watcher import ProcessWatcher
+
+    rules = []
+    for rule in args.rule:
+        process_name, _, profile = rule.partition("=")
+        if not process_name or not profile:
+            print(f"Wrong rule: {rule} (should be process=profile)", file=sys.stderr)
+            return 1
+        rules.append((process_name, profile))
+
+    def switch_with_daemon(profile):
+        try:
+            answer = send_command(f"switch {profile}", args.socket)
+        except OSError as e:
+            xenon_logger.error(f"watch: daemon is not running ({e})")
+            return False
+        return answer_status(answer) == 0
+
+    if args.socket is not None or os.path.exists(default_socket_path()):
+        watcher = ProcessWatcher(rules, switch_with_daemon, default=args.default, debounce=args.debounce)
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    with Driver(ID_VENDOR, ID_PRODUCT) as driver:
+        profile_daemon = ProfileDaemon(driver)
+        profile_daemon.load_profiles()
+
+        def switch(profile):
+            try:
+                print(profile_daemon.switch(profile))
+            except CommandError as e:
+                xenon_logger.error(f"watch: {e}")
+                return False
+            return True
+
+        watcher = ProcessWatcher(rules, switch, default=args.default, debounce=args.debounce)
+        with driver.session(idle_timeout=ProfileDaemon.IDLE_TIMEOUT):
+            try:
+                watcher.run()
+            except KeyboardInterrupt:
+                pass
+
+    return 0
+
+
+def add_commands(subparsers):
+    apply_parser = subparsers.add_parser("apply", help="send profile to the device")
+    apply_parser.add_argument("profile", help="profile name or path to yml file")
+    apply_parser.add_argument("--mode", "-m", type=int, choices=ProfileEncoder.MODES, default=1)
+    apply_parser.add_argument("--all", "-a", action="store_true", help="send to every connected device")
+    apply_parser.add_argument("--dry_run", "-d", action="store_true")
+    apply_parser.set_defaults(command=apply)
+
+    dump_parser = subparsers.add_parser("dump", help="print bytes of profile")
+    dump_parser.add_argument("profile", help="profile name or path to yml file")
+    dump_parser.add_argument("--mode", "-m", type=int, choices=ProfileEncoder.MODES, default=1)
+    dump_parser.add_argument(
+        "--report",
+        "-r",
+        nargs="+",
+        choices=["main_data", "reset_data", "bindings_data"],
+        default=["main_data", "reset_data", "bindings_data"],
+    )
+    dump_parser.set_defaults(command=dump)
+
+    decode_parser = subparsers.add_parser("decode", help="turn payload files (as printed by dump) back into profiles")
+    decode_parser.add_argument("paths", nargs="+", help="payload files or directories with them")
+    decode_parser.add_argument(
+        "--output", "-o", default=None, help="directory for yml files and new macros, printed if not given"
+    )
+    decode_parser.add_argument("--json", "-j", action="store_true", help="write compact json instead of yml")
+    decode_parser.set_defaults(command=decode)
+
+    compile_parser = subparsers.add_parser("compile", help="encode every profile and report the ones which can't be")
+    compile_parser.add_argument(
+        "paths", nargs="*", default=[PROFILES_DIR], help="profile files or directories with them (profiles directory)"
+    )
+    compile_parser.add_argument("--mode", "-m", type=int, choices=ProfileEncoder.MODES, default=1)
+    compile_parser.add_argument("--output", "-o", default=None, help="directory for payloads (<profile>.bin)")
+    compile_parser.add_argument("--jobs", "-j", type=int, default=None, help="number of processes (every cpu)")
+    compile_parser.set_defaults(command=compile_command)
+
+    macros_parser = subparsers.add_parser("macros", help="print bytes used by macros, how long they play and errors")
+    macros_parser.add_argument("names", nargs="*", help="names of macro files (every macro)")
+    macros_parser.add_argument(
+        "--stop",
+        "-s",
+        type=int,
+        default=None,
+        help="ms after which macros repeated until a key is pressed or released stop (one cycle)",
+    )
+    macros_parser.add_argument("--timeline", "-t", action="store_true", help="print every key event of macros")
+    macros_parser.set_defaults(command=list_macros)
+
+    list_parser = subparsers.add_parser("list-profiles", help="print names of saved profiles")
+    list_parser.set_defaults(command=list_profiles)
+
+    daemon_parser = subparsers.add_parser("daemon", help="keep profiles encoded and switch them on request")
+    daemon_parser.add_argument("--socket", "-s", default=None, help="path of unix socket")
+    daemon_parser.set_defaults(command=daemon)
+
+    ctl_parser = subparsers.add_parser("ctl", help="send command to daemon, ie. 'switch terraria', 'set-dpi 2 0x05'")
+    ctl_parser.add_argument("words", nargs="+", metavar="command")
+    ctl_parser.add_argument("--socket", "-s", default=None, help="path of unix socket")
+    ctl_parser.set_defaults(command=ctl)
+
+    watch_parser = subparsers.add_parser("watch", help="switch profile when chosen process is running")
+    watch_parser.add_argument(
+        "rule", nargs="+", help="process=profile, ie. Terraria.bin.x86_64=terraria, first one has priority"
+    )
+    watch_parser.add_argument("--default", default=None, help="profile applied when no process is running")
+    watch_parser.add_argument("--debounce", type=float, default=2.0, help="seconds before switching")
+    watch_parser.add_argument("--socket", "-s", default=None, help="path of daemon socket")
+    watch_parser.set_defaults(command=watch)
@@ -0,0 +1,78 @@
+import os
+import time
+import glob
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from xenon_driver.data import Data
+from xenon_driver.data_handler import DataHandler
+from xenon_driver.decoder import write_payload
+from xenon_driver.encoder import ProfileEncoder, EncodeError
+
+
+# error is None when profile has been encoded
+CompileResult = namedtuple("CompileResult", ["path", "error", "elapsed"])
+
+
+def profile_files(paths):
+    """
+    paths:
+        profile files or directories with them (not searched recursively)
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for suffix in Data.PROFILE_SUFFIXES:
+                files += sorted(glob.glob(os.path.join(path, "*" + suffix)))
+        else:
+            files.append(path)
+
+    return files
+
+
+def compile_profile(path, current_mode=1, output=None):
+    """
+    Encode profile the same way it is encoded before sending, bytes are written
+    into output/<profile>.bin if output directory is given
+    """
+    start = time.perf_counter()
+    try:
+        with open(path, "rb") as file:
+            settings_yml = Data.parse_settings(file.read(), path)
+
+        data = Data()
+        data.settings_yml = settings_yml
+        ProfileEncoder(DataHandler(data)).encode(settings_yml, current_mode)
+
+        if output is not None:
+            write_payload(data, os.path.join(output, Path(path).stem + ".bin"))
+    except EncodeError as e:
+        error = str(e)
+    except Exception as e:
+        # missing settings, yml and json errors, DataHandler raises Exception for options out of range
+        error = f"{type(e).__name__}: {e}"
+    else:
+        error = None
+
+    return CompileResult(path, error, time.perf_counter() - start)
+
+
+def compile_profiles(paths, current_mode=1, output=None, jobs=None):
+    """
+    Results of compile_profile for every file, in the same order
+
+    jobs:
+        number of processes, None -> one for every cpu, 1 -> no process pool
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+
+    arguments = ([current_mode] * len(paths), [output] * len(paths))
+    if jobs == 1 or len(paths) < 2:
+        return list(map(compile_profile, paths, *arguments))
+
+    # profiles are small, sending them in chunks keeps workers busy
+    chunksize = max(1, len(paths) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(compile_profile, paths, *arguments, chunksize=chunksize))
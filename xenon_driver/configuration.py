@@ -6,3 +6,6 @@ ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(ROOT_DIR, 'data/')
 PROFILES_DIR = os.path.join(ROOT_DIR, 'profiles/')
 MACROS_DIR = os.path.join(ROOT_DIR, 'macros/')
+
+ID_VENDOR = 0x258A
+ID_PRODUCT = 0x1007
@@ -0,0 +1,299 @@
+import os
+import time
+import glob
+import inspect
+import socket
+import socketserver
+import tempfile
+import threading
+from pathlib import Path
+
+import yaml
+
+from xenon_driver.configuration import PROFILES_DIR
+from xenon_driver.data import Data
+from xenon_driver.data_handler import DataHandler
+from xenon_driver.encoder import ProfileEncoder, EncodeError
+from xenon_driver.hotplug import HotplugMonitor
+from xenon_driver.options import Options
+from xenon_driver.profile_cache import profile_cache
+from xenon_driver.validator import Validator
+from xenon_driver.logger import xenon_logger
+
+
+def private_dir():
+    """
+    Directory of socket when there is no XDG_RUNTIME_DIR, only its user may use it
+    """
+    return os.path.join(tempfile.gettempdir(), f"xenon-{os.getuid()}")
+
+
+def default_socket_path():
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir is None:
+        runtime_dir = private_dir()
+    return os.path.join(runtime_dir, "xenon_driver.sock")
+
+
+class CommandError(Exception):
+    pass
+
+
+class DaemonError(Exception):
+    """
+    Daemon can't listen on its socket
+    """
+
+
+class ProfileDaemon:
+    """
+    Keeps every profile encoded and device handle open, so switching profile
+    is only sending reports which differ from the ones device already has
+
+    Commands (one per line, answer is one line starting with "ok" or "error"):
+        switch <profile> [mode]
+        set-dpi <level> <value>
+        reload
+        list
+        stats
+    """
+    # interface is given back to kernel after so long without commands,
+    # otherwise keys bound to mouse buttons would not work
+    IDLE_TIMEOUT = 1
+
+    # device node may appear a bit later than sysfs entry
+    REAPPLY_ATTEMPTS = 10
+    REAPPLY_DELAY = 0.05
+
+    def __init__(self, driver, socket_path=None, profiles_dir=PROFILES_DIR, sysfs_root=HotplugMonitor.SYSFS_ROOT):
+        self.driver = driver
+        self.socket_path = socket_path if socket_path is not None else default_socket_path()
+        self.profiles_dir = profiles_dir
+        self.profiles = {}
+        self.current = None
+        self.server = None
+        # commands come from many client threads and reapply from hotplug thread,
+        # current profile and profiles are read and replaced only while holding it
+        self.lock = threading.Lock()
+        self.hotplug_monitor = HotplugMonitor(driver.id_vendor, driver.id_product, self.reapply, sysfs_root=sysfs_root)
+
+        self.commands = {
+            "switch": self.switch,
+            "set-dpi": self.set_dpi,
+            "reload": self.reload,
+            "list": self.list_profiles,
+            "stats": self.stats,
+        }
+
+    def load_profiles(self):
+        """
+        Encode every profile in profiles_dir, profiles which can't be encoded are skipped
+        """
+        profiles = {}
+        for suffix in Data.PROFILE_SUFFIXES:
+            for path in sorted(glob.glob(os.path.join(self.profiles_dir, "*" + suffix))):
+                # yml file is used if profile is saved in both formats
+                if Path(path).stem in profiles:
+                    continue
+                try:
+                    data = profile_cache.load(path)
+                except (EncodeError, OSError, yaml.YAMLError, KeyError, ValueError, TypeError, AttributeError) as e:
+                    xenon_logger.error(f"ProfileDaemon: skipping {path} ({e})")
+                    continue
+                profiles[Path(path).stem] = data
+
+        self.profiles = dict(sorted(profiles.items()))
+        xenon_logger.info(f"ProfileDaemon: {len(profiles)} profiles loaded")
+
+    def execute(self, line):
+        """
+        Run one command line and return answer line
+        """
+        words = line.split()
+        if not words:
+            return "error empty command"
+
+        command = self.commands.get(words[0])
+        if command is None:
+            return f"error unknown command: {words[0]}"
+
+        # only arguments are checked here, TypeError raised inside of command is a bug
+        try:
+            inspect.signature(command).bind(*words[1:])
+        except TypeError:
+            return f"error wrong arguments for {words[0]}"
+
+        try:
+            with self.lock, self.driver.metrics.measure(f"command {words[0]}"):
+                return "ok " + command(*words[1:])
+        except CommandError as e:
+            return f"error {e}"
+        except Exception as e:
+            # client gets answer and daemon keeps running
+            xenon_logger.exception(f"ProfileDaemon: {line} failed")
+            return f"error {words[0]} failed: {e}"
+
+    def send(self, data):
+        if self.driver.send_data(data) is None:
+            raise CommandError("device not connected")
+
+    def switch(self, profile, mode="1"):
+        if profile not in self.profiles:
+            raise CommandError(f"no such profile: {profile}")
+
+        try:
+            mode = int(mode)
+        except ValueError:
+            raise CommandError(f"wrong mode: {mode}")
+        if mode not in ProfileEncoder.MODES:
+            raise CommandError(f"wrong mode: {mode}")
+
+        data = self.profiles[profile].snapshot()
+        DataHandler(data).set_current_mode(mode)
+        self.send(data)
+        self.current = data
+
+        return f"{profile} {mode}"
+
+    def set_dpi(self, level, value):
+        if self.current is None:
+            raise CommandError("no profile applied yet")
+
+        try:
+            level = int(level, 0)
+            value = int(value, 0)
+        except ValueError:
+            raise CommandError(f"wrong dpi: {level} {value}")
+
+        data = self.current.snapshot()
+        data_handler = DataHandler(data)
+        try:
+            data_handler.set_dpi_values(level, value)
+        except Exception as e:
+            raise CommandError(str(e))
+
+        dpi_levels = sum(
+            dpi_value & 0xF0 != Options.BLOCKED_DPI_LEVEL_MASK for dpi_value in data_handler.read("dpi_values")
+        )
+        data_handler.set_dpi_levels(dpi_levels)
+
+        errors = Validator.check_data(data_handler)
+        if errors:
+            raise CommandError("; ".join(errors))
+
+        self.send(data)
+        self.current = data
+
+        return f"{level} 0x{value:02x}"
+
+    def reapply(self, location, detected_at):
+        """
+        Send current profile to reconnected device, time from noticing device
+        to having it configured is recorded as "reconnect"
+        """
+        with self.lock:
+            data = self.current
+            if data is None:
+                return False
+
+            for _ in range(ProfileDaemon.REAPPLY_ATTEMPTS):
+                # old handle belongs to device which is gone
+                self.driver.disconnect()
+                if self.driver.send_data(data, force=True) is not None:
+                    self.driver.metrics.add("reconnect", time.monotonic() - detected_at)
+                    xenon_logger.info(f"ProfileDaemon: profile applied again to device at {location}")
+                    return True
+                time.sleep(ProfileDaemon.REAPPLY_DELAY)
+
+        xenon_logger.error(f"ProfileDaemon: could not apply profile to device at {location}")
+        return False
+
+    def reload(self):
+        self.load_profiles()
+        return str(len(self.profiles))
+
+    def list_profiles(self):
+        return " ".join(self.profiles)
+
+    def stats(self):
+        summary = self.driver.metrics.summary()
+        return "; ".join(
+            f"{name} n={values['count']} p50={values['p50']:.3f}ms p99={values['p99']:.3f}ms"
+            for name, values in summary.items()
+        )
+
+    def prepare_socket(self):
+        """
+        Make directory of socket and remove socket left by daemon which is not running
+
+        Raises DaemonError if another daemon answers on socket or private directory belongs to somebody else
+        """
+        directory = os.path.dirname(self.socket_path)
+        if directory == private_dir():
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            stat = os.lstat(directory)
+            if not os.path.isdir(directory) or os.path.islink(directory) or stat.st_uid != os.getuid():
+                raise DaemonError(f"{directory} doesn't belong to this user")
+            if stat.st_mode & 0o077:
+                raise DaemonError(f"{directory} can be used by other users")
+
+        if not os.path.exists(self.socket_path):
+            return
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            try:
+                client.connect(self.socket_path)
+            except OSError:
+                # nobody listens, daemon has ended without removing it
+                os.unlink(self.socket_path)
+                return
+
+        raise DaemonError(f"daemon is already running on {self.socket_path}")
+
+    def serve_forever(self):
+        self.prepare_socket()
+        self.load_profiles()
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    answer = daemon.execute(line.decode().strip())
+                    self.wfile.write((answer + "\n").encode())
+
+        self.server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        self.server.daemon_threads = True
+        xenon_logger.info(f"ProfileDaemon: listening on {self.socket_path}")
+
+        hotplug_thread = threading.Thread(target=self.hotplug_monitor.run, daemon=True)
+        hotplug_thread.start()
+
+        try:
+            with self.driver.session(idle_timeout=ProfileDaemon.IDLE_TIMEOUT):
+                self.server.serve_forever()
+        finally:
+            self.hotplug_monitor.stop()
+            hotplug_thread.join()
+            self.server.server_close()
+            os.unlink(self.socket_path)
+
+    def shutdown(self):
+        if self.server is not None:
+            self.server.shutdown()
+
+
+def send_command(command, socket_path=None):
+    """
+    Send command to running ProfileDaemon and return its answer
+
+    Raises OSError if daemon is not running
+    """
+    if socket_path is None:
+        socket_path = default_socket_path()
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall((command + "\n").encode())
+        with client.makefile("r") as answer:
+            return answer.readline().strip()
@@ -1,46 +1,132 @@
+import os
+import copy
+import json
+import itertools
 import yaml
+from collections import deque
 from pathlib import Path
 
+from xenon_driver.binding import DecimalInt, structure_bindings
 from xenon_driver.configuration import DATA_DIR
 from xenon_driver.logger import xenon_logger
 
+# libyaml is much faster, pure python classes are used when PyYAML is built without it
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper
+except ImportError:
+    from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper
+
+
+class ProfileDumper(YamlDumper):
+    """
+    Writes ints of profiles as hex, like they are written in gui, numbers of bindings in decimal
+    """
+
 
 class Data:
-    def __init__(self, file_path=None, *, main_load=None, reset_load=None, bindings_load=None):
-        yaml.add_representer(int, self.hexint_presenter)
+    # parsed hex files shared by all instances: path -> (mtime, bytes)
+    templates = {}
+
+    # profiles are yml files, generated ones may be saved as compact json
+    PROFILE_SUFFIXES = (".yml", ".json")
 
+    REPORTS = ("main_data", "reset_data", "bindings_data")
+
+    # every write into any data gets its own number, so the same version of report
+    # in two data means the same bytes (one is a snapshot of the other)
+    versions = itertools.count(1)
+
+    # older changed ranges are forgotten, whole reports are changed since then
+    MAX_CHANGES = 512
+
+    def __init__(self, file_path=None, *, main_load=None, reset_load=None, bindings_load=None):
         self.settings_yml = None
         self.file_name = file_path
-        self.main_data = self.load_bytes(DATA_DIR + "main_data")
-        self.reset_data = self.load_bytes(DATA_DIR + "reset_data")
-        self.bindings_data = self.load_bytes(DATA_DIR + "bindings_data")
+
+        if main_load is None:
+            main_load = self.load_template(DATA_DIR + "main_data")
+        if reset_load is None:
+            reset_load = self.load_template(DATA_DIR + "reset_data")
+        if bindings_load is None:
+            bindings_load = self.load_template(DATA_DIR + "bindings_data")
+
+        self.main_data = bytearray(main_load)
+        self.reset_data = bytearray(reset_load)
+        self.bindings_data = bytearray(bindings_load)
+
+        # report -> version of the last write, (version, report, start, end) of every write
+        self.report_versions = {name: next(Data.versions) for name in Data.REPORTS}
+        self.changes = deque(maxlen=Data.MAX_CHANGES)
+        self.changes_since = max(self.report_versions.values())
+
+        # what ProfileEncoder wrote, so the same settings are not encoded again (see ProfileEncoder.is_encoded)
+        self.encoded = {}
 
         if self.file_name is not None:
             self.settings_yml = self.load_data(file_path)
 
-        if main_load is not None:
-            self.main_data = main_load
-        if reset_load is not None:
-            self.reset_data = reset_load
-        if bindings_load is not None:
-            self.bindings_data = bindings_load
+    @staticmethod
+    def load_template(data_file_name):
+        """
+        Bytes of hex file, file is parsed again only when it has been modified
+        """
+        mtime = os.stat(data_file_name).st_mtime_ns
+        template = Data.templates.get(data_file_name)
+        if template is None or template[0] != mtime:
+            template = (mtime, bytes(Data.load_bytes(data_file_name)))
+            Data.templates[data_file_name] = template
+
+        return template[1]
 
     @staticmethod
     def load_bytes(data_file_name):
-        bytes_list = []
+        """
+        Read file with hex bytes separated by whitespace ("0x04 0x8a ...")
+        """
         with open(data_file_name, "r") as file:
-            lines = file.readlines()
-            for line in lines:
-                bytes_line = line.rstrip().split(" ")
-                for byte in bytes_line:
-                    bytes_list.append(int(byte, 16))
+            return bytearray(int(byte, 16) for byte in file.read().split())
+
+    @staticmethod
+    def parse_settings(content, file_path=""):
+        """
+        Settings of profile from content of its file, json if file_path ends with .json
+
+        Bindings saved only as labels get their fields here (see binding.structure_bindings)
+        """
+        if str(file_path).endswith(".json"):
+            settings_yml = json.loads(content)
+        else:
+            settings_yml = yaml.load(content, Loader=YamlLoader)
 
-        return bytes_list
+        if isinstance(settings_yml, dict):
+            structure_bindings(settings_yml)
+        return settings_yml
+
+    @staticmethod
+    def dump_settings(settings_yml, stream=None, compact=False):
+        """
+        Write settings into stream, returns them as text if stream is None
+
+        compact:
+            True -> json in one line, False -> yml with hex ints
+        """
+        if compact:
+            text = json.dumps(settings_yml, separators=(",", ":"), sort_keys=True)
+            if stream is None:
+                return text
+            stream.write(text)
+            return None
+        return yaml.dump(settings_yml, stream, Dumper=ProfileDumper)
+
+    @staticmethod
+    def save_settings(settings_yml, file_path):
+        with open(file_path, "w") as file:
+            Data.dump_settings(settings_yml, file, compact=str(file_path).endswith(".json"))
 
     def load_data(self, file_path):
         try:
-            with open(file_path, "r") as file:
-                default_settings = yaml.safe_load(file)
+            with open(file_path, "rb") as file:
+                default_settings = self.parse_settings(file.read(), file_path)
 
             file_name = Path(file_path).stem
             self.file_name = file_name
@@ -48,12 +134,78 @@ class Data:
 
         except FileNotFoundError:
             xenon_logger.info("Data: settings file not found: opening default settings")
-            with open(DATA_DIR + "default_settings.yml", "r") as file:
-                default_settings = yaml.safe_load(file)
+            with open(DATA_DIR + "default_settings.yml", "rb") as file:
+                default_settings = self.parse_settings(file.read())
             self.file_name = ""
 
         return default_settings
 
+    def snapshot(self):
+        """
+        Copy of current bytes which stays the same while this data is modified
+        """
+        data = copy.copy(self)
+        data.main_data = bytearray(self.main_data)
+        data.reset_data = bytearray(self.reset_data)
+        data.bindings_data = bytearray(self.bindings_data)
+        data.report_versions = dict(self.report_versions)
+        data.changes = self.changes.copy()
+        data.encoded = dict(self.encoded)
+        return data
+
+    def load_payload(self, data):
+        """
+        Copy bytes of other data into this one, in place, so views of DataHandler stay valid
+        """
+        self.main_data[:] = data.main_data
+        self.reset_data[:] = data.reset_data
+        self.bindings_data[:] = data.bindings_data
+
+        for name in Data.REPORTS:
+            self.mark_changed(name, 0, len(getattr(self, name)))
+        self.encoded = dict(data.encoded)
+
+    def mark_changed(self, report, start, end):
+        """
+        Record that bytes start:end of report have been written
+        """
+        version = next(Data.versions)
+        self.report_versions[report] = version
+
+        if len(self.changes) == Data.MAX_CHANGES:
+            # the oldest one is dropped
+            self.changes_since = self.changes[0][0]
+        self.changes.append((version, report, start, end))
+
+    def changed_ranges(self, since=0):
+        """
+        Byte ranges written after version since: report -> sorted list of merged (start, end)
+
+        Reports which may have changed before the oldest remembered write are whole.
+        """
+        whole = {}
+        if since < self.changes_since:
+            for name in Data.REPORTS:
+                if self.report_versions[name] > since:
+                    whole[name] = [(0, len(getattr(self, name)))]
+
+        written = {}
+        for version, report, start, end in self.changes:
+            if version > since and report not in whole:
+                written.setdefault(report, []).append((start, end))
+
+        ranges = whole
+        for report, report_ranges in written.items():
+            merged = []
+            for start, end in sorted(report_ranges):
+                if merged and start <= merged[-1][1]:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+                else:
+                    merged.append((start, end))
+            ranges[report] = merged
+
+        return ranges
+
     def print_hex(self, data):
         for i, byte in enumerate(data, start=1):
             print(f"0x{byte:02x}", end=" ")
@@ -61,5 +213,11 @@ class Data:
                 print()
         print()
 
-    def hexint_presenter(self, dumper, data):
+    @staticmethod
+    def hexint_presenter(dumper, data):
         return dumper.represent_int(hex(data))
+
+
+# registered once, for every profile written by ProfileDumper
+ProfileDumper.add_representer(int, Data.hexint_presenter)
+ProfileDumper.add_representer(DecimalInt, ProfileDumper.represent_int)
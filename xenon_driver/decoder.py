@@ -0,0 +1,241 @@
+import os
+import copy
+from collections import namedtuple
+
+from xenon_driver.binding import Binding, to_settings
+from xenon_driver.configuration import DATA_DIR, MACROS_DIR
+from xenon_driver.data import Data
+from xenon_driver.encoder import ProfileEncoder
+from xenon_driver.keys import Keys
+from xenon_driver.layout import Layout
+from xenon_driver.macro_compiler import MACRO_KEY_UP, macro_compiler, read_events
+from xenon_driver.options import Options
+
+
+# settings_yml has the same structure as profile yml file, macros are name -> text of macro file
+DecodedProfile = namedtuple("DecodedProfile", ["settings_yml", "macros", "current_mode"])
+
+
+class DecodeError(Exception):
+    pass
+
+
+def read_payload(file_path):
+    """
+    Data with bytes of payload file
+
+    File is either text with hex bytes of main, reset and bindings data one after another
+    (as printed by "xenon_driver dump", lines ending with ":" are skipped) or the same bytes raw.
+    """
+    with open(file_path, "rb") as file:
+        content = file.read()
+
+    size = sum(Layout.REPORT_SIZES.values())
+    if len(content) != size:
+        try:
+            payload = bytes(
+                int(word, 16) for word in content.decode("ascii").split() if not word.endswith(":")
+            )
+        except (UnicodeDecodeError, ValueError):
+            raise DecodeError(f"{file_path}: neither hex text nor {size} raw bytes")
+    else:
+        payload = content
+
+    if len(payload) != size:
+        raise DecodeError(f"{file_path}: payload has {len(payload)} bytes, should have {size}")
+
+    reports = {}
+    start = 0
+    for name, report_size in Layout.REPORT_SIZES.items():
+        reports[name] = payload[start:start + report_size]
+        start += report_size
+
+    return Data(main_load=reports["main_data"], reset_load=reports["reset_data"], bindings_load=reports["bindings_data"])
+
+
+def write_payload(data, file_path):
+    """
+    Save bytes of data raw, in the form read_payload reads
+    """
+    with open(file_path, "wb") as file:
+        for name in Layout.REPORT_SIZES:
+            file.write(getattr(data, name))
+
+
+class ProfileDecoder:
+    """
+    Reads data bytes back into settings of profile, reverse of ProfileEncoder
+
+    Macros are only in bytes, every one which is not saved in MACROS_DIR yet gets
+    a new name and its text is returned to be saved.
+    """
+    CLICKS = {value: button for button, value in ProfileEncoder.CLICKS.items()}
+
+    DPI_LOOP_ACTIONS = {value: action for action, value in ProfileEncoder.DPI_ACTIONS.items()}
+
+    SNIPE_DPIS = {value: int(label) for label, value in ProfileEncoder.DPIS}
+
+    LED_MODES = {value: name for name, value in ProfileEncoder.LED_MODES.items()}
+
+    MULTIMEDIA_KEYS = {value: name for name, value in ProfileEncoder.MULTIMEDIA_KEYS.items()}
+
+    # the same bits in key combination, in the order names are joined
+    MODIFIERS = list(Keys.MODIFIERS.items())
+
+    # codes of keys in key combinations, fire keys and macros
+    KEY_NAMES = Keys.KEY_NAMES
+    MOUSE_KEY_NAMES = Keys.MOUSE_KEY_NAMES
+
+    # main_data of default_settings.yml, read once
+    default_main_data = None
+
+    def __init__(self, data_handler):
+        self.data_handler = data_handler
+        self.known_macros = None
+
+    @staticmethod
+    def load_known_macros():
+        """
+        Bytes of every macro saved in MACROS_DIR: (macro_mode, cycle_times, macro_bytes) -> name
+        """
+        known_macros = {}
+        if not os.path.isdir(MACROS_DIR):
+            return known_macros
+
+        for name in sorted(os.listdir(MACROS_DIR)):
+            macro = macro_compiler.compile(name)
+            # errors are macros which encoder could not use
+            if macro.error is None:
+                known_macros.setdefault((macro.macro_mode, macro.cycle_times, macro.macro_bytes), name)
+
+        return known_macros
+
+    def decode(self, profile_name="decoded"):
+        """
+        profile_name:
+            used in names of new macros: <profile_name>_<button_name>
+        """
+        settings_yml = {
+            "main_data": self.decode_main_data(),
+            "bindings_data": {},
+        }
+
+        macros = {}
+        for mode in Layout.MODES:
+            settings_yml["bindings_data"][f"mode{mode}"] = {
+                button_name: to_settings(self.decode_binding(button_name, mode, profile_name, macros))
+                for button_name in ProfileEncoder.BUTTONS
+            }
+
+        return DecodedProfile(settings_yml, macros, self.data_handler.read("current_mode"))
+
+    def decode_main_data(self):
+        # bytes hold only settings of chosen led mode, the other ones are default
+        if ProfileDecoder.default_main_data is None:
+            with open(DATA_DIR + "default_settings.yml", "rb") as file:
+                ProfileDecoder.default_main_data = Data.parse_settings(file.read())["main_data"]
+        main_data = copy.deepcopy(ProfileDecoder.default_main_data)
+
+        led_mode = self.data_handler.read("led_mode")
+        if led_mode not in self.LED_MODES:
+            raise DecodeError(f"Unknown led mode: 0x{led_mode:02x}")
+
+        chosen = self.LED_MODES[led_mode]
+        led_settings = main_data[chosen.lower()]
+        led_settings["color"] = list(self.data_handler.read("led_color"))
+        led_settings["value"] = led_mode
+        if led_mode == Options.OFF:
+            led_settings["option"] = None
+        else:
+            led_settings["option"] = self.data_handler.read("led_option")
+
+        main_data["chosen"] = chosen
+        main_data["rr"] = self.data_handler.read("report_rate")
+        main_data["dirn"] = self.data_handler.read("direction")
+        main_data["dpis"] = list(self.data_handler.read("dpi_values"))
+
+        return main_data
+
+    def key_name(self, code):
+        if code in self.KEY_NAMES:
+            return self.KEY_NAMES[code]
+        if code in self.MOUSE_KEY_NAMES:
+            return self.MOUSE_KEY_NAMES[code]
+        raise DecodeError(f"Unknown key code: 0x{code:02x}")
+
+    def decode_binding(self, button_name, mode, profile_name, macros):
+        """
+        Binding of button, new macros are added to macros
+        """
+        mask, action, speed, times = self.data_handler.read_button(button_name, mode)
+
+        if mask == Options.CLICK_MASK and action in self.CLICKS:
+            return Binding("click", (self.CLICKS[action],))
+        elif mask == Options.DPI_LOOP_MASK and action in self.DPI_LOOP_ACTIONS:
+            return Binding("dpi", (self.DPI_LOOP_ACTIONS[action],))
+        elif mask == Options.SNIPE_BUTTON_MASK and action in self.SNIPE_DPIS:
+            return Binding("snipe", (self.SNIPE_DPIS[action],))
+        elif mask == Options.THREE_CLICK_MASK and action == Options.THREE_CLICK_ACTION:
+            return Binding("three_click", ())
+        elif mask == Options.MODE_MASK and action == Options.MODE_ACTION:
+            return Binding("mode_switch", ())
+        elif mask == Options.DISABLE_MASK and action == Options.DISABLE_ACTION:
+            return Binding("disable", ())
+        elif mask == Options.KEY_COMBINATION_MASK and action == 0x00 and speed in self.MULTIMEDIA_KEYS:
+            return Binding("multimedia", (self.MULTIMEDIA_KEYS[speed],))
+        elif mask == Options.KEY_COMBINATION_MASK:
+            keys = [name for name, bit in self.MODIFIERS if action & bit]
+            keys += [self.key_name(code) for code in (speed, times) if code != 0x00]
+            return Binding("keys", (tuple(keys),))
+        elif mask == Options.FIRE_MASK:
+            return Binding("fire", (self.key_name(action), speed, times))
+        elif mask == Options.MACRO_MASK:
+            return Binding("macro", (self.decode_macro_binding(button_name, action, profile_name, macros),))
+
+        raise DecodeError(
+            f"Unknown binding of {button_name} in mode {mode}: "
+            f"0x{mask:02x} 0x{action:02x} 0x{speed:02x} 0x{times:02x}"
+        )
+
+    def decode_macro_binding(self, button_name, action, profile_name, macros):
+        """
+        Name of macro in slot of button, macro is looked up in MACROS_DIR first
+        """
+        macro_slot = Layout.BUTTONS[button_name].macro_slot
+        if action >> 4 != macro_slot + 1:
+            raise DecodeError(f"Macro of {button_name} points to slot {(action >> 4) - 1}, should be {macro_slot}")
+
+        macro_mode = action & 0x0F
+        cycle_times, macro_bytes = self.data_handler.read_macro(button_name)
+
+        if self.known_macros is None:
+            self.known_macros = self.load_known_macros()
+        name = self.known_macros.get((macro_mode, cycle_times, macro_bytes))
+        if name is not None:
+            return name
+
+        name = f"{profile_name}_{button_name}"
+        macros[name] = self.decode_macro(macro_mode, cycle_times, macro_bytes)
+        return name
+
+    def decode_macro(self, macro_mode, cycle_times, macro_bytes):
+        """
+        Text of macro file, reverse of macro_compiler.translate
+
+        Every event is [0x01 or 0x81 + delay - 1, key code], longer delay is
+        followed by [hundreds, Options.MACRO_DELAY_LOOP]. 1 ms is the same as no delay
+        and so is not written, hundreds + 1 ms is read as full hundreds.
+        """
+        events = []
+        for state_byte, code, delay in read_events(macro_bytes):
+            key_name = self.key_name(code)
+            state = "Up" if state_byte == MACRO_KEY_UP else "Down"
+            if code in self.MOUSE_KEY_NAMES:
+                events.append(f"{key_name} - {state}")
+            else:
+                events.append(f"Key {key_name} - {state}")
+
+            if delay != 1:
+                events.append(f"Delay - {delay} ms")
+
+        return f"{macro_mode},{cycle_times}:" + ",".join(events)
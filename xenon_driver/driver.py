@@ -1,24 +1,64 @@
+import time
+import threading
+from contextlib import contextmanager
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
 import usb.core
-import usb.util
 
+from xenon_driver.usb_backend import UsbBackend
+from xenon_driver.metrics import Metrics
 from xenon_driver.logger import xenon_logger
 
 
 class Driver:
-    def __init__(self, id_vendor, id_product, *, dry_run=False):
+    # (wValue, Data attribute) of feature reports in the order they are sent
+    REPORTS = (
+        (0x0304, "main_data"),
+        (0x0308, "reset_data"),
+        (0x0306, "bindings_data"),
+    )
+
+    def __init__(self, id_vendor, id_product, *, dry_run=False, location=None, backend=None):
+        """
+        location:
+            None -> use first device found
+            "bus-port.port..." -> use only device plugged in there (see Driver.location_of)
+        backend:
+            None -> real usb devices (UsbBackend)
+            FakeBackend -> recorded transfers without hardware (see fake_usb)
+        """
         xenon_logger.info("driver INIT")
 
         self.id_vendor = id_vendor
         self.id_product = id_product
         self.dry_run = dry_run
+        self.location = location
+        self.backend = UsbBackend() if backend is None else backend
         self.interface = 1
 
+        self.dev = None
+        self.endpoint = None
+
+        # last payload of every report acknowledged by the device, keyed by wValue
+        self.shadow = {}
+        # Data.report_versions of reports in shadow, report with the same version is not even compared
+        self.shadow_versions = {}
+
+        # data can be sent from gui and background threads
+        self.lock = threading.RLock()
+
+        # time spent in every phase of sending data (lookup, detach, claim, transfers...)
+        self.metrics = Metrics()
+
+        # while session is open interface stays claimed between sends
+        self.sessions = 0
+        self.claimed = False
+        self.idle_timeout = None
+        self.idle_timer = None
+
     def __enter__(self):
         xenon_logger.info("driver ENTER")
-        # self.dev = usb.core.find(idVendor=self.id_vendor, idProduct=self.id_product)
-        # if self.dev is None:
-        #     return
-        # self.endpoint = self.dev[0][(self.interface, 0)][0]
         return self
 
     def __exit__(self, type, value, traceback):
@@ -27,64 +67,343 @@ class Driver:
             xenon_logger.debug(
                 f"Driver: xenon_logger exception {type, value, traceback}"
             )
+        self.disconnect()
+
+    @staticmethod
+    def location_of(dev):
+        """
+        Bus and port path of device, the same as its name in /sys/bus/usb/devices (ie. 1-2.4)
+        """
+        ports = dev.port_numbers or ()
+        return f"{dev.bus}-" + ".".join(str(port) for port in ports)
 
-    def connect(self):
-        self.dev = usb.core.find(idVendor=self.id_vendor, idProduct=self.id_product)
-        xenon_logger.info("trying to reconnect...")
+    def find(self):
+        if self.location is None:
+            return self.backend.find(idVendor=self.id_vendor, idProduct=self.id_product)
+
+        return self.backend.find(
+            idVendor=self.id_vendor,
+            idProduct=self.id_product,
+            custom_match=lambda dev: Driver.location_of(dev) == self.location,
+        )
+
+    def connect(self, dev=None):
+        """
+        dev:
+            None -> search the bus for device
+            usb.core.Device -> use already found device
+        """
+        self.shadow.clear()
+        self.shadow_versions.clear()
+        if dev is None:
+            xenon_logger.info("trying to reconnect...")
+            with self.metrics.measure("lookup"):
+                dev = self.find()
+        self.dev = dev
         if self.dev is None:
+            self.endpoint = None
             return
         self.endpoint = self.dev[0][(self.interface, 0)][0]
 
-    def send_data(self, data):
-        self.connect()
+    def disconnect(self):
+        """
+        Forget cached device, next send will search the bus again
+        """
+        self.release()
+        if self.dev is not None:
+            self.backend.dispose_resources(self.dev)
+        self.dev = None
+        self.endpoint = None
+        self.shadow.clear()
+        self.shadow_versions.clear()
 
-        if self.dry_run:
-            xenon_logger.info("Driver (dry run): data has not been sent")
-            return
+    def is_connected(self):
+        """
+        Cheap check whether cached device is still plugged in (no bus enumeration)
+        """
+        if self.dev is None:
+            return False
+
+        return self.backend.is_present(self.dev)
+
+    def changed_reports(self, data, versions):
+        """
+        Reports of data which differ from what device has already acknowledged
+
+        versions:
+            copy of data.report_versions taken before, bytes may only be newer than them
+
+        returns list of (wValue, payload bytes)
+        """
+        changed = []
+        for w_value, name in Driver.REPORTS:
+            version = versions[name]
+            if self.shadow_versions.get(w_value) == version and w_value in self.shadow:
+                continue
+
+            payload = bytes(getattr(data, name))
+            if self.shadow.get(w_value) != payload:
+                changed.append((w_value, payload))
+            else:
+                self.shadow_versions[w_value] = version
+        return changed
+
+    def remember_versions(self, versions):
+        """
+        Device has every report in these versions now
+        """
+        for w_value, name in Driver.REPORTS:
+            self.shadow_versions[w_value] = versions[name]
 
+    def send_data(self, data, force=False):
+        """
+        Send only reports which changed since last successful send
+
+        force:
+            True -> send all reports even if device already has them
+        """
+        with self.lock, self.metrics.measure("send"):
+            with self.metrics.measure("check"):
+                connected = self.is_connected()
+            if not connected:
+                self.connect()
+
+            if self.dry_run:
+                xenon_logger.info("Driver (dry run): data has not been sent")
+                return
+
+            if self.dev is None:
+                return
+
+            if force:
+                self.shadow.clear()
+                self.shadow_versions.clear()
+
+            versions = dict(data.report_versions)
+            reports = self.changed_reports(data, versions)
+            if not reports:
+                xenon_logger.info("Driver: nothing changed, data has not been sent")
+                return 0
+
+            try:
+                return self.transfer(reports, versions)
+            except usb.core.USBError as e:
+                xenon_logger.warning(f"Driver: transfer failed ({e}), searching for device again")
+
+            self.disconnect()
+            self.connect()
+            if self.dev is None:
+                return
+
+            try:
+                versions = dict(data.report_versions)
+                return self.transfer(self.changed_reports(data, versions), versions)
+            except usb.core.USBError as e:
+                xenon_logger.error(f"Driver: transfer failed again ({e})")
+                self.disconnect()
+                return
+
+    def open_session(self, idle_timeout=None):
+        """
+        Keep interface claimed (kernel driver detached) between sends until close_session
+
+        idle_timeout:
+            None -> hold interface until session is closed
+            seconds -> give interface back to kernel after so long without sending,
+                       next send in this session claims it again
+        """
+        with self.lock:
+            self.sessions += 1
+            self.idle_timeout = idle_timeout
+
+    def close_session(self):
+        with self.lock:
+            self.sessions = max(self.sessions - 1, 0)
+            if not self.sessions:
+                self.release()
+
+    @contextmanager
+    def session(self, idle_timeout=None):
+        """
+        with driver.session():
+            driver.send_data(data1)
+            driver.send_data(data2)
+        """
+        self.open_session(idle_timeout)
         try:
-            self.dev.detach_kernel_driver(self.interface)
-        except (usb.core.USBError, AttributeError):
+            yield self
+        finally:
+            self.close_session()
+
+    def claim(self):
+        if self.claimed:
             return
 
+        with self.metrics.measure("detach"):
+            self.dev.detach_kernel_driver(self.interface)
         xenon_logger.debug("Driver: DETACHING KERNEL DRIVER")
-        usb.util.claim_interface(self.dev, self.interface)
+
+        try:
+            with self.metrics.measure("claim"):
+                self.backend.claim_interface(self.dev, self.interface)
+        except usb.core.USBError:
+            self.dev.attach_kernel_driver(self.interface)
+            raise
         xenon_logger.debug("Driver: CLAIMING INTERFACE")
 
-        # self.dev.set_interface_altsetting(interface=self.interface, alternate_setting=0)
+        self.claimed = True
 
-        self.dev.ctrl_transfer(
-            bmRequestType=0x21,
-            bRequest=0x09,
-            wValue=0x0304,
-            wIndex=0x0001,
-            data_or_wLength=data.main_data,
-            timeout=1000,
-        )
+    def release(self):
+        """
+        Give interface back to kernel driver, errors are only logged (device may be gone)
+        """
+        with self.lock:
+            if self.idle_timer is not None:
+                self.idle_timer.cancel()
+                self.idle_timer = None
 
-        self.dev.ctrl_transfer(
-            bmRequestType=0x21,
-            bRequest=0x09,
-            wValue=0x0308,
-            wIndex=0x0001,
-            data_or_wLength=data.reset_data,
-            timeout=1000,
-        )
+            if not self.claimed:
+                return
+            self.claimed = False
 
-        self.dev.ctrl_transfer(
-            bmRequestType=0x21,
-            bRequest=0x09,
-            wValue=0x0306,
-            wIndex=0x0001,
-            data_or_wLength=data.bindings_data,
-            timeout=1000,
-        )
+            try:
+                with self.metrics.measure("release"):
+                    self.backend.release_interface(self.dev, self.interface)
+                xenon_logger.debug("Driver: RELEASING INTERFACE")
+
+                with self.metrics.measure("attach"):
+                    self.dev.attach_kernel_driver(self.interface)
+                xenon_logger.debug("Driver: ATTACHING KERNEL DRIVER")
+            except usb.core.USBError as e:
+                xenon_logger.warning(f"Driver: could not give interface back to kernel ({e})")
 
-        xenon_logger.info("Driver: DATA HAS BEEN SENT")
+    def restart_idle_timer(self):
+        if self.idle_timer is not None:
+            self.idle_timer.cancel()
+            self.idle_timer = None
+
+        if self.idle_timeout is None:
+            return
+
+        self.idle_timer = threading.Timer(self.idle_timeout, self.release)
+        self.idle_timer.daemon = True
+        self.idle_timer.start()
+
+    def transfer(self, reports, versions):
+        """
+        Feature reports are always sent whole, changed byte ranges only decide which ones
+        """
+        self.claim()
+
+        sent = False
+        try:
+            for w_value, payload in reports:
+                with self.metrics.measure(f"transfer 0x{w_value:04x}"):
+                    self.dev.ctrl_transfer(
+                        bmRequestType=0x21,
+                        bRequest=0x09,
+                        wValue=w_value,
+                        wIndex=0x0001,
+                        data_or_wLength=payload,
+                        timeout=1000,
+                    )
+                self.shadow[w_value] = payload
 
-        usb.util.release_interface(self.dev, 1)
-        xenon_logger.debug("Driver: RELEASING INTERFACE")
-        self.dev.attach_kernel_driver(1)
-        xenon_logger.debug("Driver: ATTACHING KERNEL DRIVER")
+            self.remember_versions(versions)
+            sent = True
+            xenon_logger.info(f"Driver: DATA HAS BEEN SENT ({len(reports)} of {len(Driver.REPORTS)} reports)")
+        finally:
+            if sent and self.sessions:
+                self.restart_idle_timer()
+            else:
+                self.release()
 
         return 0
+
+
+DeviceResult = namedtuple("DeviceResult", ["location", "sent", "elapsed", "error"])
+
+
+class MultiDriver:
+    """
+    Sends the same data to every connected device at once, one thread per device
+    """
+    def __init__(self, id_vendor, id_product, *, dry_run=False, backend=None):
+        self.id_vendor = id_vendor
+        self.id_product = id_product
+        self.dry_run = dry_run
+        self.backend = UsbBackend() if backend is None else backend
+
+        # location -> Driver
+        self.drivers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        for driver in self.drivers.values():
+            driver.disconnect()
+
+    def scan(self):
+        """
+        Search the bus for devices, keep drivers (and their caches) of devices still plugged in
+        """
+        devices = self.backend.find(find_all=True, idVendor=self.id_vendor, idProduct=self.id_product)
+
+        drivers = {}
+        for dev in devices:
+            location = Driver.location_of(dev)
+            driver = self.drivers.pop(location, None)
+            if driver is None:
+                driver = Driver(
+                    self.id_vendor, self.id_product, dry_run=self.dry_run, location=location, backend=self.backend
+                )
+                driver.connect(dev)
+            drivers[location] = driver
+
+        for driver in self.drivers.values():
+            driver.disconnect()
+
+        self.drivers = drivers
+        xenon_logger.info(f"MultiDriver: found {len(self.drivers)} devices: {list(self.drivers)}")
+
+        return list(self.drivers)
+
+    def send_data(self, data, force=False):
+        """
+        returns list of DeviceResult, one for each device (sorted by location)
+
+        Bus is searched every time, so mice plugged in since the last send get data too
+        and unplugged ones are dropped (drivers of the rest keep their caches).
+        """
+        self.scan()
+
+        if not self.drivers:
+            return []
+
+        with ThreadPoolExecutor(max_workers=len(self.drivers)) as pool:
+            futures = [
+                pool.submit(self.send_to_device, driver, data, force)
+                for driver in self.drivers.values()
+            ]
+            results = [future.result() for future in futures]
+
+        failed = [result.location for result in results if not result.sent]
+        if failed:
+            xenon_logger.error(f"MultiDriver: data has not been sent to {failed}")
+
+        return sorted(results)
+
+    @staticmethod
+    def send_to_device(driver, data, force):
+        start = time.perf_counter()
+        error = None
+        try:
+            send_result = driver.send_data(data, force)
+            if send_result is None:
+                error = "dry run" if driver.dry_run else "device not connected"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+
+        elapsed = time.perf_counter() - start
+        return DeviceResult(driver.location, error is None, elapsed, error)
@@ -0,0 +1,386 @@
+import os
+
+from xenon_driver.binding import BindingError, from_settings
+from xenon_driver.configuration import MACROS_DIR
+from xenon_driver.keys import Keys
+from xenon_driver.layout import Layout
+from xenon_driver.macro_compiler import macro_compiler, MacroFileNotFound
+from xenon_driver.options import Options
+from xenon_driver.validator import Validator
+
+
+class EncodeError(Exception):
+    """
+    Profile has setting which can't be written into data bytes
+    """
+
+
+class ValidationError(EncodeError):
+    """
+    Every error found in profile, errors is list of them
+    """
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+class MacroNotFoundError(EncodeError):
+    def __init__(self, macro_name):
+        super().__init__(f"Macro not found: {macro_name}")
+        self.macro_name = macro_name
+
+
+class ProfileEncoder:
+    """
+    Writes settings of profile (as loaded from yml file) into data bytes, without gui
+    """
+    BUTTONS = [
+        "left_button",
+        "right_button",
+        "middle_button",
+        "forward_button",
+        "back_button",
+        "dpi_button",
+        "mode_button",
+        "fire_button",
+    ]
+
+    MODES = [1, 2, 3]
+
+    LED_MODES = {
+        "Steady": Options.STEADY,
+        "Breath": Options.BREATH,
+        "Neon": Options.NEON,
+        "Off": Options.OFF,
+    }
+
+    DPIS = [
+        ("500", Options.SNIPE_DPI500),
+        ("750", Options.SNIPE_DPI750),
+        ("1000", Options.SNIPE_DPI1000),
+        ("1250", Options.SNIPE_DPI1250),
+        ("1375", Options.SNIPE_DPI1375),
+        ("1500", Options.SNIPE_DPI1500),
+        ("1750", Options.SNIPE_DPI1750),
+        ("2000", Options.SNIPE_DPI2000),
+        ("2500", Options.SNIPE_DPI2500),
+        ("2750", Options.SNIPE_DPI2750),
+        ("3200", Options.SNIPE_DPI3200),
+    ]
+
+    SNIPE_DPIS = dict(DPIS)
+
+    CLICKS = {
+        "left": Options.LEFT_BUTTON,
+        "right": Options.RIGHT_BUTTON,
+        "middle": Options.MIDDLE_BUTTON,
+        "forward": Options.FORWARD_BUTTON,
+        "back": Options.BACK_BUTTON,
+    }
+
+    DPI_ACTIONS = {
+        "loop": Options.DPI_LOOP,
+        "plus": Options.DPI_PLUS,
+        "minus": Options.DPI_MINUS,
+    }
+
+    MULTIMEDIA_KEYS = {
+        "Media Player": Options.MEDIAPLAYER,
+        "Play/Pause": Options.PLAYPAUSE,
+        "Next": Options.NEXT,
+        "Previous": Options.PREVIOUS,
+        "Stop": Options.STOP,
+        "Mute": Options.MUTE,
+        "Volume Up": Options.VOLUMEUP,
+        "Volume Down": Options.VOLUMEDOWN,
+        "Calculator": Options.CALCULATOR,
+        "Home page": Options.HOMEPAGE,
+    }
+
+    # settings remembered in Data.encoded -> fields they are written into
+    ENCODED_FIELDS = {
+        "led": ("led_mode", "led_option", "led_color"),
+        "report_rate": ("report_rate",),
+        "current_mode": ("current_mode",),
+        "dpi_levels": ("dpi_levels",),
+    }
+
+    def __init__(self, data_handler):
+        self.data_handler = data_handler
+
+        # binding kind -> function encoding it, called with setter of button, mode and params of binding
+        self.binding_encoders = {
+            "click": self.encode_click,
+            "dpi": self.encode_dpi,
+            "three_click": self.encode_three_click,
+            "keys": self.encode_keys,
+            "multimedia": self.encode_multimedia,
+            "fire": self.encode_fire,
+            "mode_switch": self.encode_mode_switch,
+            "snipe": self.encode_snipe,
+            "macro": self.encode_macro,
+            "disable": self.encode_disable,
+        }
+
+    def encode(self, settings_yml, current_mode=1):
+        """
+        Write whole profile into data bytes
+
+        current_mode:
+            1 or 2 or 3 -> mode which device switches to
+
+        Whole profile is checked first, raises ValidationError with every error found
+        and then nothing is written, so data is never left half encoded
+        """
+        main_data = settings_yml["main_data"]
+        errors = [f"main_data: {error}" for error in Validator.check_main_data(main_data)]
+
+        # bindings
+        records = []
+        for mode in self.MODES:
+            mode_records, mode_errors = self.check_bindings(settings_yml["bindings_data"][f"mode{mode}"], mode)
+            records += mode_records
+            errors += mode_errors
+
+        if errors:
+            raise ValidationError(errors)
+
+        for key, value, record in records:
+            self.data_handler.set_button(key[1], *record)
+            self.remember(key, value)
+
+        # led
+        chosen = main_data["chosen"]
+        led_settings = main_data[chosen.lower()]
+        option = led_settings["option"]
+        if option is None:
+            option = 0x00
+        self.set_led(self.LED_MODES[chosen], option, *led_settings["color"])
+
+        # rr
+        self.set_report_rate(main_data["rr"])
+
+        # mode
+        self.set_current_mode(current_mode)
+
+        # dpis
+        for i, dpi_value in enumerate(main_data["dpis"]):
+            self.set_dpi_values(i + 1, dpi_value)
+
+        dpi_levels = sum(
+            dpi_value & 0xF0 != Options.BLOCKED_DPI_LEVEL_MASK for dpi_value in main_data["dpis"]
+        )
+        self.set_dpi_levels(dpi_levels)
+
+    def written_bytes(self, key):
+        """
+        Current bytes of setting, compared in is_encoded so writes made past encoder are noticed
+        """
+        if key[0] == "binding":
+            _, button_name, mode = key
+            bindings_data = self.data_handler.bindings_data
+            start, end = self.data_handler.record_ranges[button_name, mode]
+            record = bytes(bindings_data[start:end])
+            if record[0] & 0xF0 == Options.MACRO_MASK:
+                start, end = self.data_handler.macro_ranges[button_name]
+                return record + bytes(bindings_data[start:end])
+            return record
+
+        if key[0] == "dpi":
+            field = Layout.FIELDS["dpi_values"]
+            offset = field.offset + key[1] - 1
+            return bytes(self.data_handler.reports[field.report][offset:offset + 1])
+
+        written = b""
+        for name in self.ENCODED_FIELDS[key[0]]:
+            field = Layout.FIELDS[name]
+            written += self.data_handler.reports[field.report][field.offset:field.offset + Layout.STRUCTS[name].size]
+        return written
+
+    def is_encoded(self, key, value):
+        """
+        True if setting has been encoded with this value and its bytes have not changed since
+        """
+        encoded = self.data_handler.handler_data.encoded.get(key)
+        return encoded is not None and encoded[0] == value and encoded[1] == self.written_bytes(key)
+
+    def remember(self, key, value):
+        self.data_handler.handler_data.encoded[key] = (value, self.written_bytes(key))
+
+    def encode_setting(self, key, value, setter, *args):
+        """
+        setter(*args) unless the same value is in data already, returns True if it was written
+        """
+        if self.is_encoded(key, value):
+            return False
+
+        setter(*args)
+        self.remember(key, value)
+        return True
+
+    def set_led(self, led_mode, option, r, g, b):
+        return self.encode_setting(
+            ("led",), (led_mode, option, r, g, b), self.data_handler.set_led, led_mode, option, r, g, b
+        )
+
+    def set_report_rate(self, report_rate):
+        return self.encode_setting(("report_rate",), report_rate, self.data_handler.set_report_rate, report_rate)
+
+    def set_current_mode(self, current_mode):
+        return self.encode_setting(("current_mode",), current_mode, self.data_handler.set_current_mode, current_mode)
+
+    def set_dpi_values(self, level, value):
+        return self.encode_setting(("dpi", level), value, self.data_handler.set_dpi_values, level, value)
+
+    def set_dpi_levels(self, dpi_levels):
+        return self.encode_setting(("dpi_levels",), dpi_levels, self.data_handler.set_dpi_levels, dpi_levels)
+
+    @staticmethod
+    def macro_stamp(binding):
+        """
+        (mtime, size) of macro file of binding, so macro is read again only after it has been changed
+        """
+        if binding.kind != "macro":
+            return None
+
+        try:
+            stat = os.stat(MACROS_DIR + binding.params[0])
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def check_bindings(self, mode_bindings, mode):
+        """
+        mode_bindings:
+            { "left_button": { "name": bind_text, "kind": ..., <fields of kind> }, ... } -> one mode of profile
+
+        Returns ([(key, value, record), ...], errors), records of bindings which are not in data yet,
+        nothing is written
+        """
+        records = []
+        errors = []
+        for i, name in enumerate(self.BUTTONS):
+            try:
+                binding = from_settings(mode_bindings[name])
+                key, value = self.binding_key(i, binding, mode)
+                if not self.is_encoded(key, value):
+                    records.append((key, value, self.button_record(binding, mode)))
+            except (BindingError, EncodeError) as e:
+                errors.append(f"mode{mode} {name}: {e}")
+
+        return records, errors
+
+    @staticmethod
+    def check_button(mask, action=Options.DEFAULT, speed=0x00, times=0x00, mode=1, macro=None):
+        """
+        Arguments of DataHandler.set_button (after button name), raises EncodeError if device doesn't accept them
+        """
+        errors = Validator.check_binding(mask, action, speed, times)
+        if macro is not None:
+            errors += Validator.check_macro(macro)
+        if errors:
+            raise EncodeError("; ".join(errors))
+
+        return mask, action, speed, times, mode, macro
+
+    def button_record(self, binding, mode):
+        """
+        Checked arguments of DataHandler.set_button (after button name) for binding
+
+        Raises EncodeError
+        """
+        encode_binding = self.binding_encoders.get(binding.kind)
+        if encode_binding is None:
+            raise EncodeError(f"Unknown binding: {binding.kind}")
+
+        records = []
+
+        def set_button(*args, **kwargs):
+            records.append(self.check_button(*args, **kwargs))
+
+        encode_binding(set_button, mode, *binding.params)
+        return records[0]
+
+    def binding_key(self, i, binding, mode):
+        """
+        (key, value) of binding of i-th button in Data.encoded
+        """
+        return ("binding", self.BUTTONS[i], mode), (binding, self.macro_stamp(binding))
+
+    def set_binding(self, i, binding, mode):
+        """
+        Set action of i-th button (see BUTTONS)
+
+        binding:
+            Binding -> ie. Binding("fire", ("Left button", 30, 1)), see binding.KINDS
+
+        Binding which is already in data is skipped, returns True if it was written
+        """
+        key, value = self.binding_key(i, binding, mode)
+        return self.encode_setting(key, value, self.write_binding, i, binding, mode)
+
+    def write_binding(self, i, binding, mode):
+        self.data_handler.set_button(self.BUTTONS[i], *self.button_record(binding, mode))
+
+    def encode_click(self, set_button, mode, button):
+        if button not in self.CLICKS:
+            raise EncodeError(f"Unknown button: {button}")
+        set_button(Options.CLICK_MASK, self.CLICKS[button], mode=mode)
+
+    def encode_dpi(self, set_button, mode, action):
+        if action not in self.DPI_ACTIONS:
+            raise EncodeError(f"Unknown dpi action: {action}")
+        set_button(Options.DPI_LOOP_MASK, self.DPI_ACTIONS[action], mode=mode)
+
+    def encode_three_click(self, set_button, mode):
+        set_button(Options.THREE_CLICK_MASK, Options.THREE_CLICK_ACTION, mode=mode)
+
+    def encode_keys(self, set_button, mode, keys):
+        modifiers = 0x00
+        codes = []
+        for key in keys:
+            if key not in Keys.NAMES:
+                raise EncodeError(f"Unknown key: {key} ({'+'.join(keys)})")
+            if key in Keys.MODIFIERS:
+                modifiers |= Keys.MODIFIERS[key]
+            else:
+                codes.append(Keys.NAMES[key])
+
+        # speed and times bytes
+        if len(codes) > 2:
+            raise EncodeError(f"More than two keys which are not modifiers ({'+'.join(keys)})")
+
+        set_button(Options.KEY_COMBINATION_MASK, modifiers, *codes, mode=mode)
+
+    def encode_multimedia(self, set_button, mode, key):
+        if key not in self.MULTIMEDIA_KEYS:
+            raise EncodeError(f"Unknown multimedia key: {key}")
+        set_button(Options.KEY_COMBINATION_MASK, 0x00, self.MULTIMEDIA_KEYS[key], mode=mode)
+
+    def encode_fire(self, set_button, mode, key, delay, times):
+        if key not in Keys.FIRE_KEYS:
+            raise EncodeError(f"Unknown key: {key} (Fire key - {key},{delay}ms,{times})")
+
+        set_button(Options.FIRE_MASK, Keys.FIRE_KEYS[key], delay, times, mode=mode)
+
+    def encode_mode_switch(self, set_button, mode):
+        set_button(Options.MODE_MASK, Options.MODE_ACTION, mode=mode)
+
+    def encode_snipe(self, set_button, mode, dpi):
+        if str(dpi) not in self.SNIPE_DPIS:
+            raise EncodeError(f"Unknown snipe dpi: {dpi}")
+        set_button(Options.SNIPE_BUTTON_MASK, self.SNIPE_DPIS[str(dpi)], mode=mode)
+
+    def encode_macro(self, set_button, mode, macro_name):
+        macro = macro_compiler.compile(macro_name)
+
+        # macro doesn't exist anymore
+        if isinstance(macro.error, MacroFileNotFound):
+            raise MacroNotFoundError(macro_name)
+        if macro.error is not None:
+            raise EncodeError(f"Macro {macro_name}: {macro.error}")
+
+        set_button(Options.MACRO_MASK, 0x00, mode=mode, macro=macro)
+
+    def encode_disable(self, set_button, mode):
+        set_button(Options.DISABLE_MASK, Options.DISABLE_ACTION, mode=mode)
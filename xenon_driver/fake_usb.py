@@ -0,0 +1,218 @@
+import os
+import time
+import errno
+import shutil
+import random
+import threading
+from collections import namedtuple
+
+import usb.core
+
+from xenon_driver.logger import xenon_logger
+
+
+FakeTransfer = namedtuple(
+    "FakeTransfer",
+    ["location", "bmRequestType", "bRequest", "wValue", "wIndex", "data", "start", "end"],
+)
+
+
+class FakeDevice:
+    """
+    Device with the same surface Driver uses from usb.core.Device
+    """
+    def __init__(self, backend, bus, address, port_numbers, id_vendor, id_product):
+        self.backend = backend
+        self.bus = bus
+        self.address = address
+        self.port_numbers = port_numbers
+        self.idVendor = id_vendor
+        self.idProduct = id_product
+
+        self.plugged = True
+        self.kernel_driver_active = {0: True, 1: True}
+        self.claimed = set()
+
+    def __repr__(self):
+        return f"<FakeDevice {self.idVendor:04x}:{self.idProduct:04x} at {self.bus}-{'.'.join(map(str, self.port_numbers))}>"
+
+    def __getitem__(self, configuration):
+        # dev[0][(interface, alternate_setting)][0] -> endpoint
+        return {
+            (interface, 0): [f"endpoint {interface}"] for interface in self.kernel_driver_active
+        }
+
+    def check_plugged(self):
+        if not self.plugged:
+            raise usb.core.USBError("No such device (it may have been disconnected)", errno=errno.ENODEV)
+
+    def is_kernel_driver_active(self, interface):
+        self.check_plugged()
+        return self.kernel_driver_active[interface]
+
+    def detach_kernel_driver(self, interface):
+        self.check_plugged()
+        if not self.kernel_driver_active[interface]:
+            raise usb.core.USBError("Entity not found", errno=errno.ENOENT)
+        self.kernel_driver_active[interface] = False
+
+    def attach_kernel_driver(self, interface):
+        self.check_plugged()
+        if self.kernel_driver_active[interface]:
+            raise usb.core.USBError("Resource busy", errno=errno.EBUSY)
+        self.kernel_driver_active[interface] = True
+
+    def ctrl_transfer(self, bmRequestType, bRequest, wValue=0, wIndex=0, data_or_wLength=None, timeout=None):
+        start = time.perf_counter()
+        self.check_plugged()
+        if wIndex not in self.claimed:
+            raise usb.core.USBError("Resource busy", errno=errno.EBUSY)
+
+        self.backend.simulate_transfer()
+
+        data = bytes(data_or_wLength or b"")
+        self.backend.record(
+            FakeTransfer(
+                self.backend.location_of(self), bmRequestType, bRequest, wValue, wIndex, data, start, time.perf_counter()
+            )
+        )
+        return len(data)
+
+
+class FakeBackend:
+    """
+    In-process replacement of UsbBackend, records every control transfer
+
+    find_latency, transfer_latency:
+        seconds added to every bus search / control transfer
+    error_rate:
+        0.0-1.0 -> probability that a control transfer raises USBError
+    seed:
+        seed of random generator used for error_rate
+    sysfs_root:
+        directory where plugged devices are mirrored like in /sys/bus/usb/devices
+    """
+    def __init__(self, *, find_latency=0.0, transfer_latency=0.0, error_rate=0.0, seed=None, sysfs_root=None):
+        self.find_latency = find_latency
+        self.transfer_latency = transfer_latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.sysfs_root = sysfs_root
+
+        self.devices = []
+        self.transfers = []
+        self.finds = 0
+        self.failures_left = 0
+        self.lock = threading.Lock()
+
+    def add_device(self, bus=1, address=None, port_numbers=(1,), id_vendor=0x258A, id_product=0x1007):
+        if address is None:
+            address = len(self.devices) + 2
+        device = FakeDevice(self, bus, address, tuple(port_numbers), id_vendor, id_product)
+        self.devices.append(device)
+
+        if self.sysfs_root is not None:
+            path = os.path.join(self.sysfs_root, self.location_of(device))
+            os.makedirs(path)
+            # interfaces have their own entries
+            os.makedirs(path + ":1.0")
+            os.makedirs(path + ":1.1")
+            for name, value in (
+                ("idVendor", f"{id_vendor:04x}"),
+                ("idProduct", f"{id_product:04x}"),
+                ("busnum", bus),
+                ("devnum", address),
+            ):
+                with open(os.path.join(path, name), "w") as file:
+                    file.write(f"{value}\n")
+        return device
+
+    def unplug(self, device):
+        device.plugged = False
+        self.devices.remove(device)
+
+        if self.sysfs_root is not None:
+            path = os.path.join(self.sysfs_root, self.location_of(device))
+            for entry in (path, path + ":1.0", path + ":1.1"):
+                shutil.rmtree(entry)
+
+    def replug(self, device):
+        """
+        Plug device back in the same port, like real one it gets new address
+        """
+        if device in self.devices:
+            self.unplug(device)
+        return self.add_device(
+            device.bus, device.address + 1, device.port_numbers, device.idVendor, device.idProduct
+        )
+
+    def fail_next(self, count=1):
+        """
+        Make next count control transfers raise USBError
+        """
+        with self.lock:
+            self.failures_left += count
+
+    def simulate_transfer(self):
+        if self.transfer_latency:
+            time.sleep(self.transfer_latency)
+
+        with self.lock:
+            if self.failures_left:
+                self.failures_left -= 1
+                fail = True
+            else:
+                fail = self.error_rate and self.random.random() < self.error_rate
+
+        if fail:
+            xenon_logger.debug("FakeBackend: injected transfer error")
+            raise usb.core.USBError("Pipe error", errno=errno.EPIPE)
+
+    def record(self, transfer):
+        with self.lock:
+            self.transfers.append(transfer)
+
+    def clear(self):
+        with self.lock:
+            self.transfers.clear()
+            self.finds = 0
+
+    @staticmethod
+    def location_of(device):
+        return f"{device.bus}-" + ".".join(str(port) for port in device.port_numbers)
+
+    # ---- UsbBackend interface ----
+
+    def find(self, find_all=False, custom_match=None, idVendor=None, idProduct=None):
+        if self.find_latency:
+            time.sleep(self.find_latency)
+
+        with self.lock:
+            self.finds += 1
+
+        matching = [
+            device
+            for device in self.devices
+            if (idVendor is None or device.idVendor == idVendor)
+            and (idProduct is None or device.idProduct == idProduct)
+            and (custom_match is None or custom_match(device))
+        ]
+
+        if find_all:
+            return iter(matching)
+        return matching[0] if matching else None
+
+    def claim_interface(self, dev, interface):
+        dev.check_plugged()
+        if dev.kernel_driver_active[interface]:
+            raise usb.core.USBError("Resource busy", errno=errno.EBUSY)
+        dev.claimed.add(interface)
+
+    def release_interface(self, dev, interface):
+        dev.claimed.discard(interface)
+
+    def dispose_resources(self, dev):
+        dev.claimed.clear()
+
+    def is_present(self, dev):
+        return dev.plugged
@@ -1,5 +1,4 @@
 import sys
-import yaml
 from functools import partial
 
 import PyQt5
@@ -7,13 +6,17 @@ from PyQt5.QtCore import Qt
 from PyQt5 import QtWidgets
 
 from xenon_driver.data import Data
-from xenon_driver.data_handler import DataHandler, MacroTranslator
+from xenon_driver.data_handler import DataHandler
+from xenon_driver.binding import BindingError, from_settings, parse_label, settings_of_label
+from xenon_driver.encoder import ProfileEncoder, EncodeError, MacroNotFoundError
+from xenon_driver.profile_cache import profile_cache
 from xenon_driver.options import Options
+from xenon_driver.validator import Validator
 
 from xenon_driver.configuration import DATA_DIR, PROFILES_DIR
 from xenon_driver.gui_resources import custom_widgets
 from xenon_driver.gui_resources import gui_parts
-from xenon_driver.gui_resources import gui_keys
+from xenon_driver.gui_resources import data_sender
 from xenon_driver.logger import xenon_logger
 
 
@@ -26,19 +29,35 @@ class Window(QtWidgets.QWidget):
         default_file_name = self.read_default()
 
         if load_default:
-            self.data = Data(DATA_DIR + "default_settings.yml")
+            path = DATA_DIR + "default_settings.yml"
         else:
-            self.data = Data(PROFILES_DIR + default_file_name + ".yml")
+            path = PROFILES_DIR + default_file_name + ".yml"
+
+        try:
+            self.data = profile_cache.load(path)
+            is_encoded = True
+        except (FileNotFoundError, EncodeError):
+            # Data opens default settings instead, missing macro is reported by assign_data_bytes
+            self.data = Data(path)
+            is_encoded = False
 
         self.current_profile = self.data.file_name
 
         self.data_handler = DataHandler(self.data)
+        self.encoder = ProfileEncoder(self.data_handler)
 
         self.dry_run = dry_run
 
         # variables
         self.driver = driver
 
+        # sends data in background thread
+        self.data_sender = None
+        if self.driver is not None:
+            self.data_sender = data_sender.DataSender(self.driver)
+            self.data_sender.sent.connect(self.on_data_sent)
+            self.data_sender.failed.connect(self.on_data_send_failed)
+
         self.current_set_rr = self.data.settings_yml["main_data"]["rr"]
         self.current_set_dpis = self.data.settings_yml["main_data"]["dpis"]
         self.current_led_mode = self.data.settings_yml["main_data"]["chosen"]
@@ -53,9 +72,6 @@ class Window(QtWidgets.QWidget):
         self.profiles_manager = None
         self.macro_creator = None
 
-        # macro translator
-        self.mt = None
-
         # -------------------
         self.setStyleSheet("background-color: #444444;")
 
@@ -77,19 +93,7 @@ class Window(QtWidgets.QWidget):
         # button names lists
         self.top_buttons_names = ["Create macro", "Profiles", "Advanced"]
 
-        self.dpis_list = [
-            ("500" , Options.SNIPE_DPI500 ),
-            ("750" , Options.SNIPE_DPI750 ),
-            ("1000", Options.SNIPE_DPI1000),
-            ("1250", Options.SNIPE_DPI1250),
-            ("1375", Options.SNIPE_DPI1375),
-            ("1500", Options.SNIPE_DPI1500),
-            ("1750", Options.SNIPE_DPI1750),
-            ("2000", Options.SNIPE_DPI2000),
-            ("2500", Options.SNIPE_DPI2500),
-            ("2750", Options.SNIPE_DPI2750),
-            ("3200", Options.SNIPE_DPI3200)
-        ]
+        self.dpis_list = ProfileEncoder.DPIS
 
         # ---- bind buttons ----
         self.bindings_options = [
@@ -100,18 +104,7 @@ class Window(QtWidgets.QWidget):
             "Macro", "Mode switch", "Snipe button", "Disable"
         ]
 
-        self.bindings_buttons_names = ["left_button", "right_button", "middle_button", "forward_button", "back_button", "dpi_button", "mode_button", "fire_button"]
-
-        self.bindings_functions = [
-            self.data_handler.set_left_button,
-            self.data_handler.set_right_button,
-            self.data_handler.set_middle_button,
-            self.data_handler.set_forward_button,
-            self.data_handler.set_back_button,
-            self.data_handler.set_dpi_button,
-            self.data_handler.set_mode_button,
-            self.data_handler.set_fire_button
-        ]
+        self.bindings_buttons_names = ProfileEncoder.BUTTONS
 
         # report rate
         self.rr_buttons_names = [
@@ -160,18 +153,7 @@ class Window(QtWidgets.QWidget):
         }
 
         # multimedia dict
-        self.multimedia_keys_dict = {
-            "Media Player" : Options.MEDIAPLAYER,
-            "Play/Pause"   : Options.PLAYPAUSE,
-            "Next"         : Options.NEXT,
-            "Previous"     : Options.PREVIOUS,
-            "Stop"         : Options.STOP,
-            "Mute"         : Options.MUTE,
-            "Volume Up"    : Options.VOLUMEUP,
-            "Volume Down"  : Options.VOLUMEDOWN,
-            "Calculator"   : Options.CALCULATOR,
-            "Home page"    : Options.HOMEPAGE
-        }
+        self.multimedia_keys_dict = ProfileEncoder.MULTIMEDIA_KEYS
 
         restore_func = partial(self.load_profile, "default_settings.yml", True)
         self.bottom_buttons_list = [
@@ -236,7 +218,8 @@ class Window(QtWidgets.QWidget):
 
         self.right_frame_layout.addStretch()
 
-        self.assign_data_bytes()
+        if not is_encoded:
+            self.assign_data_bytes()
         self.center()
 
     def center(self):
@@ -260,7 +243,7 @@ class Window(QtWidgets.QWidget):
                 chosen_option = combo_box.currentData()
                 if combo_box.currentData() is None:
                     chosen_option = 0x00
-                self.data_handler.set_led(rb.mode, chosen_option, chosen_color[0], chosen_color[1], chosen_color[2])
+                self.encoder.set_led(rb.mode, chosen_option, chosen_color[0], chosen_color[1], chosen_color[2])
 
         # bindings
         self.current_set_mode = self.bindings_buttons_widget.current_set_mode
@@ -268,127 +251,48 @@ class Window(QtWidgets.QWidget):
             mode = f"mode{current_set_mode}"
             for i, bind_menu in enumerate(self.bindings_buttons_widget.bindings_menus):
                 name = self.bindings_buttons_names[i]
-                bind_text = self.data.settings_yml["bindings_data"][mode][name]["name"]
-
-                # read data for other modes from file and for current mode - read from widget buttons
-                if self.current_set_mode == current_set_mode:
-                    bind_text = bind_menu.text()
-
-                if bind_text.startswith("Left button"):
-                    setter = partial(self.bindings_functions[i], Options.CLICK_MASK, Options.LEFT_BUTTON, mode=current_set_mode)
-                    setter()
-                elif bind_text.startswith("Right button"):
-                    setter = partial(self.bindings_functions[i], Options.CLICK_MASK, Options.RIGHT_BUTTON, mode=current_set_mode)
-                    setter()
-                elif bind_text.startswith("Middle button"):
-                    setter = partial(self.bindings_functions[i], Options.CLICK_MASK, Options.MIDDLE_BUTTON, mode=current_set_mode)
-                    setter()
-                elif bind_text.startswith("Forward button"):
-                    setter = partial(self.bindings_functions[i], Options.CLICK_MASK, Options.FORWARD_BUTTON, mode=current_set_mode)
-                    setter()
-                elif bind_text.startswith("Back button"):
-                    setter = partial(self.bindings_functions[i], Options.CLICK_MASK, Options.BACK_BUTTON, mode=current_set_mode)
-                    setter()
-                elif bind_text.startswith("DPI Loop"):
-                    setter = partial(self.bindings_functions[i], Options.DPI_LOOP_MASK, Options.DPI_LOOP, mode=current_set_mode)
-                    setter()
-                elif bind_text.startswith("DPI +"):
-                    setter = partial(self.bindings_functions[i], Options.DPI_LOOP_MASK, Options.DPI_PLUS, mode=current_set_mode)
-                    setter()
-                elif bind_text.startswith("DPI -"):
-                    setter = partial(self.bindings_functions[i], Options.DPI_LOOP_MASK, Options.DPI_MINUS, mode=current_set_mode)
-                    setter()
-                elif bind_text.startswith("Three click"):
-                    setter = partial(self.bindings_functions[i], Options.THREE_CLICK_MASK, Options.THREE_CLICK_ACTION, mode=current_set_mode)
-                    setter()
-                elif bind_text.startswith("Keys combination"):
-                    key_comb_splited = bind_text.split(" ")
-                    key_comb_text = key_comb_splited[3]
-                    keys_list = key_comb_text.split("+")
-                    xenon_logger.debug(keys_list)
-
-                    whole_key_combination_data = [Options.KEY_COMBINATION_MASK, 0x00]
-                    for key_catched in keys_list:
-                        for _, tuple_val in gui_keys.GuiKeys.keys_dict.items():
-                            if key_catched in ("Ctrl", "Shift", "Alt", "Super") and key_catched == tuple_val[0]:
-                                whole_key_combination_data[1] |= tuple_val[1]
-                            elif key_catched == tuple_val[0]:
-                                whole_key_combination_data.append(tuple_val[1])
-
-                    setter = partial(self.bindings_functions[i], *whole_key_combination_data, mode=current_set_mode)
-                    setter()
-                elif bind_text.startswith("Multimedia"):
-                    bind_text_splitted = bind_text.split(" ")
-                    multimedia_name = bind_text_splitted[2]
-                    multimedia_value = self.multimedia_keys_dict[multimedia_name]
-                    setter = partial(self.bindings_functions[i], Options.KEY_COMBINATION_MASK, 0x00, multimedia_value, mode=current_set_mode)
-                    setter()
-                elif bind_text.startswith("Fire key"):
-                    bind_text_splitted = bind_text.split("-")
-                    fire_data = bind_text_splitted[1][1:]
-                    splitted_fire_data = fire_data.split(",")
-
-                    whole_fire_key = [Options.FIRE_MASK, 0, 0, 0]
-
-                    if splitted_fire_data[0] in gui_keys.GuiKeys.MOUSE_KEYS:
-                        whole_fire_key[1] = gui_keys.GuiKeys.MOUSE_KEYS[splitted_fire_data[0]]
-
-                    for _, tuple_val in gui_keys.GuiKeys.keys_dict.items():
-                        if splitted_fire_data[0] == tuple_val[0]:
-                            whole_fire_key[1] = tuple_val[1]
-
-                    whole_fire_key[2] = int(splitted_fire_data[1][:-2])
-                    whole_fire_key[3] = int(splitted_fire_data[2])
-
-                    setter = partial(self.bindings_functions[i], *whole_fire_key, mode=current_set_mode)
-                    setter()
-                elif bind_text.startswith("Mode switch"):
-                    setter = partial(self.bindings_functions[i], Options.MODE_MASK, Options.MODE_ACTION, mode=current_set_mode)
-                    setter()
-                elif bind_text.startswith("Snipe button"):
-                    snipe_dpi_text = bind_text.split(" ")
-                    current_dpi_text = snipe_dpi_text[3]
-                    actual_dpi_byte = 0
-                    for dpi_value in self.dpis_list:
-                        if dpi_value[0] == current_dpi_text:
-                            actual_dpi_byte = dpi_value[1]
-                    setter = partial(self.bindings_functions[i], Options.SNIPE_BUTTON_MASK, actual_dpi_byte, mode=current_set_mode)
-                    setter()
-                elif bind_text.startswith("Macro"):
-                    bind_text_splitted = bind_text.split(" ")
-                    macro_file_name = bind_text_splitted[2]
-                    self.mt = MacroTranslator(macro_file_name)
 
-                    # macro doesn't exist anymore
-                    if not self.mt.macro_bytes:
-                        custom_widgets.MacroNotFound()
-                        return
+                try:
+                    # read data for other modes from file and for current mode - read from widget buttons
+                    if self.current_set_mode == current_set_mode:
+                        binding = parse_label(bind_menu.text())
+                    else:
+                        binding = from_settings(self.data.settings_yml["bindings_data"][mode][name])
 
-                    setter = partial(self.bindings_functions[i], Options.MACRO_MASK, 0x00, mode=current_set_mode, macro=self.mt)
-                    setter()
-                elif bind_text.startswith("Disable"):
-                    setter = partial(self.bindings_functions[i], Options.DISABLE_MASK, Options.DISABLE_ACTION, mode=current_set_mode)
-                    setter()
+                    self.encoder.set_binding(i, binding, current_set_mode)
+                except MacroNotFoundError:
+                    # macro doesn't exist anymore
+                    custom_widgets.MacroNotFound()
+                    return
+                except (BindingError, EncodeError) as e:
+                    # profile edited by hand, the other bindings are still set
+                    xenon_logger.error(f"{name}: {e}")
 
         # rr
-        self.data_handler.set_report_rate(self.rr_widget.current_set_rr)
+        self.encoder.set_report_rate(self.rr_widget.current_set_rr)
 
         # mode
-        self.data_handler.set_current_mode(self.current_set_mode)
+        self.encoder.set_current_mode(self.current_set_mode)
 
         # apply dpis
         for i, dpi_slider in enumerate(self.dpi_sliders_widget.dpi_sliders_list):
             if self.dpi_sliders_widget.dpi_check_boxes_list[i].isChecked():
-                self.data_handler.set_dpi_values(i + 1, dpi_slider.value())
+                self.encoder.set_dpi_values(i + 1, dpi_slider.value())
             else:
-                self.data_handler.set_dpi_values(i + 1, dpi_slider.value() | Options.BLOCKED_DPI_LEVEL_MASK)
+                self.encoder.set_dpi_values(i + 1, dpi_slider.value() | Options.BLOCKED_DPI_LEVEL_MASK)
 
         dpi_levels = sum([dcb.isChecked() for dcb in self.dpi_sliders_widget.dpi_check_boxes_list])
-        self.data_handler.set_dpi_levels(dpi_levels)
+        self.encoder.set_dpi_levels(dpi_levels)
 
     def apply_changes(self):
         self.assign_data_bytes()
 
+        errors = Validator.check_data(self.data_handler)
+        if errors:
+            for error in errors:
+                xenon_logger.error(f"Data not applied: {error}")
+            return
+
         if self.dry_run:
             return
 
@@ -397,18 +301,19 @@ class Window(QtWidgets.QWidget):
             xenon_logger.error("Device not connected")
             return
 
-        # send and save
-        send_result = self.driver.send_data(self.data)
-        if send_result is None:
-            custom_widgets.DeviceNotConnectedMessage()
-            xenon_logger.error("Device not connected")
-            return
+        # send in background, save when device confirms
+        self.data_sender.submit(self.data)
 
+    def on_data_sent(self, data):
         # save current profile as default
         self.save_default(self.current_profile)
 
         self.save_data(self.current_profile)
 
+    def on_data_send_failed(self, data):
+        custom_widgets.DeviceNotConnectedMessage()
+        xenon_logger.error("Device not connected")
+
     def save_data(self, file_name):
         self.current_profile = file_name
 
@@ -426,7 +331,7 @@ class Window(QtWidgets.QWidget):
 
         # bindings
         for i, binding_menu in enumerate(self.bindings_buttons_widget.bindings_menus):
-            self.data.settings_yml["bindings_data"]["mode" + str(self.bindings_buttons_widget.current_set_mode)][self.bindings_buttons_names[i]]["name"] = binding_menu.text()
+            self.data.settings_yml["bindings_data"]["mode" + str(self.bindings_buttons_widget.current_set_mode)][self.bindings_buttons_names[i]] = settings_of_label(binding_menu.text())
 
         # rr
         self.data.settings_yml["main_data"]["rr"] = int(self.rr_widget.current_set_rr)
@@ -441,8 +346,7 @@ class Window(QtWidgets.QWidget):
         # set currrent profile label
         self.bottom_buttons_widget.set_profile_label_text(self.current_profile)
 
-        with open(PROFILES_DIR + file_name + ".yml", "w") as f:
-            yaml.dump(self.data.settings_yml, f)
+        Data.save_settings(self.data.settings_yml, PROFILES_DIR + file_name + ".yml")
 
         xenon_logger.info("Data saved")
 
@@ -459,7 +363,7 @@ class Window(QtWidgets.QWidget):
         self.macro_creator.show()
 
     def on_advanced_clicked(self):
-        self.advanced = gui_parts.Advanced(self, 450, 400, self.driver, self.data)
+        self.advanced = gui_parts.Advanced(self, 450, 400, self.data_sender, self.data)
         self.advanced.setWindowModality(Qt.ApplicationModal)
         self.advanced.show()
 
@@ -481,6 +385,11 @@ class Window(QtWidgets.QWidget):
 
         self.close()
 
+    def closeEvent(self, event):
+        if self.data_sender is not None:
+            self.data_sender.stop()
+        super().closeEvent(event)
+
     def save_default(self, file_name):
         with open(DATA_DIR + ".default", "w") as f:
             f.write(file_name)
@@ -507,7 +416,12 @@ class Window(QtWidgets.QWidget):
             path = PROFILES_DIR + file_name + ".yml"
 
         xenon_logger.info(f"loading {file_name}")
-        self.data.settings_yml = self.data.load_data(path)
+        try:
+            cached_data = profile_cache.load(path, self.bindings_buttons_widget.current_set_mode)
+            self.data.settings_yml = cached_data.settings_yml
+        except (FileNotFoundError, EncodeError):
+            cached_data = None
+            self.data.settings_yml = self.data.load_data(path)
         xenon_logger.warning(self.data.settings_yml)
 
         bindings_data = self.data.settings_yml["bindings_data"]
@@ -556,7 +470,11 @@ class Window(QtWidgets.QWidget):
         # set currrent profile label
         self.bottom_buttons_widget.set_profile_label_text(self.current_profile)
 
-        self.assign_data_bytes()
+        # encoded profile is the same as bytes made from just filled widgets
+        if cached_data is None or self.current_profile == "":
+            self.assign_data_bytes()
+        else:
+            self.data.load_payload(cached_data)
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_F11:
@@ -0,0 +1,70 @@
+import threading
+
+from PyQt5 import QtCore
+
+from xenon_driver.logger import xenon_logger
+
+
+class DataSender(QtCore.QThread):
+    """
+    Sends data to the device in background thread, so gui does not freeze
+
+    Only the newest submitted data waits to be sent, older one is dropped.
+    Interface stays claimed between quick consecutive applies (see Driver.session).
+    """
+    IDLE_TIMEOUT = 3
+    sent = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(object)
+
+    def __init__(self, driver, parent=None):
+        super().__init__(parent)
+
+        self.driver = driver
+        self.condition = threading.Condition()
+        self.pending = None
+        self.stopped = False
+
+    def submit(self, data):
+        """
+        Queue snapshot of data, replacing the one which has not been sent yet
+        """
+        with self.condition:
+            if self.pending is not None:
+                xenon_logger.debug("DataSender: dropping older data waiting to be sent")
+            self.pending = data.snapshot()
+            self.condition.notify()
+
+        if not self.isRunning():
+            self.start()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.pending = None
+            self.condition.notify()
+
+        self.wait()
+
+    def run(self):
+        with self.driver.session(idle_timeout=DataSender.IDLE_TIMEOUT):
+            while True:
+                with self.condition:
+                    while self.pending is None and not self.stopped:
+                        self.condition.wait()
+
+                    if self.stopped:
+                        return
+
+                    data = self.pending
+                    self.pending = None
+
+                try:
+                    send_result = self.driver.send_data(data)
+                except Exception as e:
+                    xenon_logger.error(f"DataSender: sending failed ({e})")
+                    send_result = None
+
+                if send_result is None:
+                    self.failed.emit(data)
+                else:
+                    self.sent.emit(data)
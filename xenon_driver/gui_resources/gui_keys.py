@@ -1,52 +1,67 @@
 from PyQt5.QtCore import Qt
-from xenon_driver.options import Options
+from xenon_driver.keys import Keys
 
 
 class GuiKeys:
-    keys_dict = {
-        Qt.Key_A: ["A", Options.KEY_A],
-        Qt.Key_B: ["B", Options.KEY_B],
-        Qt.Key_C: ["C", Options.KEY_C],
-        Qt.Key_D: ["D", Options.KEY_D],
-        Qt.Key_E: ["E", Options.KEY_E],
-        Qt.Key_F: ["F", Options.KEY_F],
-        Qt.Key_G: ["G", Options.KEY_G],
-        Qt.Key_H: ["H", Options.KEY_H],
-        Qt.Key_I: ["I", Options.KEY_I],
-        Qt.Key_J: ["J", Options.KEY_J],
-        Qt.Key_K: ["K", Options.KEY_K],
-        Qt.Key_L: ["L", Options.KEY_L],
-        Qt.Key_M: ["M", Options.KEY_M],
-        Qt.Key_N: ["N", Options.KEY_N],
-        Qt.Key_O: ["O", Options.KEY_O],
-        Qt.Key_P: ["P", Options.KEY_P],
-        Qt.Key_Q: ["Q", Options.KEY_Q],
-        Qt.Key_R: ["R", Options.KEY_R],
-        Qt.Key_S: ["S", Options.KEY_S],
-        Qt.Key_T: ["T", Options.KEY_T],
-        Qt.Key_U: ["U", Options.KEY_U],
-        Qt.Key_V: ["V", Options.KEY_V],
-        Qt.Key_W: ["W", Options.KEY_W],
-        Qt.Key_X: ["X", Options.KEY_X],
-        Qt.Key_Y: ["Y", Options.KEY_Y],
-        Qt.Key_Z: ["Z", Options.KEY_Z],
-        Qt.Key_1: ["1", Options.KEY_1],
-        Qt.Key_2: ["2", Options.KEY_2],
-        Qt.Key_3: ["3", Options.KEY_3],
-        Qt.Key_4: ["4", Options.KEY_4],
-        Qt.Key_5: ["5", Options.KEY_5],
-        Qt.Key_6: ["6", Options.KEY_6],
-        Qt.Key_7: ["7", Options.KEY_7],
-        Qt.Key_8: ["8", Options.KEY_8],
-        Qt.Key_9: ["9", Options.KEY_9],
-        Qt.Key_Control: ["Ctrl", Options.LCTRL],
-        Qt.Key_Shift: ["Shift", Options.LSHIFT],
-        Qt.Key_Alt: ["Alt", Options.LALT],
-        Qt.Key_Super_L: ["Super", Options.WIN],
-    }
+    # Qt key -> name of key (see Keys.NAMES), keypad keys have Qt.KeypadModifier added (see event_key)
+    QT_KEYS = {getattr(Qt, f"Key_{name}"): name for name in "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"}
+    QT_KEYS.update({getattr(Qt, f"Key_F{number}"): f"F{number}" for number in range(1, 13)})
+    QT_KEYS.update(
+        {
+            Qt.Key_Backspace: "Backspace",
+            Qt.Key_Escape: "Escape",
+            Qt.Key_Return: "Enter",
+            Qt.Key_Tab: "Tab",
+            Qt.Key_Space: "Space",
+            Qt.Key_Minus: "Minus",
+            Qt.Key_Equal: "Equal",
+            Qt.Key_BracketLeft: "LeftBracket",
+            Qt.Key_BracketRight: "RightBracket",
+            Qt.Key_Backslash: "Backslash",
+            Qt.Key_Semicolon: "Semicolon",
+            Qt.Key_Apostrophe: "Quote",
+            Qt.Key_QuoteLeft: "Tilde",
+            Qt.Key_Comma: "Comma",
+            Qt.Key_Period: "Dot",
+            Qt.Key_Slash: "Slash",
+            Qt.Key_CapsLock: "CapsLock",
+            Qt.Key_Pause: "Pause",
+            Qt.Key_Insert: "Insert",
+            Qt.Key_Delete: "Delete",
+            Qt.Key_Right: "Right",
+            Qt.Key_Left: "Left",
+            Qt.Key_Down: "Down",
+            Qt.Key_Up: "Up",
+            Qt.Key_NumLock: "NumLock",
+            Qt.Key_Menu: "App",
+            Qt.Key_Control: "Ctrl",
+            Qt.Key_Shift: "Shift",
+            Qt.Key_Alt: "Alt",
+            Qt.Key_Super_L: "Super",
+            Qt.Key_AltGr: "RightAlt",
+        }
+    )
+    QT_KEYS.update({getattr(Qt, f"Key_{number}") | Qt.KeypadModifier: f"Num{number}" for number in range(10)})
+    QT_KEYS.update(
+        {
+            Qt.Key_Slash | Qt.KeypadModifier: "NumSlash",
+            Qt.Key_Asterisk | Qt.KeypadModifier: "NumStar",
+            Qt.Key_Minus | Qt.KeypadModifier: "NumMinus",
+            Qt.Key_Plus | Qt.KeypadModifier: "NumPlus",
+            Qt.Key_Period | Qt.KeypadModifier: "NumDot",
+        }
+    )
 
-    MOUSE_KEYS = {
-        "Left button": Options.LEFT_BUTTON,
-        "Right button": Options.RIGHT_BUTTON,
-        "Middle button": Options.MIDDLE_BUTTON,
-    }
+    # Qt key -> [name, key code]
+    keys_dict = {key: [name, Keys.NAMES[name]] for key, name in QT_KEYS.items()}
+
+    MOUSE_KEYS = Keys.MOUSE_KEYS
+
+    @staticmethod
+    def event_key(event):
+        """
+        Key of QKeyEvent as in QT_KEYS, so keypad keys differ from the same keys elsewhere
+        """
+        if event.modifiers() & Qt.KeypadModifier:
+            return event.key() | Qt.KeypadModifier
+        return event.key()
@@ -28,6 +28,7 @@ from xenon_driver.gui_resources import custom_widgets
 from xenon_driver.gui_resources import gui_keys
 from xenon_driver.options import Options
 from xenon_driver.logger import xenon_logger
+from xenon_driver.macro_simulator import simulate_macros
 
 
 class TopButtons(QWidget):
@@ -518,7 +519,7 @@ class KeyCombinationCatcher(custom_widgets.PopUpWindow):
         self.keys_dict = gui_keys.GuiKeys.keys_dict
 
     def keyPressEvent(self, e):
-        pressed_key = e.key()
+        pressed_key = gui_keys.GuiKeys.event_key(e)
         if pressed_key in [
             QtCore.Qt.Key_Control,
             QtCore.Qt.Key_Alt,
@@ -673,7 +674,7 @@ class KeyCatcher(custom_widgets.PopUpWindow):
         self.close()
 
     def keyPressEvent(self, e):
-        pressed_key = e.key()
+        pressed_key = gui_keys.GuiKeys.event_key(e)
         try:
             key_text = self.keys_dict[pressed_key]
         except KeyError:
@@ -1197,6 +1198,9 @@ class MacroCreator(custom_widgets.PopUpWindow):
                     if i != self.key_list_widget.count() - 1:
                         file.write(",")
 
+            for error in simulate_macros([saved_file_name])[saved_file_name].errors:
+                xenon_logger.warning(f"Macro {saved_file_name}: {error}")
+
         self.update_macros()
 
     def update_macros(self):
@@ -1409,11 +1413,12 @@ class MacroCreator(custom_widgets.PopUpWindow):
 
 
 class Advanced(custom_widgets.PopUpWindow):
-    def __init__(self, parent, size_w, size_h, driver, data):
+    def __init__(self, parent, size_w, size_h, data_sender, data):
         super().__init__(parent, size_w, size_h)
 
         self.data = data
-        self.driver = driver
+        # DataSender of window, None without device
+        self.data_sender = data_sender
         self.last_selected = "Main data"
 
         self.main_data_len = len(self.data.main_data)
@@ -1511,10 +1516,13 @@ class Advanced(custom_widgets.PopUpWindow):
         # self.data.bindings_data = bindings_check
         self.advanced_data = Data(main_load=main_check, reset_load=reset_check, bindings_load=bindings_check)
 
-        if self.driver.send_data(self.advanced_data) is None:
+        if self.data_sender is None:
             custom_widgets.DeviceNotConnectedMessage()
             return
 
+        # send in background like other applies, failure is reported by window
+        self.data_sender.submit(self.advanced_data)
+
     def data_to_string(self, data):
         data_string = ""
         for i, byte in enumerate(data):
@@ -0,0 +1,191 @@
+import os
+import time
+import select
+import socket
+import threading
+
+from xenon_driver.logger import xenon_logger
+
+
+class HotplugMonitor:
+    """
+    Calls on_connect(location, detected_at) every time device shows up in sysfs
+
+    location:
+        "bus-port.port" -> the same as Driver.location_of
+    detected_at:
+        time.monotonic() of noticing device
+
+    Kernel uevents wake monitor up immediately, when they can't be received
+    sysfs is only polled every interval seconds. Devices are told apart by bus and
+    device number too, so device replugged between two polls is noticed as well.
+    """
+    SYSFS_ROOT = "/sys/bus/usb/devices"
+
+    # usb uevents are broadcasted to this group
+    UEVENT_GROUP = 1
+
+    def __init__(self, id_vendor, id_product, on_connect, *, sysfs_root=SYSFS_ROOT, interval=0.5, uevents=True):
+        self.id_vendor = id_vendor
+        self.id_product = id_product
+        self.on_connect = on_connect
+        self.sysfs_root = sysfs_root
+        self.interval = interval
+        self.uevents = uevents
+
+        self.known = set()
+        self.uevent_socket = None
+        self.stopped = threading.Event()
+
+    @staticmethod
+    def read_id(path):
+        try:
+            with open(path, "r") as file:
+                return int(file.read(), 16)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def read_number(path):
+        try:
+            with open(path, "r") as file:
+                return int(file.read())
+        except (OSError, ValueError):
+            return None
+
+    def present_devices(self):
+        """
+        (location, busnum, devnum) of all matching devices found in sysfs, devnum changes on every reconnect
+        """
+        devices = set()
+        if not os.path.isdir(self.sysfs_root):
+            return devices
+
+        with os.scandir(self.sysfs_root) as entries:
+            for entry in entries:
+                # interfaces ("1-1:1.0") and root hubs ("usb1") are not devices we look for
+                if ":" in entry.name or not entry.name[0].isdigit():
+                    continue
+
+                path = os.path.join(self.sysfs_root, entry.name)
+                if (
+                    self.read_id(os.path.join(path, "idVendor")) == self.id_vendor
+                    and self.read_id(os.path.join(path, "idProduct")) == self.id_product
+                ):
+                    devices.add(
+                        (
+                            entry.name,
+                            self.read_number(os.path.join(path, "busnum")),
+                            self.read_number(os.path.join(path, "devnum")),
+                        )
+                    )
+
+        return devices
+
+    def poll(self):
+        """
+        Check sysfs once, returns locations of devices connected since last check
+        """
+        detected_at = time.monotonic()
+        present = self.present_devices()
+        connected = {location for location, _, _ in present - self.known}
+        self.known = present
+
+        for location in sorted(connected):
+            xenon_logger.info(f"HotplugMonitor: device connected at {location}")
+            self.on_connect(location, detected_at)
+
+        return connected
+
+    def forget(self, location):
+        """
+        Device at location was removed, so it is connected again whenever it shows up there
+        """
+        self.known = {device for device in self.known if device[0] != location}
+
+    def open_uevent_socket(self):
+        try:
+            uevent_socket = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, socket.NETLINK_KOBJECT_UEVENT)
+            uevent_socket.bind((0, HotplugMonitor.UEVENT_GROUP))
+        except (OSError, AttributeError) as e:
+            xenon_logger.warning(f"HotplugMonitor: no uevents ({e}), polling sysfs only")
+            return None
+
+        return uevent_socket
+
+    @staticmethod
+    def usb_device_event(message):
+        """
+        (action, location) of uevent of usb device, None for other uevents
+
+        message:
+            b"add@/devices/...\\0ACTION=add\\0DEVPATH=/devices/.../1-1\\0SUBSYSTEM=usb\\0DEVTYPE=usb_device\\0..."
+        """
+        fields = message.split(b"\0")
+        if b"SUBSYSTEM=usb" not in fields or b"DEVTYPE=usb_device" not in fields:
+            return None
+
+        action = location = None
+        for field in fields:
+            if field.startswith(b"ACTION="):
+                action = field[7:].decode(errors="replace")
+            elif field.startswith(b"DEVPATH="):
+                location = os.path.basename(field[8:].decode(errors="replace"))
+        return action, location
+
+    def wait(self):
+        """
+        Wait until usb device is added or interval passes
+        """
+        if self.uevent_socket is None:
+            self.stopped.wait(self.interval)
+            return
+
+        deadline = time.monotonic() + self.interval
+        while not self.stopped.is_set():
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                return
+
+            readable, _, _ = select.select([self.uevent_socket], [], [], timeout)
+            if not readable:
+                return
+
+            # uevents of every subsystem come here, sysfs is checked only when usb device is added
+            added = False
+            while True:
+                try:
+                    message = self.uevent_socket.recv(8192, socket.MSG_DONTWAIT)
+                except BlockingIOError:
+                    break
+
+                event = self.usb_device_event(message)
+                if event is None:
+                    continue
+                action, location = event
+                if action == "remove":
+                    self.forget(location)
+                added = added or action in ("add", "bind")
+
+            if added:
+                return
+
+    def run(self):
+        # devices present at start are configured already
+        self.known = self.present_devices()
+
+        if self.uevents:
+            self.uevent_socket = self.open_uevent_socket()
+
+        try:
+            while not self.stopped.is_set():
+                self.wait()
+                if not self.stopped.is_set():
+                    self.poll()
+        finally:
+            if self.uevent_socket is not None:
+                self.uevent_socket.close()
+                self.uevent_socket = None
+
+    def stop(self):
+        self.stopped.set()
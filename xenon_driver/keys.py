@@ -0,0 +1,132 @@
+from xenon_driver.options import Options
+
+
+class Keys:
+    """
+    Keys which can be bound or used in macros, by the names saved in profiles and macro files
+
+    Names have no spaces, "+", "-" or ",", which separate them in bindings and macros.
+    """
+    NAMES = {
+        "A": Options.KEY_A,
+        "B": Options.KEY_B,
+        "C": Options.KEY_C,
+        "D": Options.KEY_D,
+        "E": Options.KEY_E,
+        "F": Options.KEY_F,
+        "G": Options.KEY_G,
+        "H": Options.KEY_H,
+        "I": Options.KEY_I,
+        "J": Options.KEY_J,
+        "K": Options.KEY_K,
+        "L": Options.KEY_L,
+        "M": Options.KEY_M,
+        "N": Options.KEY_N,
+        "O": Options.KEY_O,
+        "P": Options.KEY_P,
+        "Q": Options.KEY_Q,
+        "R": Options.KEY_R,
+        "S": Options.KEY_S,
+        "T": Options.KEY_T,
+        "U": Options.KEY_U,
+        "V": Options.KEY_V,
+        "W": Options.KEY_W,
+        "X": Options.KEY_X,
+        "Y": Options.KEY_Y,
+        "Z": Options.KEY_Z,
+        "1": Options.KEY_1,
+        "2": Options.KEY_2,
+        "3": Options.KEY_3,
+        "4": Options.KEY_4,
+        "5": Options.KEY_5,
+        "6": Options.KEY_6,
+        "7": Options.KEY_7,
+        "8": Options.KEY_8,
+        "9": Options.KEY_9,
+        "0": Options.KEY_0,
+        "Backspace": Options.KEY_BACKSPACE,
+        "Escape": Options.KEY_ESCAPE,
+        "Enter": Options.KEY_ENTER,
+        "Tab": Options.KEY_TAB,
+        "Space": Options.KEY_SPACE,
+        "Minus": Options.KEY_MINUS,
+        "Equal": Options.KEY_EQUAL,
+        "LeftBracket": Options.KEY_LBRACKET,
+        "RightBracket": Options.KEY_RBRACKET,
+        "Backslash": Options.KEY_BACKSLASH,
+        "Semicolon": Options.KEY_SEMICOLON,
+        "Quote": Options.KEY_QUOTE,
+        "Tilde": Options.KEY_TILDA,
+        "Comma": Options.KEY_COMMA,
+        "Dot": Options.KEY_DOT,
+        "Slash": Options.KEY_SLASH,
+        "CapsLock": Options.KEY_CAPSLOCK,
+        "F1": Options.KEY_F1,
+        "F2": Options.KEY_F2,
+        "F3": Options.KEY_F3,
+        "F4": Options.KEY_F4,
+        "F5": Options.KEY_F5,
+        "F6": Options.KEY_F6,
+        "F7": Options.KEY_F7,
+        "F8": Options.KEY_F8,
+        "F9": Options.KEY_F9,
+        "F10": Options.KEY_F10,
+        "F11": Options.KEY_F11,
+        "F12": Options.KEY_F12,
+        "Pause": Options.KEY_PAUSE,
+        "Insert": Options.KEY_INSERT,
+        "Delete": Options.KEY_DELETE,
+        "Right": Options.KEY_RIGHT,
+        "Left": Options.KEY_LEFT,
+        "Down": Options.KEY_DOWN,
+        "Up": Options.KEY_UP,
+        "NumLock": Options.KEY_NUMLOCK,
+        "NumSlash": Options.KEY_NUMSLASH,
+        "NumStar": Options.KEY_NUMSTAR,
+        "NumMinus": Options.KEY_NUMMINUS,
+        "NumPlus": Options.KEY_NUMPLUS,
+        "Num1": Options.KEY_NUM1,
+        "Num2": Options.KEY_NUM2,
+        "Num3": Options.KEY_NUM3,
+        "Num4": Options.KEY_NUM4,
+        "Num5": Options.KEY_NUM5,
+        "Num6": Options.KEY_NUM6,
+        "Num7": Options.KEY_NUM7,
+        "Num8": Options.KEY_NUM8,
+        "Num9": Options.KEY_NUM9,
+        "Num0": Options.KEY_NUM0,
+        "NumDot": Options.KEY_NUMDOT,
+        "App": Options.KEY_APP,
+        "Ctrl": Options.KEY_LCTRL,
+        "Shift": Options.KEY_LSHIFT,
+        "Alt": Options.KEY_LALT,
+        "Super": Options.KEY_WIN,
+        "RightCtrl": Options.KEY_RCTRL,
+        "RightShift": Options.KEY_RSHIFT,
+        "RightAlt": Options.KEY_RALT,
+    }
+
+    # bits of modifiers byte of key combination, key codes above are used everywhere else
+    MODIFIERS = {
+        "Ctrl": Options.LCTRL,
+        "Shift": Options.LSHIFT,
+        "Alt": Options.LALT,
+        "Super": Options.WIN,
+        "RightCtrl": Options.RCTRL,
+        "RightShift": Options.RSHIFT,
+        "RightAlt": Options.RALT,
+    }
+
+    MOUSE_KEYS = {
+        "Left button": Options.LEFT_BUTTON,
+        "Right button": Options.RIGHT_BUTTON,
+        "Middle button": Options.MIDDLE_BUTTON,
+    }
+
+
+# reverse indexes, key code -> name
+Keys.KEY_NAMES = {code: name for name, code in Keys.NAMES.items()}
+Keys.MOUSE_KEY_NAMES = {code: name for name, code in Keys.MOUSE_KEYS.items()}
+
+# keys which fire binding can press, name -> code
+Keys.FIRE_KEYS = {**Keys.MOUSE_KEYS, **Keys.NAMES}
@@ -0,0 +1,88 @@
+import struct
+from collections import namedtuple
+
+
+# format is struct format of bytes at offset of report ("main_data", "reset_data" or "bindings_data")
+Field = namedtuple("Field", ["report", "offset", "format"])
+
+# id is written into flag byte of button record, macro_slot is the number of its macro region
+Button = namedtuple("Button", ["id", "macro_slot"])
+
+
+class Layout:
+    """
+    Where every setting is placed in data sent to the device (described in data/data_explained)
+
+    DataHandler writes and reads bytes only through this description.
+    """
+    # sizes of reports, payload files keep them in this order
+    REPORT_SIZES = {
+        "main_data": 154,
+        "reset_data": 9,
+        "bindings_data": 1152,
+    }
+
+    FIELDS = {
+        "report_rate": Field("main_data", 8, "B"),
+        "dpi_levels": Field("main_data", 71, "B"),
+        "direction": Field("main_data", 73, "B"),
+        "dpi_values": Field("main_data", 74, "4B"),
+        "led_mode": Field("main_data", 93, "B"),
+        "led_option": Field("main_data", 96, "B"),
+        "led_color": Field("main_data", 97, "3B"),
+        "current_mode": Field("reset_data", 1, "B"),
+    }
+
+    MODES = (1, 2, 3)
+
+    # records of the first mode: [button id | mask, action, speed, times] for every button,
+    # next modes follow every MODE_STRIDE bytes
+    BUTTON_RECORD = Field("bindings_data", 1026, "4B")
+    BUTTON_STRIDE = 4
+    MODE_STRIDE = 40
+
+    # macro slot regions don't follow order of button ids
+    BUTTONS = {
+        "left_button": Button(1, 0),
+        "right_button": Button(2, 1),
+        "middle_button": Button(3, 2),
+        "back_button": Button(4, 3),
+        "forward_button": Button(5, 4),
+        "dpi_button": Button(6, 5),
+        "fire_button": Button(7, 7),
+        "mode_button": Button(8, 6),
+    }
+
+    # every slot is cycle times followed by macro bytes
+    MACRO_SLOT = Field("bindings_data", 2, "B125s")
+    MACRO_STRIDE = 128
+    MACRO_SIZE = 125
+
+    # compiled once
+    STRUCTS = {name: struct.Struct(field.format) for name, field in FIELDS.items()}
+    BUTTON_STRUCT = struct.Struct(BUTTON_RECORD.format)
+    MACRO_STRUCT = struct.Struct(MACRO_SLOT.format)
+
+    @staticmethod
+    def button_offset(button_name, mode):
+        button = Layout.BUTTONS[button_name]
+        return Layout.BUTTON_RECORD.offset + (mode - 1) * Layout.MODE_STRIDE + (button.id - 1) * Layout.BUTTON_STRIDE
+
+    @staticmethod
+    def macro_offset(button_name):
+        return Layout.MACRO_SLOT.offset + Layout.BUTTONS[button_name].macro_slot * Layout.MACRO_STRIDE
+
+
+# (start, end) in bindings_data of every button record and macro slot, computed once
+Layout.RECORD_RANGES = {
+    (button_name, mode): (
+        Layout.button_offset(button_name, mode),
+        Layout.button_offset(button_name, mode) + Layout.BUTTON_STRUCT.size,
+    )
+    for mode in Layout.MODES
+    for button_name in Layout.BUTTONS
+}
+Layout.MACRO_RANGES = {
+    button_name: (Layout.macro_offset(button_name), Layout.macro_offset(button_name) + Layout.MACRO_STRUCT.size)
+    for button_name in Layout.BUTTONS
+}
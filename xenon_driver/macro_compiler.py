@@ -0,0 +1,243 @@
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+from xenon_driver.configuration import MACROS_DIR
+from xenon_driver.keys import Keys
+from xenon_driver.layout import Layout
+from xenon_driver.options import Options
+
+
+# macro_bytes is the whole slot (Layout.MACRO_SIZE bytes) of which size bytes are used,
+# timing_error is sum of ms by which encoded delays differ from the ones in file, error is MacroError or None
+CompiledMacro = namedtuple(
+    "CompiledMacro", ["name", "macro_mode", "cycle_times", "macro_bytes", "size", "timing_error", "error"]
+)
+
+
+class MacroError(ValueError):
+    """
+    Macro file which can't be turned into bytes
+    """
+
+
+class MacroFileNotFound(MacroError):
+    pass
+
+
+MACRO_KEY_DOWN = 0x01
+MACRO_KEY_UP = 0x81
+
+# delay in low bits of event byte, longer one needs [hundreds, Options.MACRO_DELAY_LOOP] after event
+MAX_EVENT_DELAY = 0x7F
+MAX_HUNDREDS = 256
+MAX_DELAY = MAX_HUNDREDS * 100 + MAX_EVENT_DELAY
+
+
+def delay_bytes(delay):
+    """
+    (delay in event byte, bytes after event) of the fewest bytes giving exactly delay ms
+
+    Device waits hundreds * 100 + delay in event byte, where 1 in event byte means 0
+    (and hundreds 0 means 256), so every delay up to MAX_DELAY can be written exactly.
+    """
+    if delay <= MAX_EVENT_DELAY:
+        return delay, []
+
+    hundreds, rest = divmod(delay, 100)
+    if rest == 1:
+        hundreds, rest = hundreds - 1, 101
+    if hundreds > MAX_HUNDREDS:
+        hundreds, rest = MAX_HUNDREDS, rest + (hundreds - MAX_HUNDREDS) * 100
+    if rest > MAX_EVENT_DELAY:
+        raise MacroError(f"delay longer than {MAX_DELAY} ms: {delay} ms")
+
+    return rest if rest != 0 else 1, [hundreds % 256, Options.MACRO_DELAY_LOOP]
+
+
+def encoded_delay(event_delay, extra_bytes):
+    """
+    ms device waits after event, reverse of delay_bytes
+    """
+    if not extra_bytes:
+        return event_delay
+
+    hundreds = extra_bytes[0] if extra_bytes[0] != 0 else 256
+    return hundreds * 100 + (event_delay if event_delay != 1 else 0)
+
+
+def parse_events(events):
+    """
+    [state byte, key code, delay after it] of every key event, consecutive delays are added together
+    """
+    parsed = []
+    for event in events.split(","):
+        if event == "":
+            break
+
+        head, _, state = event.rpartition(" - ")
+        if head == "Delay":
+            try:
+                delay = int(state.split(" ")[0])
+            except ValueError:
+                raise MacroError(f"wrong delay: {event}")
+            if delay < 1:
+                raise MacroError(f"delay shorter than 1 ms: {event}")
+            if not parsed:
+                raise MacroError(f"delay before first key: {event}")
+
+            parsed[-1][2] += delay
+            continue
+
+        if state == "Down":
+            state_byte = MACRO_KEY_DOWN
+        elif state == "Up":
+            state_byte = MACRO_KEY_UP
+        else:
+            raise MacroError(f"key should be Down or Up: {event}")
+
+        if head.startswith("Key ") and head[4:] in Keys.NAMES:
+            code = Keys.NAMES[head[4:]]
+        elif head in Keys.MOUSE_KEYS:
+            code = Keys.MOUSE_KEYS[head]
+        else:
+            raise MacroError(f"unknown key: {event}")
+
+        parsed.append([state_byte, code, 0])
+
+    return parsed
+
+
+def translate(text):
+    """
+    (macro_mode, cycle_times, macro_bytes, timing_error) of text of macro file
+
+    text:
+        ie. "2,1:Key A - Down,Delay - 50 ms,Key A - Up,Left button - Down,Left button - Up"
+
+    Every event is [0x01 or 0x81 + delay - 1, key code], longer delay is
+    followed by [hundreds, Options.MACRO_DELAY_LOOP]. Raises MacroError,
+    also if macro doesn't fit into Layout.MACRO_SIZE bytes.
+    """
+    prefix, separator, events = text.partition(":")
+    if not separator:
+        raise MacroError("no ':' after macro mode and cycle times")
+
+    try:
+        macro_mode, cycle_times = (int(value) for value in prefix.split(","))
+    except ValueError:
+        raise MacroError(f"wrong macro mode and cycle times: {prefix}")
+
+    macro_bytes = []
+    timing_error = 0
+    fitting_events = None
+    for i, (state_byte, code, delay) in enumerate(parse_events(events)):
+        # 1 ms is the same as no delay
+        delay = max(delay, 1)
+        event_delay, extra_bytes = delay_bytes(delay)
+        timing_error += abs(delay - encoded_delay(event_delay, extra_bytes))
+
+        macro_bytes += [state_byte + event_delay - 1, code] + extra_bytes
+        if len(macro_bytes) > Layout.MACRO_SIZE and fitting_events is None:
+            fitting_events = i
+
+    if fitting_events is not None:
+        raise MacroError(
+            f"macro needs {len(macro_bytes)} bytes, only {Layout.MACRO_SIZE} fit into slot "
+            f"(first {fitting_events} key events fit)"
+        )
+
+    return macro_mode, cycle_times, macro_bytes, timing_error
+
+
+def read_events(macro_bytes):
+    """
+    [state byte, key code, delay after it] of every key event in macro slot, reverse of translate
+
+    Events end at the first 0x00 or at the end of slot.
+    """
+    events = []
+    i = 0
+    while i + 1 < len(macro_bytes) and macro_bytes[i] != 0x00:
+        event, code = macro_bytes[i], macro_bytes[i + 1]
+        i += 2
+
+        extra_bytes = ()
+        if i + 1 < len(macro_bytes) and macro_bytes[i + 1] == Options.MACRO_DELAY_LOOP:
+            extra_bytes = macro_bytes[i:i + 2]
+            i += 2
+
+        state_byte = MACRO_KEY_UP if event & 0x80 else MACRO_KEY_DOWN
+        events.append([state_byte, code, encoded_delay(event & MAX_EVENT_DELAY, extra_bytes)])
+
+    return events
+
+
+class MacroCompiler:
+    """
+    Compiled macro files, key is path, modification time and size of file
+
+    Macro is read and translated again only after its file has changed,
+    the least recently used ones are dropped first.
+    """
+    MAX_SIZE = 64
+
+    def __init__(self, macros_dir=MACROS_DIR, max_size=MAX_SIZE):
+        self.macros_dir = macros_dir
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, name):
+        """
+        CompiledMacro of macro file, errors are returned in it (MacroFileNotFound if file doesn't exist)
+        """
+        path = os.path.join(self.macros_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return CompiledMacro(name, None, None, None, 0, 0, MacroFileNotFound(f"Macro not found: {name}"))
+        key = (path, stat.st_mtime_ns, stat.st_size)
+
+        with self.lock:
+            macro = self.entries.get(key)
+            if macro is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return macro
+
+        macro = self.compile_file(name, path)
+
+        with self.lock:
+            self.entries[key] = macro
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+            self.misses += 1
+
+        return macro
+
+    @staticmethod
+    def compile_file(name, path):
+        try:
+            with open(path, "r") as file:
+                text = file.readline()
+        except FileNotFoundError:
+            return CompiledMacro(name, None, None, None, 0, 0, MacroFileNotFound(f"Macro not found: {name}"))
+
+        try:
+            macro_mode, cycle_times, macro_bytes, timing_error = translate(text)
+        except MacroError as e:
+            return CompiledMacro(name, None, None, None, 0, 0, e)
+
+        # the rest of slot is zeros
+        slot = bytes(macro_bytes).ljust(Layout.MACRO_SIZE, b"\x00")
+        return CompiledMacro(name, macro_mode, cycle_times, slot, len(macro_bytes), timing_error, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+macro_compiler = MacroCompiler()
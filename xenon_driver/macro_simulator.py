@@ -0,0 +1,121 @@
+"""
+What macro does on the device, worked out from the bytes written into its slot
+"""
+import math
+from collections import namedtuple
+from functools import lru_cache
+
+from xenon_driver.keys import Keys
+from xenon_driver.macro_compiler import MACRO_KEY_DOWN, macro_compiler, read_events
+from xenon_driver.validator import Validator
+
+# time is ms from start of macro, key as in macro file (ie. "Key A", "Left button"), state is "Down" or "Up"
+MacroEvent = namedtuple("MacroEvent", ["time", "key", "state"])
+
+# cycle_events are MacroEvents of one cycle, which is played cycles times and takes cycle_duration ms,
+# stuck_keys are Down events of the last cycle without Up after them, errors are strings
+MacroSimulation = namedtuple(
+    "MacroSimulation",
+    ["macro_mode", "cycles", "cycle_events", "cycle_duration", "duration", "stuck_keys", "errors"],
+)
+
+# macro modes, the low nibble of macro action
+CYCLE_TIMES = 1
+UNTIL_KEY_PRESSED = 2
+UNTIL_KEY_RELEASED = 4
+
+
+def key_label(code):
+    """
+    Key of code as in macro file, None if device doesn't know it
+    """
+    if code in Keys.MOUSE_KEY_NAMES:
+        return Keys.MOUSE_KEY_NAMES[code]
+    if code in Keys.KEY_NAMES:
+        return f"Key {Keys.KEY_NAMES[code]}"
+    return None
+
+
+@lru_cache(maxsize=1024)
+def simulate(macro_mode, cycle_times, macro_bytes, stop=None):
+    """
+    MacroSimulation of macro slot as device plays it, every key event waits its delay after it
+
+    macro_bytes:
+        bytes of slot (CompiledMacro.macro_bytes or DataHandler.read_macro)
+    stop:
+        ms after which button is released (UNTIL_KEY_RELEASED) or other key pressed (UNTIL_KEY_PRESSED),
+        cycle which has started is played to the end, None -> one cycle
+    """
+    errors = []
+    if macro_mode not in Validator.MACRO_MODES:
+        errors.append(f"mode {macro_mode} not allowed")
+
+    cycle_events = []
+    # key -> the first Down event since it was released
+    pressed = {}
+    time = 0
+    for state_byte, code, delay in read_events(macro_bytes):
+        key = key_label(code)
+        if key is None:
+            errors.append(f"unknown key code 0x{code:02x} at {time} ms")
+            key = f"0x{code:02x}"
+
+        if state_byte == MACRO_KEY_DOWN:
+            event = MacroEvent(time, key, "Down")
+            pressed.setdefault(key, event)
+        else:
+            event = MacroEvent(time, key, "Up")
+            pressed.pop(key, None)
+
+        cycle_events.append(event)
+        time += delay
+
+    if not cycle_events:
+        errors.append("no key events")
+
+    if macro_mode == CYCLE_TIMES:
+        cycles = cycle_times
+        if cycles == 0:
+            errors.append("cycle times 0, macro is never played")
+    elif stop is None or time == 0:
+        cycles = 1
+    else:
+        cycles = max(1, math.ceil(stop / time))
+
+    stuck_keys = ()
+    if cycles:
+        last_cycle = (cycles - 1) * time
+        stuck_keys = tuple(MacroEvent(last_cycle + event.time, event.key, event.state) for event in pressed.values())
+    for event in stuck_keys:
+        errors.append(f"{event.key} pressed at {event.time} ms is never released")
+
+    return MacroSimulation(macro_mode, cycles, tuple(cycle_events), time, cycles * time, stuck_keys, tuple(errors))
+
+
+def timeline(simulation):
+    """
+    MacroEvents of every cycle of simulation, one after another
+    """
+    for cycle in range(simulation.cycles):
+        start = cycle * simulation.cycle_duration
+        for event in simulation.cycle_events:
+            yield MacroEvent(start + event.time, event.key, event.state)
+
+
+def simulate_macros(names, stop=None, compiler=macro_compiler):
+    """
+    Macro file name -> MacroSimulation, macro which can't be compiled has only its error
+
+    Compiled macros and simulations are cached, so checking every macro again after each save
+    reads and simulates only the changed ones.
+    """
+    simulations = {}
+    for name in names:
+        macro = compiler.compile(name)
+        if macro.error is not None:
+            simulations[name] = MacroSimulation(macro.macro_mode, 0, (), 0, 0, (), (str(macro.error),))
+        else:
+            simulations[name] = simulate(macro.macro_mode, macro.cycle_times, macro.macro_bytes, stop)
+
+    return simulations
@@ -1,20 +1,31 @@
 import sys
-import xenon_driver
 import argparse
 
+from xenon_driver import cli
+from xenon_driver.configuration import ID_VENDOR, ID_PRODUCT
 
-def main():
-    p = argparse.ArgumentParser()
+
+def gui(args):
+    # imported here, so commands without gui start quickly
+    import xenon_driver
+
+    with xenon_driver.Driver(ID_VENDOR, ID_PRODUCT) as driver:
+        w = xenon_driver.Window(driver, dry_run=args.dry_run)
+        w.show()
+        return xenon_driver.Window.App.exec_()
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="xenon_driver")
     p.add_argument("--dry_run", "-d", action="store_true")
+    p.set_defaults(command=gui)
 
-    args = p.parse_args()
+    subparsers = p.add_subparsers(title="commands (gui is started without one)")
+    cli.add_commands(subparsers)
 
-    is_dry_run = vars(args)["dry_run"]
+    args = p.parse_args(argv)
 
-    with xenon_driver.Driver(0x258A, 0x1007) as driver:
-        w = xenon_driver.Window(driver, dry_run=is_dry_run)
-        w.show()
-        sys.exit(xenon_driver.Window.App.exec_())
+    sys.exit(args.command(args))
 
 
 if __name__ == "__main__":
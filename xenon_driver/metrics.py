@@ -0,0 +1,105 @@
+import sys
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+
+class Histogram:
+    """
+    Latency histogram with logarithmic buckets (four per doubling), from 1 us up to ~30 s
+    """
+    BOUNDS = [0.000001 * 2 ** (i / 4) for i in range(100)]
+
+    def __init__(self):
+        self.buckets = [0] * (len(Histogram.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, seconds):
+        self.buckets[bisect.bisect_left(Histogram.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def percentile(self, percent):
+        """
+        Upper bound of bucket holding given percentile (clamped to measured max)
+        """
+        if not self.count:
+            return None
+
+        wanted = self.count * percent / 100
+        seen = 0
+        for i, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= wanted and bucket_count:
+                if i == len(Histogram.BOUNDS):
+                    return self.max
+                return min(Histogram.BOUNDS[i], self.max)
+        return self.max
+
+    def summary(self):
+        """
+        returns dict with count and times in milliseconds
+        """
+        if not self.count:
+            return {"count": 0}
+
+        return {
+            "count": self.count,
+            "mean": self.total / self.count * 1000,
+            "min": self.min * 1000,
+            "p50": self.percentile(50) * 1000,
+            "p95": self.percentile(95) * 1000,
+            "p99": self.percentile(99) * 1000,
+            "max": self.max * 1000,
+        }
+
+
+class Metrics:
+    """
+    Named latency histograms, ie. one for every phase of sending data
+    """
+    def __init__(self):
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    @contextmanager
+    def measure(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def summary(self):
+        with self.lock:
+            return {name: histogram.summary() for name, histogram in self.histograms.items()}
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+
+    def dump(self, file=None):
+        file = sys.stderr if file is None else file
+
+        print(f"{'phase':<16} {'count':>6} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  (ms)", file=file)
+        for name, summary in self.summary().items():
+            if not summary["count"]:
+                continue
+            print(
+                f"{name:<16} {summary['count']:>6} {summary['mean']:>9.3f} {summary['p50']:>9.3f} "
+                f"{summary['p95']:>9.3f} {summary['p99']:>9.3f} {summary['max']:>9.3f}",
+                file=file,
+            )
@@ -192,6 +192,15 @@ class Options:
 
     KEY_APP = 0x65
 
+    # modifiers pressed as keys, in fire and macros
+    KEY_LCTRL = 0xe0
+    KEY_LSHIFT = 0xe1
+    KEY_LALT = 0xe2
+    KEY_WIN = 0xe3
+    KEY_RCTRL = 0xe4
+    KEY_RSHIFT = 0xe5
+    KEY_RALT = 0xe6
+
     # my mutlimedia keys
     MEDIAPLAYER = 0x99
     PLAYPAUSE = 0xa0
@@ -0,0 +1,119 @@
+import copy
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+
+from xenon_driver.binding import BindingError, from_settings
+from xenon_driver.configuration import MACROS_DIR
+from xenon_driver.data import Data
+from xenon_driver.data_handler import DataHandler
+from xenon_driver.encoder import ProfileEncoder
+
+
+CachedProfile = namedtuple(
+    "CachedProfile",
+    ["macro_names", "macros_digest", "settings_yml", "main_data", "reset_data", "bindings_data", "encoded"],
+)
+
+
+class ProfileCache:
+    """
+    Encoded profiles, key is hash of yml file content and current mode
+
+    Entry is used only if macro files the profile uses have the same content
+    as when it was encoded, the least recently used entries are dropped first.
+    """
+    MAX_SIZE = 32
+
+    def __init__(self, max_size=MAX_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def macro_names(settings_yml):
+        names = []
+        for mode_bindings in settings_yml["bindings_data"].values():
+            for button_settings in mode_bindings.values():
+                try:
+                    binding = from_settings(button_settings)
+                except BindingError:
+                    # encoder reports it
+                    continue
+                if binding.kind == "macro":
+                    names.append(binding.params[0])
+
+        return sorted(set(names))
+
+    @staticmethod
+    def macros_digest(macro_names):
+        digest = hashlib.sha256()
+        for name in macro_names:
+            digest.update(name.encode() + b"\0")
+            try:
+                with open(MACROS_DIR + name, "rb") as file:
+                    digest.update(file.read())
+            except FileNotFoundError:
+                digest.update(b"\0missing")
+            digest.update(b"\0")
+
+        return digest.digest()
+
+    def load(self, file_path, current_mode=1):
+        """
+        Data with encoded profile, raises EncodeError (MacroNotFoundError) or FileNotFoundError
+        """
+        with open(file_path, "rb") as file:
+            content = file.read()
+        key = (hashlib.sha256(content).digest(), current_mode)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.macros_digest == self.macros_digest(entry.macro_names):
+                self.entries.move_to_end(key)
+                self.hits += 1
+            else:
+                entry = self.encode(Data.parse_settings(content, file_path), current_mode)
+                self.entries[key] = entry
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+                self.misses += 1
+
+        data = Data(main_load=entry.main_data, reset_load=entry.reset_data, bindings_load=entry.bindings_data)
+        # caller may modify settings, cached ones have to stay the same
+        data.settings_yml = copy.deepcopy(entry.settings_yml)
+        # encoder skips settings which are the same in data already
+        data.encoded = dict(entry.encoded)
+        data.file_name = Path(file_path).stem
+
+        return data
+
+    def encode(self, settings_yml, current_mode):
+        macro_names = self.macro_names(settings_yml)
+        # taken before encoding, so macro changed meanwhile is encoded again next time
+        macros_digest = self.macros_digest(macro_names)
+
+        data = Data()
+        data.settings_yml = settings_yml
+        ProfileEncoder(DataHandler(data)).encode(settings_yml, current_mode)
+
+        return CachedProfile(
+            macro_names,
+            macros_digest,
+            copy.deepcopy(settings_yml),
+            bytes(data.main_data),
+            bytes(data.reset_data),
+            bytes(data.bindings_data),
+            dict(data.encoded),
+        )
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+profile_cache = ProfileCache()
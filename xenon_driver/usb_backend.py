@@ -0,0 +1,37 @@
+import os
+
+import usb.core
+import usb.util
+
+
+class UsbBackend:
+    """
+    pyusb calls used by Driver, gathered in one place so they can be replaced (see fake_usb)
+    """
+    DEVICES_DIR = "/dev/bus/usb/"
+
+    def find(self, **kwargs):
+        return usb.core.find(**kwargs)
+
+    def claim_interface(self, dev, interface):
+        usb.util.claim_interface(dev, interface)
+
+    def release_interface(self, dev, interface):
+        usb.util.release_interface(dev, interface)
+
+    def dispose_resources(self, dev):
+        usb.util.dispose_resources(dev)
+
+    def is_present(self, dev):
+        """
+        Cheap check whether device is still plugged in (no bus enumeration)
+
+        Unplugged device loses its node in /dev/bus/usb and gets a new address
+        when it comes back, so a single stat is enough. Where that directory
+        does not exist the device is trusted until a transfer fails.
+        """
+        if not os.path.isdir(UsbBackend.DEVICES_DIR):
+            return True
+
+        node = os.path.join(UsbBackend.DEVICES_DIR, f"{dev.bus:03d}", f"{dev.address:03d}")
+        return os.path.exists(node)
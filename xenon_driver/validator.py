@@ -0,0 +1,203 @@
+from xenon_driver.keys import Keys
+from xenon_driver.layout import Layout
+from xenon_driver.options import Options
+
+
+class Validator:
+    """
+    Tables of values device accepts, built once, so checking whole profile is only set lookups
+
+    Every check returns list of errors (empty if everything is fine), so all of them can be reported at once.
+    """
+    NONE = frozenset([0x00])
+
+    REPORT_RATES = frozenset([Options.REPORT_RATE_250MHZ, Options.REPORT_RATE_500MHZ, Options.REPORT_RATE_1000MHZ])
+
+    # 0x00-0x0b and the same values blocked
+    DPI_VALUES = frozenset(range(0x00, 0x0C)) | frozenset(range(Options.BLOCKED_DPI_LEVEL_MASK, 0x8C))
+
+    # brightness or speed is the high nibble (0x01, 0x11, ..., 0xa1), off has no option
+    LED_OPTIONS = {
+        Options.STEADY: frozenset(range(0x01, 0xA2, 0x10)),
+        Options.BREATH: frozenset(range(0x01, 0xA2, 0x10)),
+        Options.NEON: frozenset(range(0x01, 0xA2, 0x10)),
+        Options.OFF: NONE,
+    }
+    LED_MODES = {"Steady": Options.STEADY, "Breath": Options.BREATH, "Neon": Options.NEON, "Off": Options.OFF}
+
+    COLOR = frozenset(range(0x100))
+
+    KEY_CODES = frozenset(Keys.KEY_NAMES)
+    FIRE_KEYS = frozenset(Keys.FIRE_KEYS.values())
+    CLICKS = frozenset(
+        [Options.LEFT_BUTTON, Options.RIGHT_BUTTON, Options.MIDDLE_BUTTON, Options.BACK_BUTTON, Options.FORWARD_BUTTON]
+    )
+    MULTIMEDIA_KEYS = frozenset(
+        [
+            Options.MEDIAPLAYER,
+            Options.PLAYPAUSE,
+            Options.NEXT,
+            Options.PREVIOUS,
+            Options.STOP,
+            Options.MUTE,
+            Options.VOLUMEUP,
+            Options.VOLUMEDOWN,
+            Options.CALCULATOR,
+            Options.HOMEPAGE,
+        ]
+    )
+    MODIFIER_BITS = frozenset(range(sum(Keys.MODIFIERS.values()) + 1))
+
+    DPI_ACTIONS = frozenset(
+        [
+            Options.DPI_LOOP,
+            Options.DPI_PLUS,
+            Options.DPI_MINUS,
+            Options.SNIPE_DPI500,
+            Options.SNIPE_DPI750,
+            Options.SNIPE_DPI1000,
+            Options.SNIPE_DPI1250,
+            Options.SNIPE_DPI1375,
+            Options.SNIPE_DPI1500,
+            Options.SNIPE_DPI1750,
+            Options.SNIPE_DPI2000,
+            Options.SNIPE_DPI2500,
+            Options.SNIPE_DPI2750,
+            Options.SNIPE_DPI3200,
+        ]
+    )
+
+    # the low nibble of macro action
+    MACRO_MODES = frozenset([1, 2, 4])
+
+    # mask -> (name, actions, speeds, times), masks shared by two kinds of bindings have both
+    BINDINGS = {
+        Options.CLICK_MASK: ("click", CLICKS, NONE, NONE),
+        Options.FIRE_MASK: ("fire key", FIRE_KEYS, frozenset(range(5, 0x100)), frozenset(range(1, 0x100))),
+        Options.DPI_LOOP_MASK: ("dpi loop or snipe", DPI_ACTIONS, NONE, NONE),
+        Options.THREE_CLICK_MASK: ("three click", frozenset([Options.THREE_CLICK_ACTION]), NONE, NONE),
+        Options.MODE_MASK: ("mode switch or disable", frozenset([Options.MODE_ACTION, Options.DISABLE_ACTION]), NONE, NONE),
+        Options.KEY_COMBINATION_MASK: (
+            "keys combination or multimedia",
+            MODIFIER_BITS,
+            NONE | KEY_CODES | MULTIMEDIA_KEYS,
+            NONE | KEY_CODES,
+        ),
+        # slot and macro mode are added to action when record is written
+        Options.MACRO_MASK: ("macro", NONE, NONE, NONE),
+    }
+
+    # (button name, action) of written macro records, action is macro slot + 1 and macro mode
+    MACRO_ACTIONS = frozenset(
+        (name, (button.macro_slot + 1) << 4 | macro_mode)
+        for macro_mode in MACRO_MODES
+        for name, button in Layout.BUTTONS.items()
+    )
+
+    @staticmethod
+    def check_binding(mask, action, speed=0x00, times=0x00):
+        """
+        Errors of one button record before it is written
+        """
+        binding = Validator.BINDINGS.get(mask)
+        if binding is None:
+            return [f"mask {mask:#04x} not allowed"]
+
+        name, actions, speeds, times_values = binding
+        errors = []
+        if action not in actions:
+            errors.append(f"{name}: action {action:#04x} not allowed")
+        if speed not in speeds:
+            errors.append(f"{name}: speed {speed} not allowed")
+        if times not in times_values:
+            errors.append(f"{name}: times {times} not allowed")
+
+        return errors
+
+    @staticmethod
+    def check_macro(macro):
+        """
+        macro:
+            CompiledMacro (or MacroTranslator)
+        """
+        errors = []
+        if macro.macro_mode not in Validator.MACRO_MODES:
+            errors.append(f"macro: mode {macro.macro_mode} not allowed")
+        if macro.cycle_times not in Validator.COLOR:
+            errors.append(f"macro: cycle times {macro.cycle_times} not allowed")
+
+        return errors
+
+    @staticmethod
+    def check_main_data(main_data):
+        """
+        Errors in main_data of profile settings, before they are encoded
+        """
+        errors = []
+
+        if main_data.get("rr") not in Validator.REPORT_RATES:
+            errors.append(f"report rate {main_data.get('rr')} not allowed")
+
+        dpis = main_data.get("dpis")
+        if not isinstance(dpis, list) or len(dpis) != Layout.STRUCTS["dpi_values"].size:
+            errors.append(f"dpis should be list of 4 values, not {dpis}")
+        else:
+            errors += [f"dpi value {dpi} not allowed" for dpi in dpis if dpi not in Validator.DPI_VALUES]
+            if all(dpi & Options.BLOCKED_DPI_LEVEL_MASK for dpi in dpis if isinstance(dpi, int)):
+                errors.append("every dpi level is blocked")
+
+        chosen = main_data.get("chosen")
+        if chosen not in Validator.LED_MODES:
+            errors.append(f"led mode {chosen} not allowed")
+            return errors
+
+        led_settings = main_data.get(chosen.lower()) or {}
+        option = led_settings.get("option")
+        if option is None:
+            option = 0x00
+        if option not in Validator.LED_OPTIONS[Validator.LED_MODES[chosen]]:
+            errors.append(f"{chosen.lower()} option {option} not allowed")
+
+        color = led_settings.get("color")
+        if not isinstance(color, list) or len(color) != 3 or any(value not in Validator.COLOR for value in color):
+            errors.append(f"{chosen.lower()} color {color} not allowed")
+
+        return errors
+
+    @staticmethod
+    def check_data(data_handler):
+        """
+        Errors in bytes which would be sent to device
+        """
+        errors = []
+
+        report_rate = data_handler.read("report_rate")
+        if report_rate not in Validator.REPORT_RATES:
+            errors.append(f"report rate {report_rate:#04x} not allowed")
+
+        dpis = data_handler.read("dpi_values")
+        errors += [f"dpi value {dpi:#04x} not allowed" for dpi in dpis if dpi not in Validator.DPI_VALUES]
+        dpi_levels = sum(dpi & 0xF0 != Options.BLOCKED_DPI_LEVEL_MASK for dpi in dpis)
+        if data_handler.read("dpi_levels") != dpi_levels or dpi_levels == 0:
+            errors.append(f"dpi levels {data_handler.read('dpi_levels')} with {dpi_levels} dpi values not blocked")
+
+        led_mode = data_handler.read("led_mode")
+        led_option = data_handler.read("led_option")
+        if led_mode not in Validator.LED_OPTIONS:
+            errors.append(f"led mode {led_mode:#04x} not allowed")
+        elif led_option not in Validator.LED_OPTIONS[led_mode]:
+            errors.append(f"led option {led_option:#04x} not allowed")
+
+        for mode in Layout.MODES:
+            for button_name in Layout.BUTTONS:
+                mask, action, speed, times = data_handler.read_button(button_name, mode)
+                if mask == Options.MACRO_MASK:
+                    if (button_name, action) not in Validator.MACRO_ACTIONS:
+                        errors.append(f"mode{mode} {button_name}: macro action {action:#04x} not allowed")
+                    continue
+
+                errors += [
+                    f"mode{mode} {button_name}: {error}" for error in Validator.check_binding(mask, action, speed, times)
+                ]
+
+        return errors
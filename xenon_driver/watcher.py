@@ -0,0 +1,102 @@
+import os
+import time
+import threading
+
+from xenon_driver.logger import xenon_logger
+
+
+class ProcessWatcher:
+    """
+    Switches profile according to running processes
+
+    rules:
+        [(process_name, profile), ...] -> first rule whose process runs wins
+    switch:
+        function(profile) -> True if profile has been applied
+    default:
+        profile applied when no rule matches, None -> keep current one
+    debounce:
+        seconds wanted profile must stay the same before it is applied,
+        so quickly started and closed processes don't cause switching
+    """
+    # kernel keeps only that many characters of process name in comm
+    COMM_LENGTH = 15
+
+    def __init__(self, rules, switch, *, proc_root="/proc", default=None, interval=1.0, debounce=2.0):
+        self.rules = [(name[:ProcessWatcher.COMM_LENGTH], profile) for name, profile in rules]
+        self.switch = switch
+        self.proc_root = proc_root
+        self.default = default
+        self.interval = interval
+        self.debounce = debounce
+
+        self.candidate = None
+        self.candidate_since = None
+        self.applied = None
+        self.stopped = threading.Event()
+
+    def running_processes(self):
+        """
+        Names of running processes
+
+        comm is read on every poll, because exec keeps pid (and its start time) but changes the name,
+        ie. launcher script which execs the game.
+        """
+        names = set()
+        with os.scandir(self.proc_root) as entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+
+                try:
+                    fd = os.open(os.path.join(entry.path, "comm"), os.O_RDONLY)
+                except OSError:
+                    # process has just ended
+                    continue
+                try:
+                    names.add(os.read(fd, 64).decode(errors="replace").rstrip("\n"))
+                except OSError:
+                    continue
+                finally:
+                    os.close(fd)
+
+        return names
+
+    def wanted_profile(self, running):
+        for name, profile in self.rules:
+            if name in running:
+                return profile
+
+        return self.default
+
+    def poll(self, now=None):
+        """
+        Check processes once and switch profile if needed, returns applied profile
+        """
+        if now is None:
+            now = time.monotonic()
+
+        wanted = self.wanted_profile(self.running_processes())
+
+        if wanted != self.candidate:
+            self.candidate = wanted
+            self.candidate_since = now
+
+        if (
+            self.candidate is not None
+            and self.candidate != self.applied
+            and now - self.candidate_since >= self.debounce
+        ):
+            xenon_logger.info(f"ProcessWatcher: switching to {self.candidate}")
+            if self.switch(self.candidate):
+                self.applied = self.candidate
+
+        return self.applied
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.poll()
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()